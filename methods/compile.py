@@ -5,6 +5,7 @@ from collections import defaultdict
 
 from methods.regex.patterns import SOURCE_PATTERN
 from methods.shell_line import first_top_level_pipeline_index, get_commands
+from methods.source_budget import EvaluationBudget
 from methods.source_evaluator import SourceEvaluator
 from methods.source_effects import (
     CaseBlock,
@@ -17,9 +18,12 @@ from methods.source_effects import (
     SetCommand,
     WhileLoop,
 )
+from methods.source_filesystem import cached_filesystem, filesystem
 from methods.source_frontend import LineParserFrontend
+from methods.source_ir_cache import DEFAULT_CACHE_MAX_BYTES, ScriptIRCache
 from methods.source_resolver import (
     ASSIGNMENT_WORD_PATTERN,
+    MAX_BRACE_EXPANSIONS,
     MISSING_SOURCE_NO_FILENAME,
     SOURCE_EXPANSION_FAILURE_RETURN,
     ResolvedSource,
@@ -262,12 +266,19 @@ def nodes_have_top_level_positional_mutation(nodes):
     return False
 
 
-def file_top_level_source_traits(filepath: str, content: str):
+def parse_script_ir(filepath: str, content: str, script_irs=None):
+    ir = script_irs.get(filesystem().realpath(filepath)) if script_irs else None
+    if ir is None:
+        ir = LineParserFrontend().parse(os.path.abspath(filepath), content)
+    return ir
+
+
+def file_top_level_source_traits(filepath: str, content: str, script_irs=None):
     has_return_text = "return" in content
     has_positional_mutation_text = bool(re.search(r'\b(?:set|shift)\b', content))
     if not has_return_text and not has_positional_mutation_text:
         return False, False
-    ir = LineParserFrontend().parse(os.path.abspath(filepath), content)
+    ir = parse_script_ir(filepath, content, script_irs)
     return (
         nodes_have_top_level_return(ir.nodes) if has_return_text else False,
         nodes_have_top_level_positional_mutation(ir.nodes) if has_positional_mutation_text else False,
@@ -420,9 +431,10 @@ def source_positional_sync_replacements(
     *,
     capture_shift: bool,
     capture_shift_when_set: bool = False,
+    script_irs=None,
 ):
     names = source_positional_capture_names(filepath)
-    ir = LineParserFrontend().parse(os.path.abspath(filepath), content)
+    ir = parse_script_ir(filepath, content, script_irs)
     replacements = {}
     _collect_positional_sync_replacements(
         ir.nodes,
@@ -1052,6 +1064,8 @@ def line_contains_unresolved_source(line: str):
 def render_executable_script(entry_point: str, context: dict):
     file_contents = {}
     top_level_trait_cache = {}
+    positional_sync_cache = {}
+    script_irs = context.get('scripts', {})
     render_stack = []
 
     def get_content(filepath):
@@ -1062,9 +1076,21 @@ def render_executable_script(entry_point: str, context: dict):
 
     def top_level_traits(filepath, content):
         if filepath not in top_level_trait_cache:
-            top_level_trait_cache[filepath] = file_top_level_source_traits(filepath, content)
+            top_level_trait_cache[filepath] = file_top_level_source_traits(filepath, content, script_irs)
         return top_level_trait_cache[filepath]
 
+    def positional_sync(filepath, content, capture_shift_when_set):
+        key = (filepath, capture_shift_when_set)
+        if key not in positional_sync_cache:
+            positional_sync_cache[key] = source_positional_sync_replacements(
+                filepath,
+                content,
+                capture_shift=True,
+                capture_shift_when_set=capture_shift_when_set,
+                script_irs=script_irs,
+            )
+        return positional_sync_cache[key]
+
     def render_file(
         filepath,
         *,
@@ -1106,12 +1132,7 @@ def render_executable_script(entry_point: str, context: dict):
                 else None
             )
             positional_sync_replacements = (
-                source_positional_sync_replacements(
-                    filepath,
-                    content,
-                    capture_shift=True,
-                    capture_shift_when_set=source_arguments is not None,
-                )
+                positional_sync(filepath, content, source_arguments is not None)
                 if (
                     as_source
                     and (
@@ -1221,7 +1242,7 @@ def render_context_files(ordered_dependencies: list[str], entry_point: str, cont
     return output
 
 
-def context_from_source_events(events, disabled_sources=(), line_replacements=()):
+def context_from_source_events(events, disabled_sources=(), line_replacements=(), scripts=()):
     source_declarations = defaultdict(lambda: defaultdict(list))
     line_replacement_context = defaultdict(lambda: defaultdict(list))
 
@@ -1273,6 +1294,7 @@ def context_from_source_events(events, disabled_sources=(), line_replacements=()
     return {
         'source_declarations': source_declarations,
         'line_replacements': line_replacement_context,
+        'scripts': {str(script.path): script for script in scripts},
     }
 
 
@@ -1296,24 +1318,47 @@ def context_paths_from_source_events(entry_point: str, events):
     return ordered_paths
 
 
-def compile_sources(entry_point: str, output_file: str, mode: str = "context", source_supplement=None):
+def compile_sources(
+    entry_point: str,
+    output_file: str,
+    mode: str = "context",
+    source_supplement=None,
+    cache_dir=None,
+    cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    budget: EvaluationBudget | None = None,
+    max_brace_expansions: int | None = MAX_BRACE_EXPANSIONS,
+):
     if mode not in {"context", "executable"}:
         raise ValueError(f"Unsupported compile mode: {mode}")
 
-    if not validate_path(entry_point):
-        raise FileNotFoundError(f"Error: Could not resolve the path to the entry point - {entry_point}")
-
-    if not os.path.isfile(entry_point):
-        raise OSError(f"Error: entry point must be a file - {entry_point}")
-
-    entry_point = os.path.abspath(entry_point)
-    supplement = load_source_supplement(source_supplement, os.path.dirname(entry_point))
-    evaluation = SourceEvaluator(mode=mode, source_supplement=supplement).evaluate(entry_point)
-    context = context_from_source_events(evaluation.events, evaluation.disabled_sources, evaluation.line_replacements)
-    if mode == "executable":
-        output = render_executable_script(entry_point, context)
-    else:
-        sources = context_paths_from_source_events(entry_point, evaluation.events)
-        output = render_context_files(sources, entry_point, context)
-    content = '\n'.join(output)
-    write_output(output_file, content)
+    with cached_filesystem():
+        if not validate_path(entry_point):
+            raise FileNotFoundError(f"Error: Could not resolve the path to the entry point - {entry_point}")
+
+        if not filesystem().is_file(entry_point):
+            raise OSError(f"Error: entry point must be a file - {entry_point}")
+
+        entry_point = os.path.abspath(entry_point)
+        supplement = load_source_supplement(source_supplement, os.path.dirname(entry_point))
+        ir_cache = ScriptIRCache(cache_dir, max_bytes=cache_max_bytes) if cache_dir is not None else None
+        evaluation = SourceEvaluator(
+            mode=mode,
+            source_supplement=supplement,
+            ir_cache=ir_cache,
+            budget=budget,
+            max_brace_expansions=max_brace_expansions,
+        ).evaluate(entry_point)
+        context = context_from_source_events(
+            evaluation.events,
+            evaluation.disabled_sources,
+            evaluation.line_replacements,
+            evaluation.scripts,
+        )
+        if mode == "executable":
+            output = render_executable_script(entry_point, context)
+        else:
+            sources = context_paths_from_source_events(entry_point, evaluation.events)
+            output = render_context_files(sources, entry_point, context)
+        content = '\n'.join(output)
+        write_output(output_file, content)
+        return evaluation
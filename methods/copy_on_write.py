@@ -0,0 +1,181 @@
+from collections.abc import MutableMapping
+
+# Logged by writes that may have changed any key
+ALL_KEYS = object()
+# Writes a log keeps beyond the size of its mapping before dropping them; past
+# that, comparing the whole mapping costs no more than reading the log
+WRITE_LOG_SLACK = 64
+
+
+class WriteLog:
+    """Keys written to one mapping, linked to the log of the mapping it was copied from at `offset`.
+
+    Positions count every write logged so far. The first `dropped` of them are
+    no longer kept, so which keys they wrote is unknown.
+    """
+
+    __slots__ = ('keys', 'dropped', 'parent', 'offset')
+
+    def __init__(self, parent=None, offset=0):
+        self.keys = []
+        self.dropped = 0
+        self.parent = parent
+        self.offset = offset
+
+    def __len__(self):
+        return self.dropped + len(self.keys)
+
+
+class CopyOnWriteDict(MutableMapping):
+    """A dict whose copies share storage until one of them is written.
+
+    `copy()` is O(1): the copies read the same dict, and a copy that writes
+    while others still share it first takes a private shallow copy. Values are
+    shared, so they must be replaced rather than mutated in place.
+
+    Every mapping logs the keys written to it, so the keys in which a copy may
+    differ from the mapping it was forked from are known without comparing them.
+    A log longer than its mapping drops what it holds, bounding its memory by the
+    mapping's size; forks spanning dropped writes are compared in full.
+    """
+
+    __slots__ = ('_data', '_owners', '_log')
+
+    def __init__(self, data=()):
+        # Number of live mappings reading `_data`, shared between them
+        self._owners = [1]
+        self._data = dict(data)
+        self._log = WriteLog()
+
+    def copy(self):
+        clone = CopyOnWriteDict.__new__(CopyOnWriteDict)
+        clone._data = self._data
+        clone._owners = self._owners
+        clone._log = WriteLog(self._log, len(self._log))
+        self._owners[0] += 1
+        return clone
+
+    def keys_written_since(self, ancestor):
+        """Keys in which this mapping may differ from `ancestor`, which it was copied from.
+
+        Covers writes to this mapping, to the copies between them, and to
+        `ancestor` after the copy. None when this mapping was not copied from
+        `ancestor`, a write may have changed every key, or the writes were dropped.
+        """
+        keys = set()
+        log = self._log
+        end = len(log)
+        ancestor_log = ancestor._log
+        while log is not ancestor_log:
+            if log is None or log.dropped:
+                return None
+            keys.update(log.keys[:end])
+            end = log.offset
+            log = log.parent
+        if end < ancestor_log.dropped:
+            return None
+        keys.update(ancestor_log.keys[end - ancestor_log.dropped:])
+        if ALL_KEYS in keys:
+            return None
+        return keys
+
+    def assign(self, other):
+        """Make this mapping equal to `other`, sharing its storage, and log the keys that changed."""
+        keys = other.keys_written_since(self)
+        self._owners[0] -= 1
+        self._owners = other._owners
+        self._owners[0] += 1
+        self._data = other._data
+        self._log_writes([ALL_KEYS] if keys is None else keys)
+
+    def to_dict(self):
+        return dict(self._data)
+
+    def _release(self):
+        self._owners[0] -= 1
+        self._owners = [1]
+
+    def _log_write(self, key):
+        log = self._log
+        log.keys.append(key)
+        if len(log.keys) > len(self._data) + WRITE_LOG_SLACK:
+            log.dropped += len(log.keys)
+            log.keys = []
+
+    def _log_writes(self, keys):
+        for key in keys:
+            self._log_write(key)
+
+    def _writable(self):
+        if self._owners[0] > 1:
+            self._release()
+            self._data = dict(self._data)
+        return self._data
+
+    def __del__(self):
+        self._owners[0] -= 1
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._writable()[key] = value
+        self._log_write(key)
+
+    def __delitem__(self, key):
+        del self._writable()[key]
+        self._log_write(key)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, CopyOnWriteDict):
+            other = other._data
+        return self._data == other
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._data!r})"
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def keys(self):
+        return self._data.keys()
+
+    def values(self):
+        return self._data.values()
+
+    def items(self):
+        return self._data.items()
+
+    def pop(self, key, *default):
+        if key not in self._data:
+            return self._data.pop(key, *default)
+        value = self._writable().pop(key)
+        self._log_write(key)
+        return value
+
+    def setdefault(self, key, default=None):
+        if key in self._data:
+            return self._data[key]
+        value = self._writable().setdefault(key, default)
+        self._log_write(key)
+        return value
+
+    def update(self, *args, **kwargs):
+        values = dict(*args, **kwargs)
+        self._writable().update(values)
+        self._log_writes(values)
+
+    def clear(self):
+        if self._owners[0] > 1:
+            self._release()
+        self._data = {}
+        self._log_write(ALL_KEYS)
@@ -1,5 +1,7 @@
 import re
 
+from methods.regex.scanner import CommandScanner
+
 
 # A regex pattern with a 'command' placeholder to be formatted dynamically at runtime.
 # Matches a $() command substitution block, including nested parentheses
@@ -49,12 +51,61 @@ COMMAND_TEMPLATE_PATTERN = (r'''
 ''')
 
 
+# Necessary condition for a `COMMAND_TEMPLATE_PATTERN` match: the command follows a
+# line start, separator or `$(`, and is followed by whitespace, a separator or the end.
+COMMAND_PREFILTER_TEMPLATE_PATTERN = r'(?:^|[\n;&|(])\s*(?:{command})(?:[\s&|;)]|$)'
+
+
 PATH_COMMAND_TEMPLATE_PATTERN = (
     r'\$\(\s*\b{command}\b\s+(".*?"|\'.*?\'|[^)]+)\s*\)'
 )
 
 
-def create_command_pattern(command, template=None, regex=False):
+class PrefilteredPattern:
+    """
+    A compiled pattern guarded by a cheap necessary-condition check.
+
+    Text that contains none of `literals`, or does not match `prefilter`, cannot
+    match `pattern`, so the expensive regex only runs on candidate text. When a
+    `scanner` is given it finds the matches in place of `pattern`. Other
+    attributes are forwarded to the wrapped pattern.
+    """
+
+    def __init__(self, pattern, prefilter, literals=(), scanner=None):
+        self.pattern = pattern
+        self.prefilter = prefilter
+        self.literals = tuple(literals)
+        self.matcher = scanner or pattern
+
+    def may_match(self, text) -> bool:
+        if self.literals and not any(literal in text for literal in self.literals):
+            return False
+        return self.prefilter.search(text) is not None
+
+    def search(self, text):
+        return self.matcher.search(text) if self.may_match(text) else None
+
+    def finditer(self, text):
+        return self.matcher.finditer(text) if self.may_match(text) else iter(())
+
+    def findall(self, text):
+        return self.matcher.findall(text) if self.may_match(text) else []
+
+    def __getattr__(self, name):
+        return getattr(self.pattern, name)
+
+
+def create_command_pattern(command, template=None, regex=False, literals=None):
+    """
+    Compile `template` for `command`.
+
+    Patterns built from the default `COMMAND_TEMPLATE_PATTERN` are wrapped in a
+    `PrefilteredPattern` that finds matches with a linear-time `CommandScanner`;
+    the compiled regex stays available as its `pattern`. Regex commands can pass
+    `literals` (substrings one of which every match contains) to skip the
+    prefilter regex on most text.
+    """
+    prefiltered = template is None
     if template is None:
         template = COMMAND_TEMPLATE_PATTERN
 
@@ -71,12 +122,19 @@ def create_command_pattern(command, template=None, regex=False):
         template.format(command=escaped_command), re.VERBOSE
     )
 
-    return pattern
+    if not prefiltered:
+        return pattern
+
+    if literals is None:
+        literals = () if regex else (command,)
+    prefilter = re.compile(COMMAND_PREFILTER_TEMPLATE_PATTERN.format(command=escaped_command))
+    scanner = CommandScanner(re.compile(escaped_command if regex else rf'\b(?:{escaped_command})\b'))
+    return PrefilteredPattern(pattern, prefilter, literals, scanner)
 
 
 # Regular expression to match source statements and global variable definitions
 # Example: source /path/to/file or . /path/to/file
-SOURCE_PATTERN = create_command_pattern(command=r'\bsource\b|\.', regex=True)
+SOURCE_PATTERN = create_command_pattern(command=r'\bsource\b|\.', regex=True, literals=('source', '.'))
 
 # Regex to match dirname command usage, handling nested and mismatched quotes
 # Example: $(dirname "/path/to/dir")
@@ -0,0 +1,330 @@
+import re
+
+
+# Characters the generic argument alternative `[^"'`\s\n&|;()]+` cannot consume
+ARGUMENT_BREAK_CHARACTERS = frozenset('"\'`&|;()')
+QUOTE_CHARACTERS = frozenset('"\'`')
+REDIRECTION_DIGITS = ('1', '2')
+TERMINATOR_PREFIXES = ('&&', '||', ';', ')')
+
+# Positions where a `COMMAND_TEMPLATE_PATTERN` match can start, besides the start of the text
+MATCH_START_PATTERN = re.compile(r'(?=\n|&&|\|\||;|\$\()')
+WHITESPACE_PATTERN = re.compile(r'\s*')
+PARENTHESIS_PATTERN = re.compile(r'[()]')
+
+# `$(...)` arguments nest at most three parentheses deep, including their own
+MAX_SUBSTITUTION_DEPTH = 3
+
+
+class CommandMatch:
+    """
+    A `COMMAND_TEMPLATE_PATTERN` match found by `CommandScanner`.
+
+    Exposes the subset of the `re.Match` interface used for command matches:
+    group 1 is the separator, group 2 the command and group 3 its arguments.
+    """
+
+    __slots__ = ('string', '_spans')
+
+    def __init__(self, string, spans):
+        self.string = string
+        self._spans = spans
+
+    def span(self, group=0):
+        span = self._spans[group]
+        return span if span is not None else (-1, -1)
+
+    def start(self, group=0):
+        return self.span(group)[0]
+
+    def end(self, group=0):
+        return self.span(group)[1]
+
+    def _group(self, group):
+        span = self._spans[group]
+        return self.string[span[0]:span[1]] if span is not None else None
+
+    def group(self, *groups):
+        if not groups:
+            return self._group(0)
+        if len(groups) == 1:
+            return self._group(groups[0])
+        return tuple(self._group(group) for group in groups)
+
+    def groups(self, default=None):
+        return tuple(
+            self._group(group) if self._spans[group] is not None else default
+            for group in range(1, len(self._spans))
+        )
+
+    def __getitem__(self, group):
+        return self._group(group)
+
+    def __repr__(self):
+        return f"<CommandMatch span={self.span()!r} match={self.group()!r}>"
+
+
+class ArgumentTable:
+    """
+    Where the argument loop of `COMMAND_TEMPLATE_PATTERN` stops, for every start position.
+
+    The regex tries argument tokens in alternation order, longest first, and backtracks
+    until the text after the loop satisfies the end conditions. That search only depends
+    on the position the loop is at, so it is computed once per position from the end of
+    the text backwards: `exit_position(i)` is where the backtracking search started at `i`
+    first succeeds, or -1. Every position costs constant work, so scanning is linear.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        size = len(text)
+        self.low = size
+        # First successful loop exit, for the loop started at each position
+        self.exits = [-1] * (size + 2)
+        self.exits[size] = size
+        # Match end when the loop exits at each position, after trailing whitespace
+        self.ends = [-1] * (size + 2)
+        self.ends[size] = size
+        # First loop exit among the shorter tails of a generic or whitespace run
+        self.run_exits = [-1] * (size + 2)
+        # Inner positions of quoted strings, one table per quote character in the text
+        self.quote_exits = {
+            quote: [-1] * (size + 2) for quote in QUOTE_CHARACTERS if quote in text
+        }
+        self.substitution_ends = None
+        self.next_close = -1
+        self.run_end = size
+        self.run_newline = -1
+        self.run_terminated = True
+
+    def exit_position(self, position):
+        self.ensure(position)
+        return self.exits[position]
+
+    def end_position(self, position):
+        self.ensure(position)
+        return self.ends[position]
+
+    def run_exit_position(self, position):
+        self.ensure(position)
+        return self.run_exits[position]
+
+    def substitution_end(self, position):
+        if self.substitution_ends is None:
+            self.substitution_ends = self._match_substitutions()
+        return self.substitution_ends.get(position + 1, -1)
+
+    def _match_substitutions(self):
+        """Map each `(` that closes within `MAX_SUBSTITUTION_DEPTH` to the position after its `)`."""
+        ends = {}
+        stack = []
+        for match in PARENTHESIS_PATTERN.finditer(self.text):
+            if match.group() == '(':
+                stack.append([match.start(), 1])
+            elif stack:
+                open_position, depth = stack.pop()
+                if depth <= MAX_SUBSTITUTION_DEPTH:
+                    ends[open_position] = match.end()
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], depth + 1)
+        return ends
+
+    def _is_terminator(self, position):
+        text = self.text
+        if position == len(text) or text.startswith(TERMINATOR_PREFIXES, position):
+            return True
+        return text[position] == '#' and position > 0 and text[position - 1].isspace()
+
+    def ensure(self, low):
+        if low >= self.low:
+            return
+
+        text = self.text
+        size = len(text)
+        exits = self.exits
+        ends = self.ends
+        run_exits = self.run_exits
+        quote_tables = tuple(self.quote_exits.items())
+
+        for i in range(self.low - 1, low - 1, -1):
+            char = text[i]
+            following = text[i + 1] if i + 1 < size else ''
+            is_space = char.isspace()
+            is_generic = not is_space and char not in ARGUMENT_BREAK_CHARACTERS
+
+            # Trailing `\s*` and end conditions when the loop stops here: a separator,
+            # `)`, comment or end of text after the whitespace, or else the last newline in it.
+            if is_space:
+                if not following.isspace():
+                    self.run_end = i + 1
+                    self.run_newline = -1
+                    self.run_terminated = self._is_terminator(i + 1)
+                if char == '\n' and self.run_newline < 0:
+                    self.run_newline = i
+            else:
+                self.run_end = i
+                self.run_newline = -1
+                self.run_terminated = self._is_terminator(i)
+            ends[i] = self.run_end if self.run_terminated else self.run_newline
+
+            # `"(?:\\.|[^"])*"` and friends: try an escape, then any other character, then close
+            for quote, quote_exits in quote_tables:
+                exit_position = -1
+                if char == '\\' and following and following != '\n':
+                    exit_position = quote_exits[i + 2]
+                if exit_position < 0:
+                    exit_position = exits[i + 1] if char == quote else quote_exits[i + 1]
+                quote_exits[i] = exit_position
+
+            exit_position = -1
+            if char in QUOTE_CHARACTERS and (i == 0 or text[i - 1] != '\\'):
+                exit_position = self.quote_exits[char][i + 1]
+            if exit_position < 0 and following == '(':
+                if char == '$':
+                    substitution_end = self.substitution_end(i)
+                    if substitution_end >= 0:
+                        exit_position = exits[substitution_end]
+                elif char == '<' and self.next_close > i + 2:
+                    exit_position = exits[self.next_close + 1]
+
+            if is_generic or is_space:
+                # `+` gives back one character at a time, so the tails of a run share their result
+                run_exit = -1
+                if following and (following.isspace() if is_space else (
+                    not following.isspace() and following not in ARGUMENT_BREAK_CHARACTERS
+                )):
+                    run_exit = run_exits[i + 1]
+                if run_exit < 0:
+                    run_exit = exits[i + 1]
+                run_exits[i] = run_exit
+                if exit_position < 0:
+                    exit_position = run_exit
+
+            if exit_position < 0 and (char == '>' or char in REDIRECTION_DIGITS):
+                exit_position = self._redirection_exit(i)
+            if exit_position < 0 and ends[i] >= 0:
+                exit_position = i
+            exits[i] = exit_position
+
+            if char == ')':
+                self.next_close = i
+
+        self.low = low
+
+    def _redirection_exit(self, i):
+        """`>[>&]?` followed by `[12]?>&[12]?`, each trying its longest form first."""
+        text = self.text
+        exits = self.exits
+        candidates = []
+        if text[i] == '>':
+            if text.startswith(('>>', '>&'), i):
+                candidates.append(i + 2)
+            candidates.append(i + 1)
+            if text.startswith('>&', i):
+                if text.startswith(REDIRECTION_DIGITS, i + 2):
+                    candidates.append(i + 3)
+                candidates.append(i + 2)
+        elif text.startswith('>&', i + 1):
+            if text.startswith(REDIRECTION_DIGITS, i + 3):
+                candidates.append(i + 4)
+            candidates.append(i + 3)
+
+        for candidate in candidates:
+            if exits[candidate] >= 0:
+                return exits[candidate]
+        return -1
+
+
+class CommandScanner:
+    """
+    Linear-time matcher equivalent to `COMMAND_TEMPLATE_PATTERN` for one command.
+
+    The regex's argument loop nests `+` runs inside `*` and backtracks exponentially
+    when a line cannot end where it expects, e.g. `source abc...(`. The scanner finds
+    the same matches, with the same groups, by resolving the loop's backtracking once
+    per position in an `ArgumentTable`. The command regex is matched at the first
+    non-whitespace position after a separator, so it must not start with whitespace.
+    """
+
+    def __init__(self, command_pattern):
+        self.command_pattern = command_pattern
+
+    @staticmethod
+    def _after_comment_hash(text, position):
+        # (?<!(?<!['"`])\#[^\n'"`])
+        return (
+            position >= 2
+            and text[position - 2] == '#'
+            and text[position - 1] not in '\n\'"`'
+            and not (position >= 3 and text[position - 3] in QUOTE_CHARACTERS)
+        )
+
+    def _match_starts(self, text, position):
+        if position == 0:
+            yield 0
+        for match in MATCH_START_PATTERN.finditer(text, position):
+            if match.start() > 0:
+                yield match.start()
+
+    def _match_command(self, text, table, start, separator_span, command_start):
+        command_match = self.command_pattern.match(text, command_start)
+        if command_match is None:
+            return None
+
+        command_end = command_match.end()
+        if command_end < len(text) and text[command_end].isspace():
+            argument_end = table.run_exit_position(command_end)
+            if argument_end >= 0:
+                return CommandMatch(text, (
+                    (start, table.end_position(argument_end)),
+                    separator_span,
+                    (command_start, command_end),
+                    (command_end, argument_end),
+                ))
+
+        end = table.end_position(command_end)
+        if end < 0:
+            return None
+        return CommandMatch(text, ((start, end), separator_span, (command_start, command_end), None))
+
+    def _match_at(self, text, table, start):
+        if self._after_comment_hash(text, start):
+            return None
+
+        separator_ends = []
+        if start == 0:
+            separator_ends.append(0)
+        if text.startswith(('\n', ';'), start):
+            separator_ends.append(start + 1)
+        elif text.startswith(('&&', '||'), start):
+            separator_ends.append(start + 2)
+
+        for separator_end in separator_ends:
+            command_start = WHITESPACE_PATTERN.match(text, separator_end).end()
+            match = self._match_command(text, table, start, (start, command_start), command_start)
+            if match is not None:
+                return match
+
+        if text.startswith('$(', start) and not (start > 0 and text[start - 1] in '\'`'):
+            command_start = WHITESPACE_PATTERN.match(text, start + 2).end()
+            return self._match_command(text, table, start, None, command_start)
+        return None
+
+    def finditer(self, text):
+        table = ArgumentTable(text)
+        position = 0
+        while position <= len(text):
+            for start in self._match_starts(text, position):
+                match = self._match_at(text, table, start)
+                if match is not None:
+                    yield match
+                    position = match.end()
+                    break
+            else:
+                return
+
+    def search(self, text):
+        return next(self.finditer(text), None)
+
+    def findall(self, text):
+        return [match.groups(default='') for match in self.finditer(text)]
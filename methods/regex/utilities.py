@@ -1,3 +1,4 @@
+import functools
 import re
 from methods.regex.patterns import (
     QUOTE_STRIP_PATTERN,
@@ -65,6 +66,71 @@ def replace_bash_command(command: str, replacement: str, input_string: str, patt
     return ''.join(updated_string_parts)
 
 
+class CommentStripper:
+    """
+    Compiled comment remover for one set of comment markers and exclusions.
+
+    Build instances through `comment_stripper()` so each configuration is
+    compiled once and reused.
+    """
+
+    def __init__(self, comment_patterns, exclusion_patterns=None, escape_exclusions=True):
+        # Handling exclusions and comments in a single regex expression
+        exclusion_regex = ''
+        if exclusion_patterns:
+            exclusion_regex = '(?:' + '|'.join(
+                f"{re.escape(pattern) if escape_exclusions else pattern}" for pattern in exclusion_patterns) + ')'
+
+        # Combine exclusions and comment markers into a single regex. In shell text,
+        # an unquoted # starts a comment only at a word boundary, not inside paths.
+        comment_regex = '|'.join(
+            rf'(?<!\S){re.escape(pattern)}' if pattern == '#' else re.escape(pattern)
+            for pattern in comment_patterns
+        )
+
+        self.pattern = re.compile(rf"""
+            {exclusion_regex}                         # Match exclusions
+            |(\\?['"]+)(?:(?=(\\?))\2.)*?\1           # Match quoted strings
+            |(?P<comments>{comment_regex}).*          # Match comments
+        """, re.VERBOSE)
+
+    @staticmethod
+    def _remove_or_keep(match):
+        # Replace matches: keep exclusions and quotes, remove comments
+        if match.group('comments'):
+            return ''
+        return match.group(0)
+
+    def strip(self, text) -> str:
+        """Return `text` with comments removed."""
+        return self.pattern.sub(self._remove_or_keep, text)
+
+    def strip_lines(self, lines) -> list:
+        """
+        Strip several newline-free lines in one regex pass.
+
+        Matches never cross a newline and an unquoted `#` after a newline sits on
+        a word boundary, so the result equals stripping each line separately.
+        """
+        if not lines:
+            return []
+        return self.strip('\n'.join(lines)).split('\n')
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_comment_stripper(comment_patterns, exclusion_patterns, escape_exclusions):
+    return CommentStripper(comment_patterns, exclusion_patterns, escape_exclusions)
+
+
+def comment_stripper(comment_patterns, exclusion_patterns=None, escape_exclusions=True) -> CommentStripper:
+    """Return the shared `CommentStripper` for this comment and exclusion configuration."""
+    return _cached_comment_stripper(
+        tuple(comment_patterns),
+        tuple(exclusion_patterns) if exclusion_patterns else None,
+        escape_exclusions,
+    )
+
+
 def remove_comments(text, comment_patterns, exclusion_patterns=None, escape_exclusions=True) -> str:
     """
     Removes comments from text, taking into account quoted strings and optional exclusions.
@@ -78,39 +144,7 @@ def remove_comments(text, comment_patterns, exclusion_patterns=None, escape_excl
     Returns:
     - str: Text with comments removed as specified.
     """
-    # Handling exclusions and comments in a single regex expression
-    exclusion_regex = ''
-    if exclusion_patterns:
-        exclusion_regex = '(?:' + '|'.join(
-            f"{re.escape(pattern) if escape_exclusions else pattern}" for pattern in exclusion_patterns) + ')'
-
-    # Combine exclusions and comment markers into a single regex. In shell text,
-    # an unquoted # starts a comment only at a word boundary, not inside paths.
-    comment_regex = '|'.join(
-        rf'(?<!\S){re.escape(pattern)}' if pattern == '#' else re.escape(pattern)
-        for pattern in comment_patterns
-    )
-
-    # pattern = re.compile(rf"""
-    #     {exclusion_regex}                         # Match exclusions
-    #     |\\"|"(?:\\"|[^"$])*"|'(?:\\'|[^'])*'     # Match quoted strings, including escaped quotes
-    #     |(?P<comments>{comment_regex}).*          # Match comments
-    # """, re.VERBOSE)
-
-    pattern = re.compile(rf"""
-        {exclusion_regex}                         # Match exclusions
-        |(\\?['"]+)(?:(?=(\\?))\2.)*?\1           # Match quoted strings
-        |(?P<comments>{comment_regex}).*          # Match comments
-    """, re.VERBOSE)
-
-    # Replace matches: keep exclusions and quotes, remove comments
-    def remove_or_keep(match):
-        if match.group('comments'):  # If match is a comment, remove
-            return ''
-        return match.group(0)  # If match is an exclusion or a quote, keep
-
-    # Apply the regex
-    return re.sub(pattern, remove_or_keep, text)
+    return comment_stripper(comment_patterns, exclusion_patterns, escape_exclusions).strip(text)
 
 
 def strip_matching_quotes(s: str) -> str:
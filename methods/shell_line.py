@@ -1,114 +1,130 @@
-def get_commands(line: str):
-    """Split one physical shell line into top-level command fragments.
+import re
+from functools import lru_cache
 
-    This is a quote-aware splitter for compiler frontends and resolvers, not a
-    full Bash parser.
+
+# Characters that can change the splitter state, for each quoting context
+TOP_LEVEL_SPECIAL_PATTERN = re.compile(r'[\\`\'"\[()#;&|]')
+DOUBLE_BRACKET_SPECIAL_PATTERN = re.compile(r'[\\`\'"]|\]\]')
+DOUBLE_QUOTE_SPECIAL_PATTERN = re.compile(r'[\\`"]')
+BACKTICK_SPECIAL_PATTERN = re.compile(r'[\\`]')
+
+
+@lru_cache(maxsize=4096)
+def get_command_spans(line: str):
+    """Split one physical shell line into top-level commands with their spans.
+
+    Returns `(command, start, end)` tuples, where `command` is the stripped
+    fragment `line[start:end]`. This is a quote-aware splitter for compiler
+    frontends and resolvers, not a full Bash parser. Runs of characters that
+    cannot change the quoting state are skipped with one regex search.
     """
     commands = []
-    current = []
     in_single_quote = False
     in_double_quote = False
     in_backtick = False
     in_double_bracket_test = False
-    escaped = False
     paren_depth = 0
+    command_start = 0
     index = 0
+    line_end = len(line)
 
-    def append_current_command():
-        command = ''.join(current).strip()
+    def append_command(end):
+        fragment = line[command_start:end]
+        command = fragment.strip()
         if command:
-            commands.append(command)
-        current.clear()
+            start = command_start + len(fragment) - len(fragment.lstrip())
+            commands.append((command, start, start + len(command)))
 
-    while index < len(line):
-        char = line[index]
-        if escaped:
-            current.append(char)
-            escaped = False
+    while index < line_end:
+        if in_single_quote:
+            index = line.find("'", index)
+            if index < 0:
+                break
+            in_single_quote = False
             index += 1
             continue
 
-        if char == '\\' and not in_single_quote:
-            current.append(char)
-            escaped = True
-            index += 1
-            continue
+        if in_backtick:
+            pattern = BACKTICK_SPECIAL_PATTERN
+        elif in_double_quote:
+            pattern = DOUBLE_QUOTE_SPECIAL_PATTERN
+        elif in_double_bracket_test:
+            pattern = DOUBLE_BRACKET_SPECIAL_PATTERN
+        else:
+            pattern = TOP_LEVEL_SPECIAL_PATTERN
+        match = pattern.search(line, index)
+        if match is None:
+            break
+        index = match.start()
+        char = line[index]
 
-        if char == '`' and not in_single_quote:
-            in_backtick = not in_backtick
-            current.append(char)
-            index += 1
+        if char == '\\':
+            index += 2
             continue
 
-        if in_backtick:
-            current.append(char)
+        if char == '`':
+            in_backtick = not in_backtick
             index += 1
             continue
 
-        if char == "'" and not in_double_quote:
-            in_single_quote = not in_single_quote
-            current.append(char)
+        if char == "'":
+            in_single_quote = True
             index += 1
             continue
 
-        if char == '"' and not in_single_quote:
+        if char == '"':
             in_double_quote = not in_double_quote
-            current.append(char)
             index += 1
             continue
 
-        if (
-            not in_single_quote
-            and not in_double_quote
-            and not in_double_bracket_test
-            and line.startswith('[[', index)
-        ):
-            in_double_bracket_test = True
-            current.append('[[')
+        if in_double_bracket_test:
+            # `]]`
+            in_double_bracket_test = False
             index += 2
             continue
 
-        if in_double_bracket_test:
-            if not in_single_quote and not in_double_quote and line.startswith(']]', index):
-                in_double_bracket_test = False
-                current.append(']]')
+        if char == '[':
+            if line.startswith('[[', index):
+                in_double_bracket_test = True
                 index += 2
-                continue
-            current.append(char)
-            index += 1
+            else:
+                index += 1
             continue
 
-        if not in_single_quote and not in_double_quote:
-            if char == '(':
-                paren_depth += 1
-            elif char == ')' and paren_depth:
+        if char == '(':
+            paren_depth += 1
+        elif char == ')':
+            if paren_depth:
                 paren_depth -= 1
-
-        if char == '#' and not in_single_quote and not in_double_quote and paren_depth == 0:
-            if not current or current[-1].isspace():
+        elif paren_depth:
+            pass
+        elif char == '#':
+            if index == command_start or line[index - 1].isspace():
+                line_end = index
                 break
-
-        if char == ';' and not in_single_quote and not in_double_quote and paren_depth == 0:
-            append_current_command()
-            index += 1
-            continue
-
-        if (
-            not in_single_quote
-            and not in_double_quote
-            and paren_depth == 0
-            and (line.startswith('&&', index) or line.startswith('||', index))
-        ):
-            append_current_command()
+        elif char == ';':
+            append_command(index)
+            command_start = index + 1
+        elif line.startswith(('&&', '||'), index):
+            append_command(index)
+            command_start = index + 2
             index += 2
             continue
 
-        current.append(char)
         index += 1
 
-    append_current_command()
+    append_command(line_end)
+
+    return tuple(commands)
 
-    return commands
+
+def get_commands(line: str):
+    """Split one physical shell line into top-level command fragments.
+
+    This is a quote-aware splitter for compiler frontends and resolvers, not a
+    full Bash parser.
+    """
+    return [command for command, _, _ in get_command_spans(line)]
 
 
 def first_top_level_pipeline_index(line: str):
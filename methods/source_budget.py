@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+
+DEFAULT_MAX_STEPS = 2_000_000
+DEFAULT_MAX_FORKS = 200_000
+DEFAULT_MAX_LIVE_STATES = 10_000
+
+
+@dataclass(frozen=True)
+class EvaluationBudget:
+    """Bounds on the work one evaluation may do before it widens instead of exploring.
+
+    `max_steps` counts evaluated IR nodes, `max_forks` the states forked to
+    explore branches, case arms, loop bodies and function variants, and
+    `max_live_states` the forked states alive at once. None disables a bound.
+    """
+
+    max_steps: int | None = DEFAULT_MAX_STEPS
+    max_forks: int | None = DEFAULT_MAX_FORKS
+    max_live_states: int | None = DEFAULT_MAX_LIVE_STATES
+
+
+class BudgetMeter:
+    """Work done against an `EvaluationBudget` during one evaluation pass."""
+
+    def __init__(self, budget: EvaluationBudget):
+        self.budget = budget
+        self.steps = 0
+        self.forks = 0
+        self.live_states = 0
+        # The first bound that was reached, once one has been
+        self.exhausted: str | None = None
+        self.widened = []
+        self._fork_counts = Counter()
+        self._fork_nodes = {}
+
+    def step(self):
+        self.steps += 1
+        if self.budget.max_steps is not None and self.steps > self.budget.max_steps:
+            self._exhaust("steps")
+
+    def fork(self, state, node):
+        """Count `state`, just forked to explore one alternative of `node`, until it is released."""
+        self.forks += 1
+        self.live_states += 1
+        weakref.finalize(state, self._release)
+        self._fork_counts[node.location] += 1
+        self._fork_nodes.setdefault(node.location, node)
+        if self.budget.max_forks is not None and self.forks > self.budget.max_forks:
+            self._exhaust("forks")
+        if self.budget.max_live_states is not None and self.live_states > self.budget.max_live_states:
+            self._exhaust("live states")
+
+    def hot_construct(self):
+        """The construct that forked the most states, if any did."""
+        if not self._fork_counts:
+            return None
+        location, _ = self._fork_counts.most_common(1)[0]
+        return self._fork_nodes[location]
+
+    def details(self):
+        hot_construct = self.hot_construct()
+        return {
+            "exhausted": self.exhausted,
+            "steps": self.steps,
+            "forks": self.forks,
+            "live_states": self.live_states,
+            "hot_construct": _location_text(hot_construct.location) if hot_construct is not None else None,
+            "hot_construct_forks": self._fork_counts[hot_construct.location] if hot_construct is not None else 0,
+            "widened": [_location_text(node.location) for node in self.widened],
+        }
+
+    def _exhaust(self, bound: str):
+        if self.exhausted is None:
+            self.exhausted = bound
+
+    def _release(self):
+        self.live_states -= 1
+
+
+def _location_text(location):
+    return f"{location.path}:{location.line}"
@@ -94,27 +94,55 @@ class EvaluationResult:
     line_replacements: tuple[LineReplacement, ...] = ()
     diagnostics: tuple[Diagnostic, ...] = ()
     final_state: StateSnapshot | None = None
+    scripts: tuple[ScriptIR, ...] = ()
+    parse_cache_hits: int = 0
+    parse_cache_misses: int = 0
+    summary_cache_hits: int = 0
+    summary_cache_misses: int = 0
+    disk_cache_hits: int = 0
+    disk_cache_misses: int = 0
+    resolution_cache_hits: int = 0
+    resolution_cache_misses: int = 0
+    filesystem_syscalls: int = 0
+    filesystem_cache_hits: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class IRNode:
+    """Base of the parsed script IR.
 
+    IR is immutable once parsed, so nodes are shared by reference between
+    evaluation states and may memoize values derived from their fields.
+    """
 
-@dataclass(frozen=True)
-class IRNode:
     location: SourceLocation
     text: str
+    _signature: tuple | None = field(default=None, init=False, repr=False, compare=False)
+    _may_source: bool | None = field(default=None, init=False, repr=False, compare=False)
+    _may_affect_state: bool | None = field(default=None, init=False, repr=False, compare=False)
 
+    def memoized(self, name, build):
+        """Return `build(self)`, computed on the first call and kept in slot `name`."""
+        value = getattr(self, name)
+        if value is None:
+            value = build(self)
+            object.__setattr__(self, name, value)
+        return value
 
-@dataclass(frozen=True)
+
+@dataclass(frozen=True, slots=True)
 class RawCommand(IRNode):
     separator: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Assignment(IRNode):
     name: str
     value: str
     prefix: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ArrayAssignment(IRNode):
     name: str
     values: tuple[str, ...]
@@ -125,23 +153,23 @@ class ArrayAssignment(IRNode):
     raw_values: tuple[str, ...] = ()
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CdCommand(IRNode):
     path_expression: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SetCommand(IRNode):
     arguments: tuple[str, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class FunctionDef(IRNode):
     name: str
     body: tuple[IRNode, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ForLoop(IRNode):
     variable: str
     words: tuple[str, ...]
@@ -152,7 +180,7 @@ class ForLoop(IRNode):
     trailing: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CStyleForLoop(IRNode):
     init: str
     condition: str
@@ -160,7 +188,7 @@ class CStyleForLoop(IRNode):
     body: tuple[IRNode, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WhileLoop(IRNode):
     keyword: str
     condition: str
@@ -170,7 +198,7 @@ class WhileLoop(IRNode):
     producer: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IfBranch:
     condition: str | None
     body: tuple[IRNode, ...]
@@ -179,26 +207,26 @@ class IfBranch:
     condition_text: str = ""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class IfBlock(IRNode):
     branches: tuple[IfBranch, ...]
     end_location: SourceLocation | None = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CaseArm:
     patterns: tuple[str, ...]
     body: tuple[IRNode, ...]
     terminator: str = ";;"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class CaseBlock(IRNode):
     subject: str
     arms: tuple[CaseArm, ...]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SourceSite(IRNode):
     command_name: str
     source_expression: str
@@ -207,7 +235,7 @@ class SourceSite(IRNode):
     is_condition_source: bool = False
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ScriptIR:
     path: Path
     nodes: tuple[IRNode, ...]
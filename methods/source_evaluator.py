@@ -6,9 +6,11 @@ import os
 import re
 from collections import Counter
 from dataclasses import dataclass, field, replace
-from fnmatch import fnmatch
+from functools import lru_cache
 from pathlib import Path
 
+from methods.copy_on_write import CopyOnWriteDict
+from methods.source_budget import BudgetMeter, EvaluationBudget
 from methods.shell_line import get_commands
 from methods.source_diagnostics import unsupported_source_error, with_source_diagnostic
 from methods.source_effects import (
@@ -17,6 +19,8 @@ from methods.source_effects import (
     CaseBlock,
     CdCommand,
     CStyleForLoop,
+    Diagnostic,
+    DiagnosticSeverity,
     DisabledSourceSite,
     EvaluationResult,
     ExecutionModel,
@@ -26,6 +30,7 @@ from methods.source_effects import (
     LineReplacement,
     OccurrenceModel,
     RawCommand,
+    ScriptIR,
     SetCommand,
     SourceEvent,
     SourceSite,
@@ -33,7 +38,9 @@ from methods.source_effects import (
     StateSnapshot,
     WhileLoop,
 )
+from methods.source_filesystem import cached_filesystem, filesystem
 from methods.source_frontend import LineParserFrontend, ParserFrontend
+from methods.source_ir_cache import ScriptIRCache
 from methods.source_patterns import (
     UnsupportedPatternError,
     extglob_operator_at,
@@ -41,13 +48,31 @@ from methods.source_patterns import (
     shell_pattern_matches,
     split_extglob_alternatives,
 )
+from methods.source_relevance import (
+    CONTROL_TRANSFER_COMMANDS,
+    STATE_FREE_COMMANDS,
+    STATUS_REFERENCE_PATTERN,
+    RelevanceSlice,
+    control_transfer_command,
+    function_definitions,
+    mentioned_names,
+    node_may_affect_state,
+    node_may_source,
+    node_overwrites_status,
+    nodes_may_source,
+    raw_command_contains_literal_source,
+    raw_command_may_source,
+)
 from methods.source_resolver import (
     FailglobExpansionError,
+    FindQuery,
+    MAX_BRACE_EXPANSIONS,
     MISSING_SOURCE,
     MISSING_SOURCE_NO_FILENAME,
     SOURCE_EXPANSION_FAILURE,
     SOURCE_EXPANSION_FAILURE_RETURN,
     ResolvedSource,
+    SourceResolutionCache,
     UnsupportedSourceError,
     contains_source_command,
     contains_nested_source_command,
@@ -66,6 +91,7 @@ from methods.source_resolver import (
     source_command_index,
     strip_shell_word_quotes,
 )
+from methods.source_summaries import LoopFixpoint, NameCache, SummaryCache, SummaryRecorder
 from methods.source_supplements import SourceSupplement, empty_source_supplement, supplement_skeleton
 from methods.sources import (
     SOURCE_RESOLVER,
@@ -81,11 +107,18 @@ from methods.regex.utilities import strip_matching_quotes
 ARRAY_INDEX_PATTERN = re.compile(r'\$\{([a-zA-Z_]\w*)\[(\d+)\]\}')
 ARRAY_ANY_INDEX_PATTERN = re.compile(r'\$\{([a-zA-Z_]\w*)\[([^\]]+)\]\}')
 ARRAY_EXPANSION_PATTERN = re.compile(r'^\$\{([a-zA-Z_]\w*)\[@\]\}$')
+INTEGER_PATTERN = re.compile(r'[+-]?\d+')
 SCALAR_REFERENCE_PATTERN = re.compile(r'\$(?:\{([a-zA-Z_]\w*|[0-9]+)\}|([a-zA-Z_]\w*|[0-9]+))')
 SCALAR_WORD_PATTERN = re.compile(r'^\$(?:\{([a-zA-Z_]\w*|[0-9]+)\}|([a-zA-Z_]\w*|[0-9]+))$')
 ASSIGNMENT_WORD_PATTERN = re.compile(r'^[a-zA-Z_]\w*(?:\+)?=.*$')
 DEFAULT_IFS = " \t\n"
 MAX_MODELED_LOOP_ITERATIONS = 256
+# Compiled pattern sets kept per case block before older ones are dropped
+MAX_CASE_DISPATCHES_PER_BLOCK = 64
+# Compound commands `_evaluate_nodes` may skip when they cannot source or change state
+SOURCE_FREE_SKIPPABLE_NODES = (IfBlock, CaseBlock, WhileLoop)
+# Compound commands widened instead of evaluated once the evaluation budget is exhausted
+BUDGET_WIDENED_NODES = (IfBlock, CaseBlock, ForLoop, CStyleForLoop, WhileLoop)
 SHELL_OPTION_FLAGS = {
     'e': 'errexit',
     'E': 'errtrace',
@@ -220,16 +253,25 @@ RETAINED_HELPER_POSITIONAL_SOURCE_EXPRESSIONS = QUOTED_ALL_POSITIONALS_SOURCE_EX
     '"${1}"',
 })
 
+COPY_ON_WRITE_STATE_FIELDS = (
+    'variables',
+    'runtime_variables',
+    'arrays',
+    'associative_arrays',
+    'functions',
+    'function_variants',
+)
+
 
 @dataclass
 class EvaluationState:
     cwd: Path
-    variables: dict[str, str] = field(default_factory=dict)
-    runtime_variables: dict[str, str] = field(default_factory=dict)
-    arrays: dict[str, tuple[str, ...]] = field(default_factory=dict)
-    associative_arrays: dict[str, dict[str, str]] = field(default_factory=dict)
-    functions: dict[str, FunctionDef] = field(default_factory=dict)
-    function_variants: dict[str, tuple[FunctionDef, ...]] = field(default_factory=dict)
+    variables: CopyOnWriteDict[str, str] = field(default_factory=CopyOnWriteDict)
+    runtime_variables: CopyOnWriteDict[str, str] = field(default_factory=CopyOnWriteDict)
+    arrays: CopyOnWriteDict[str, tuple[str, ...]] = field(default_factory=CopyOnWriteDict)
+    associative_arrays: CopyOnWriteDict[str, dict[str, str]] = field(default_factory=CopyOnWriteDict)
+    functions: CopyOnWriteDict[str, FunctionDef] = field(default_factory=CopyOnWriteDict)
+    function_variants: CopyOnWriteDict[str, tuple[FunctionDef, ...]] = field(default_factory=CopyOnWriteDict)
     shell_options: set[str] = field(default_factory=set)
     glob_options: set[str] = field(default_factory=set)
     missing_source_words: set[str] = field(default_factory=set)
@@ -252,6 +294,16 @@ class EvaluationState:
     loop_depth: int = 0
     source_depth: int = 0
     function_body_depth: int = 0
+    # Brace expansions of one word tried before the word is rejected; None disables the bound
+    max_brace_expansions: int | None = MAX_BRACE_EXPANSIONS
+
+    def __post_init__(self):
+        # Mapping fields are forked by reference; values (strings, tuples, IR
+        # nodes and associative-array dicts) are replaced, never mutated.
+        for name in COPY_ON_WRITE_STATE_FIELDS:
+            mapping = getattr(self, name)
+            if not isinstance(mapping, CopyOnWriteDict):
+                setattr(self, name, CopyOnWriteDict(mapping))
 
     def resolver_context(self):
         return {
@@ -261,6 +313,7 @@ class EvaluationState:
             'shell_options': self.shell_options,
             'glob_options': self.glob_options,
             'missing_source_words': self.missing_source_words,
+            'max_brace_expansions': self.max_brace_expansions,
         }
 
     def runtime_context(self):
@@ -270,14 +323,15 @@ class EvaluationState:
             'shell_options': self.shell_options,
             'glob_options': self.glob_options,
             'missing_source_words': self.missing_source_words,
+            'max_brace_expansions': self.max_brace_expansions,
         }
 
     def snapshot(self):
         return StateSnapshot(
             cwd=self.cwd,
-            variables=dict(self.variables),
-            arrays=dict(self.arrays),
-            associative_arrays=copy.deepcopy(self.associative_arrays),
+            variables=self.variables.to_dict(),
+            arrays=self.arrays.to_dict(),
+            associative_arrays=copy.deepcopy(self.associative_arrays.to_dict()),
             shell_options=frozenset(self.shell_options),
             glob_options=frozenset(self.glob_options),
             bash_source_stack=self.bash_source_stack,
@@ -287,12 +341,12 @@ class EvaluationState:
     def child_shell_copy(self):
         return EvaluationState(
             cwd=self.cwd,
-            variables=copy.deepcopy(self.variables),
-            runtime_variables=copy.deepcopy(self.runtime_variables),
-            arrays=copy.deepcopy(self.arrays),
-            associative_arrays=copy.deepcopy(self.associative_arrays),
-            functions=copy.deepcopy(self.functions),
-            function_variants=copy.deepcopy(self.function_variants),
+            variables=self.variables.copy(),
+            runtime_variables=self.runtime_variables.copy(),
+            arrays=self.arrays.copy(),
+            associative_arrays=self.associative_arrays.copy(),
+            functions=self.functions.copy(),
+            function_variants=self.function_variants.copy(),
             shell_options=set(self.shell_options),
             glob_options=set(self.glob_options),
             missing_source_words=set(self.missing_source_words),
@@ -310,11 +364,12 @@ class EvaluationState:
             ambiguous_positionals=self.ambiguous_positionals,
             positional_assignment_generation=self.positional_assignment_generation,
             source_argument_frame_dirty_stack=self.source_argument_frame_dirty_stack,
-            local_scopes=copy.deepcopy(self.local_scopes),
+            local_scopes=[dict(scope) for scope in self.local_scopes],
             last_status=self.last_status,
             loop_depth=self.loop_depth,
             source_depth=self.source_depth,
             function_body_depth=self.function_body_depth,
+            max_brace_expansions=self.max_brace_expansions,
         )
 
     def conditional_copy(self):
@@ -324,12 +379,8 @@ class EvaluationState:
 
     def copy_from(self, other: EvaluationState):
         self.cwd = other.cwd
-        self.variables = copy.deepcopy(other.variables)
-        self.runtime_variables = copy.deepcopy(other.runtime_variables)
-        self.arrays = copy.deepcopy(other.arrays)
-        self.associative_arrays = copy.deepcopy(other.associative_arrays)
-        self.functions = copy.deepcopy(other.functions)
-        self.function_variants = copy.deepcopy(other.function_variants)
+        for name in COPY_ON_WRITE_STATE_FIELDS:
+            getattr(self, name).assign(getattr(other, name))
         self.shell_options = set(other.shell_options)
         self.glob_options = set(other.glob_options)
         self.missing_source_words = set(other.missing_source_words)
@@ -347,7 +398,7 @@ class EvaluationState:
         self.ambiguous_positionals = other.ambiguous_positionals
         self.positional_assignment_generation = other.positional_assignment_generation
         self.source_argument_frame_dirty_stack = other.source_argument_frame_dirty_stack
-        self.local_scopes = copy.deepcopy(other.local_scopes)
+        self.local_scopes = [dict(scope) for scope in other.local_scopes]
         self.last_status = other.last_status
         self.loop_depth = other.loop_depth
         self.source_depth = other.source_depth
@@ -390,6 +441,10 @@ class FunctionSourceExpansionAbortSignal(Exception):
     pass
 
 
+class RelevanceWidenedSignal(Exception):
+    pass
+
+
 @dataclass
 class ReadLoopWords:
     variable: str
@@ -458,6 +513,28 @@ class ConditionWords:
     kind: str
 
 
+@dataclass(frozen=True)
+class CaseDispatch:
+    """The arm patterns of one `case` block, compiled for one set of options and pattern variable values.
+
+    `combined` alternates every arm's patterns in arm order, one named group per
+    arm, so a single match finds the first arm a subject selects.
+    """
+
+    combined: re.Pattern
+    arms: tuple[re.Pattern, ...]
+
+    def first_match(self, subject: str, start: int = 0):
+        """Index of the first arm from `start` on whose patterns match `subject`, or None."""
+        if start == 0:
+            match = self.combined.fullmatch(subject)
+            return None if match is None else int(match.lastgroup[len("arm"):])
+        for index in range(start, len(self.arms)):
+            if self.arms[index].fullmatch(subject):
+                return index
+        return None
+
+
 class SourceEvaluator:
     """Evaluate source effects for the supported IR subset without executing Bash."""
 
@@ -466,9 +543,38 @@ class SourceEvaluator:
         frontend: ParserFrontend | None = None,
         mode: str = "executable",
         source_supplement: SourceSupplement | None = None,
+        ir_cache: ScriptIRCache | None = None,
+        skip_source_free: bool = True,
+        relevance_slicing: bool = False,
+        summarize_sources: bool = True,
+        summarize_functions: bool = True,
+        budget: EvaluationBudget | None = None,
+        max_brace_expansions: int | None = MAX_BRACE_EXPANSIONS,
     ):
         self.frontend = frontend or LineParserFrontend()
+        self.ir_cache = ir_cache
         self.mode = mode
+        # Fast-forward over compound commands that neither source nor change state
+        self.skip_source_free = skip_source_free
+        # Skip assignments to variables that cannot reach a source, cd path or condition
+        self.relevance_slicing = relevance_slicing
+        self.relevance: RelevanceSlice | None = None
+        # Replay sourced files whose earlier evaluation read the same state
+        self.summarize_sources = summarize_sources
+        # Replay function calls whose arguments and read state match an earlier call
+        self.summarize_functions = summarize_functions
+        self.summaries: SummaryCache | None = None
+        # Source expression resolutions, reset with the filesystem view of each evaluation
+        self.resolutions = SourceResolutionCache(SOURCE_RESOLVER)
+        self._summary_recorders: list[SummaryRecorder] = []
+        self._loop_name_cache = NameCache()
+        # Compiled case arm patterns by block, then by the options and values they were compiled for
+        self._case_dispatches: dict[int, tuple[CaseBlock, dict]] = {}
+        # Bounds total work; once exhausted, compound commands are widened instead of explored
+        self.budget = budget or EvaluationBudget()
+        self.budget_meter = BudgetMeter(self.budget)
+        self.max_brace_expansions = max_brace_expansions
+        self.diagnostics: list[Diagnostic] = []
         self.source_supplement = source_supplement or empty_source_supplement()
         self.events: list[SourceEvent] = []
         self.disabled_sources: list[DisabledSourceSite] = []
@@ -476,35 +582,112 @@ class SourceEvaluator:
         self.retained_helper_source_sites: list[RetainedHelperSourceSite] = []
         self._retained_helper_stack: list[str] = []
         self._source_line_cache: dict[Path, tuple[str, ...]] = {}
+        self._source_text_cache: dict[Path, str] = {}
+        self._script_ir_cache: dict[tuple[Path, str], ScriptIR] = {}
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
 
     def evaluate(self, entrypoint: str | Path):
-        entrypoint = Path(entrypoint).resolve()
+        with cached_filesystem() as view:
+            syscalls = view.syscalls.total()
+            hits = view.hits
+            result = self._evaluate_entrypoint(entrypoint)
+            return replace(
+                result,
+                filesystem_syscalls=view.syscalls.total() - syscalls,
+                filesystem_cache_hits=view.hits - hits,
+            )
+
+    def _evaluate_entrypoint(self, entrypoint: str | Path):
+        entrypoint = filesystem().resolve(entrypoint)
         initial_variables = {
             **self.source_supplement.variables,
             '0': str(entrypoint),
             'BASH_SOURCE': str(entrypoint),
         }
-        state = EvaluationState(
-            cwd=entrypoint.parent,
-            variables=copy.deepcopy(initial_variables),
-            runtime_variables=copy.deepcopy(initial_variables),
-            shell_options=set(DEFAULT_ENABLED_SHOPT_OPTIONS),
-            bash_source_stack=(entrypoint,),
-        )
-        self.events = []
-        self.disabled_sources = []
-        self.line_replacements = []
-        self.retained_helper_source_sites = []
-        self._retained_helper_stack = []
-        self._evaluate_file(entrypoint, state, ())
-        self._ensure_retained_helpers_resolved()
+        self._source_line_cache = {}
+        self._source_text_cache = {}
+        self._script_ir_cache = {}
+        self.parse_cache_hits = 0
+        self.parse_cache_misses = 0
+        self.resolutions = SourceResolutionCache(SOURCE_RESOLVER)
+        self.relevance = RelevanceSlice() if self.relevance_slicing else None
+        disk_cache_hits = self.ir_cache.hits if self.ir_cache is not None else 0
+        disk_cache_misses = self.ir_cache.misses if self.ir_cache is not None else 0
+        while True:
+            state = EvaluationState(
+                cwd=entrypoint.parent,
+                variables=copy.deepcopy(initial_variables),
+                runtime_variables=copy.deepcopy(initial_variables),
+                shell_options=set(DEFAULT_ENABLED_SHOPT_OPTIONS),
+                bash_source_stack=(entrypoint,),
+                max_brace_expansions=self.max_brace_expansions,
+            )
+            self.events = []
+            self.disabled_sources = []
+            self.line_replacements = []
+            self.retained_helper_source_sites = []
+            self._retained_helper_stack = []
+            self.summaries = (
+                SummaryCache(COPY_ON_WRITE_STATE_FIELDS)
+                if self.summarize_sources or self.summarize_functions
+                else None
+            )
+            self._summary_recorders = []
+            self.budget_meter = BudgetMeter(self.budget)
+            self.diagnostics = []
+            try:
+                self._evaluate_file(entrypoint, state, ())
+                self._ensure_retained_helpers_resolved()
+            except RelevanceWidenedSignal:
+                # A script read a variable whose assignments were skipped; start over knowing it
+                self.relevance.dropped.clear()
+                continue
+            break
+        self._record_budget_diagnostic()
         return EvaluationResult(
             events=self._with_occurrence_models(self.events),
             disabled_sources=tuple(self.disabled_sources),
             line_replacements=tuple(self.line_replacements),
+            diagnostics=tuple(self.diagnostics),
             final_state=state.snapshot(),
+            scripts=tuple(self._script_ir_cache.values()),
+            parse_cache_hits=self.parse_cache_hits,
+            parse_cache_misses=self.parse_cache_misses,
+            summary_cache_hits=self.summaries.hits if self.summaries is not None else 0,
+            summary_cache_misses=self.summaries.misses if self.summaries is not None else 0,
+            disk_cache_hits=self.ir_cache.hits - disk_cache_hits if self.ir_cache is not None else 0,
+            disk_cache_misses=self.ir_cache.misses - disk_cache_misses if self.ir_cache is not None else 0,
+            resolution_cache_hits=self.resolutions.hits,
+            resolution_cache_misses=self.resolutions.misses,
         )
 
+    def _source_text(self, path: Path):
+        content = self._source_text_cache.get(path)
+        if content is None:
+            content = path.read_text()
+            self._source_text_cache[path] = content
+        return content
+
+    def _parse_file(self, path: Path):
+        content = self._source_text(path)
+        key = (path, content)
+        ir = self._script_ir_cache.get(key)
+        if ir is not None:
+            self.parse_cache_hits += 1
+            return ir
+        self.parse_cache_misses += 1
+        if self.ir_cache is not None:
+            ir = self.ir_cache.parse(self.frontend, path, content)
+        else:
+            ir = self.frontend.parse(path, content)
+        self._script_ir_cache[key] = ir
+        if self.relevance is not None:
+            self.relevance.add_script(ir)
+            if self.relevance.widened():
+                raise RelevanceWidenedSignal()
+        return ir
+
     def _evaluate_file(
         self,
         path: Path,
@@ -513,14 +696,15 @@ class SourceEvaluator:
         *,
         as_source: bool = False,
     ):
-        path = path.resolve()
+        path = filesystem().resolve(path)
         if path in stack:
             chain = " -> ".join(str(item) for item in (*stack, path))
             raise RecursionError(f"Circular source dependency while evaluating: {chain}")
         current_stack = (*stack, path)
 
-        content = path.read_text()
-        ir = self.frontend.parse(path, content)
+        ir = self._parse_file(path)
+        for recorder in self._summary_recorders:
+            recorder.node_lists.append(ir.nodes)
         previous_bash_source = state.variables.get('BASH_SOURCE')
         previous_runtime_bash_source = state.runtime_variables.get('BASH_SOURCE')
         previous_stack = state.bash_source_stack
@@ -556,6 +740,21 @@ class SourceEvaluator:
             try:
                 if (node.location.path, node.location.line) in aborted_lines:
                     continue
+                self.budget_meter.step()
+                if self.skip_source_free and self._is_skippable_source_free_node(nodes, index, state):
+                    state.last_status = None
+                    continue
+                if self.budget_meter.exhausted is not None and isinstance(node, BUDGET_WIDENED_NODES):
+                    self._widen_over_budget(node, [(node,)], state)
+                    continue
+                if (
+                    self.relevance is not None
+                    and isinstance(node, (Assignment, ArrayAssignment))
+                    and self.relevance.may_drop(node)
+                ):
+                    self.relevance.dropped.add(node.name)
+                    state.last_status = 0
+                    continue
                 if isinstance(node, Assignment):
                     self._apply_assignment(node, state)
                 elif isinstance(node, ArrayAssignment):
@@ -589,6 +788,144 @@ class SourceEvaluator:
             except LineAbortSignal as signal:
                 aborted_lines.add((signal.path, signal.line))
 
+    def _fork_state(self, state: EvaluationState, node, *, conditional: bool = False):
+        """Copy `state` to explore one alternative of `node`, counting it against the budget."""
+        forked = state.conditional_copy() if conditional else state.child_shell_copy()
+        self.budget_meter.fork(forked, node)
+        return forked
+
+    def _widen_over_budget(self, node, node_lists, state: EvaluationState):
+        """Stand in for evaluating `node_lists` once the budget is exhausted.
+
+        Everything the code may assign, directly or through the functions it
+        names, becomes ambiguous, and functions it defines become variants, so
+        later sources fail closed only if they depend on that state. Code that
+        may source, may return, break, continue or exit past the code after it,
+        or whose names are only known at runtime, fails closed here.
+        """
+        recorder = SummaryRecorder(state, COPY_ON_WRITE_STATE_FIELDS)
+        recorder.node_lists.extend(node_lists)
+        names = recorder.names(NameCache(mentioned_names))
+        function_bodies = []
+        if names is not None:
+            for name in names:
+                function_bodies.extend(
+                    function_def.body
+                    for function_def in state.function_variants.get(name, (state.functions.get(name),))
+                    if function_def is not None
+                )
+        bodies = [*node_lists, *function_bodies]
+        control_command = None
+        if names is not None:
+            # A function's own `return` only leaves that function
+            control_command = control_transfer_command(
+                node for body in node_lists for node in body
+            ) or control_transfer_command(
+                (node for body in function_bodies for node in body),
+                CONTROL_TRANSFER_COMMANDS - {"return"},
+            )
+        if names is None or control_command is not None or any(self._node_list_may_source(body) for body in bodies):
+            details = self.budget_meter.details()
+            reason = "source-relevant code" if control_command is None else f"code that may {control_command}"
+            raise unsupported_source_error(
+                str(node.location.path),
+                node.location.line - 1,
+                node.text,
+                node.text,
+                "unsupported.source.budget",
+                f"evaluation budget exhausted ({self.budget_meter.exhausted}) before {reason}",
+                f"Raise the {self.budget_meter.exhausted} budget; most forks came from {details['hot_construct']}.",
+                details,
+            )
+
+        self.budget_meter.widened.append(node)
+        state.last_status = None
+        for name in names:
+            for mapping in (state.variables, state.runtime_variables, state.arrays, state.associative_arrays):
+                mapping.pop(name, None)
+            state.ambiguous_variables.add(name)
+            state.ambiguous_arrays.add(name)
+        if not {"cd", "pushd", "popd"}.isdisjoint(names):
+            state.ambiguous_cwd = True
+        if not {"set", "shopt"}.isdisjoint(names):
+            state.ambiguous_shell_options = True
+            state.ambiguous_glob_options = True
+        if not {"set", "shift"}.isdisjoint(names):
+            state.ambiguous_positionals = True
+
+        definitions = {}
+        for body in bodies:
+            for function_def in function_definitions(body):
+                definitions.setdefault(function_def.name, []).append(function_def)
+        for name, defined in definitions.items():
+            current = state.function_variants.get(name, (state.functions.get(name),))
+            if current[0] is None or name in state.ambiguous_functions:
+                self._mark_function_ambiguous(state, name)
+                continue
+            variants = {}
+            for function_def in (*current, *defined):
+                variants.setdefault(self._function_signature(function_def), function_def)
+            if len(variants) > 1:
+                state.function_variants[name] = tuple(variants.values())
+
+    def _record_budget_diagnostic(self):
+        meter = self.budget_meter
+        if not meter.widened:
+            return
+        construct = meter.hot_construct() or meter.widened[0]
+        self.diagnostics.append(Diagnostic(
+            code="evaluation.budget-exhausted",
+            severity=DiagnosticSeverity.WARNING,
+            location=construct.location,
+            fragment=construct.text.strip(),
+            message=(
+                f"evaluation budget exhausted ({meter.exhausted}); "
+                f"widened {len(meter.widened)} construct(s) instead of evaluating them"
+            ),
+            hint="Raise the evaluation budget for exact results past this point.",
+            details=meter.details(),
+        ))
+
+    def _is_skippable_source_free_node(self, nodes, index: int, state: EvaluationState):
+        """Whether `nodes[index]` is a compound command that cannot source or change state and whose status is unread.
+
+        Its branches, arms or iterations only run state-free commands, so the only
+        effect skipping it has is on the exit status, which becomes unknown. That
+        is only safe when the first later node that is not itself skippable
+        overwrites the status, so the last command of a body, or one before `&&`,
+        `||` or `$?`, is still evaluated. A function shadowing one of the
+        state-free commands makes the subtree relevant again.
+        """
+        if not self._is_source_free_compound_node(nodes[index]):
+            return False
+        if any(name in state.functions for name in STATE_FREE_COMMANDS):
+            return False
+        for position in range(index + 1, len(nodes)):
+            if self._node_overwrites_status(nodes[position]):
+                return True
+            if not self._is_source_free_compound_node(nodes[position]):
+                return False
+        return False
+
+    def _node_overwrites_status(self, node):
+        if node_overwrites_status(node):
+            return True
+        # Executable mode sets the status of every unguarded source or fails; context mode may leave it
+        return (
+            self.mode == "executable"
+            and isinstance(node, SourceSite)
+            and node.separator not in {"&&", "||"}
+            and not STATUS_REFERENCE_PATTERN.search(node.text)
+        )
+
+    @staticmethod
+    def _is_source_free_compound_node(node):
+        return (
+            isinstance(node, SOURCE_FREE_SKIPPABLE_NODES)
+            and not node_may_source(node)
+            and not node_may_affect_state(node)
+        )
+
     def _apply_assignment(self, node: Assignment, state: EvaluationState):
         if node.prefix == "local" and state.local_scopes:
             SourceEvaluator._capture_local_variable(node.name, state)
@@ -721,11 +1058,10 @@ class SourceEvaluator:
             return
 
         if node.associative_values:
-            if node.operation == "assign":
-                state.associative_arrays[node.name] = {}
-            target = state.associative_arrays.setdefault(node.name, {})
+            target = {} if node.operation == "assign" else dict(state.associative_arrays.get(node.name, {}))
             for key, value in node.associative_values:
                 target[self._resolve_array_word(key, node, state)] = self._resolve_array_word(value, node, state)
+            state.associative_arrays[node.name] = target
             state.arrays.pop(node.name, None)
             state.ambiguous_arrays.discard(node.name)
             state.last_status = 0
@@ -1061,7 +1397,7 @@ class SourceEvaluator:
 
             signatures = self.source_supplement.function_signatures(site.function_name)
             function_key = (
-                site.function_def.location.path.resolve(),
+                filesystem().resolve(site.function_def.location.path),
                 site.function_def.location.line,
                 site.function_name,
             )
@@ -1087,7 +1423,7 @@ class SourceEvaluator:
     def _retained_resolved_site_keys(self):
         return {
             (
-                event.location.path.resolve(),
+                filesystem().resolve(event.location.path),
                 event.location.line,
                 event.location.column,
                 event.source_site,
@@ -1098,7 +1434,7 @@ class SourceEvaluator:
     @staticmethod
     def _retained_site_key(site: RetainedHelperSourceSite):
         return (
-            site.location.path.resolve(),
+            filesystem().resolve(site.location.path),
             site.location.line,
             site.location.column,
             site.source_site,
@@ -1349,7 +1685,7 @@ class SourceEvaluator:
             if self.mode == "context":
                 return
             if not self._node_list_may_source(node.body):
-                self._apply_source_free_unknown_loop_body(node.body, state, stack)
+                self._apply_source_free_unknown_loop_body(node, state, stack)
                 return
             raise
 
@@ -1364,10 +1700,17 @@ class SourceEvaluator:
             self._disable_unreachable_sources(node.body, f"for {node.variable} in {node.words_text}")
             return
 
+        fixpoint = self._loop_fixpoint(state, [node.body], excluded=frozenset({node.variable}))
         for word in words:
+            at_fixpoint = fixpoint.reached(state, self._loop_name_cache, self._output_marks())
+            if at_fixpoint:
+                # The remaining iterations would leave everything but the loop variable as it is
+                word = words[-1]
             state.variables[node.variable] = word
             state.runtime_variables[node.variable] = word
             state.ambiguous_variables.discard(node.variable)
+            if at_fixpoint:
+                break
             state.loop_depth += 1
             try:
                 self._evaluate_nodes(node.body, state, stack)
@@ -1383,7 +1726,7 @@ class SourceEvaluator:
             self._apply_c_style_arithmetic_list(node.init, node, state)
         except UnsupportedSourceError as exc:
             if self.mode == "context":
-                self._evaluate_context_loop_body(node.body, state, stack)
+                self._evaluate_context_loop_body(node, state, stack)
                 return
             raise with_source_diagnostic(
                 exc,
@@ -1394,7 +1737,11 @@ class SourceEvaluator:
                 "unsupported.source.arithmetic",
             ) from exc
 
+        fixpoint = self._loop_fixpoint(state, [(node,)])
         for iteration in range(MAX_MODELED_LOOP_ITERATIONS):
+            if fixpoint.reached(state, self._loop_name_cache, self._output_marks()):
+                # Every later iteration evaluates like the last one, so the loop never ends
+                break
             try:
                 condition_status = (
                     "true"
@@ -1403,7 +1750,7 @@ class SourceEvaluator:
                 )
             except UnsupportedSourceError as exc:
                 if self.mode == "context":
-                    self._evaluate_context_loop_body(node.body, state, stack)
+                    self._evaluate_context_loop_body(node, state, stack)
                     return
                 raise with_source_diagnostic(
                     exc,
@@ -1416,7 +1763,7 @@ class SourceEvaluator:
 
             if condition_status == "unknown":
                 if not self._node_list_may_source(node.body):
-                    self._apply_source_free_unknown_loop_body(node.body, state, stack)
+                    self._apply_source_free_unknown_loop_body(node, state, stack)
                     return
                 raise unsupported_source_error(
                     str(node.location.path),
@@ -1505,17 +1852,30 @@ class SourceEvaluator:
             expressions.append(expression)
         return expressions
 
-    def _evaluate_context_loop_body(self, body, state: EvaluationState, stack: tuple[Path, ...]):
-        if self._node_list_may_source(body):
-            loop_state = state.conditional_copy()
-            self._evaluate_nodes(body, loop_state, stack)
+    def _loop_fixpoint(self, state: EvaluationState, node_lists, *, excluded=frozenset()):
+        """Track the heads of a loop's iterations over `node_lists` to stop once they repeat."""
+        return LoopFixpoint(state, COPY_ON_WRITE_STATE_FIELDS, node_lists, excluded)
+
+    def _output_marks(self):
+        """How much output the evaluation has recorded, to tell whether a stretch of it recorded any."""
+        return (
+            len(self.events),
+            len(self.disabled_sources),
+            len(self.line_replacements),
+            len(self.retained_helper_source_sites),
+        )
+
+    def _evaluate_context_loop_body(self, node, state: EvaluationState, stack: tuple[Path, ...]):
+        if self._node_list_may_source(node.body):
+            loop_state = self._fork_state(state, node, conditional=True)
+            self._evaluate_nodes(node.body, loop_state, stack)
 
-    def _apply_source_free_unknown_loop_body(self, body, state: EvaluationState, stack: tuple[Path, ...]):
+    def _apply_source_free_unknown_loop_body(self, node, state: EvaluationState, stack: tuple[Path, ...]):
         base_state = state.child_shell_copy()
-        loop_state = state.child_shell_copy()
+        loop_state = self._fork_state(state, node)
         loop_state.loop_depth += 1
         try:
-            self._evaluate_nodes(body, loop_state, stack)
+            self._evaluate_nodes(node.body, loop_state, stack)
         except (LoopBreakSignal, LoopContinueSignal):
             pass
         finally:
@@ -1531,10 +1891,17 @@ class SourceEvaluator:
                 self._disable_unreachable_sources(node.body, f"{node.keyword} {node.condition}")
                 return
             loop_state = state.child_shell_copy() if read_words.child_shell else state
+            fixpoint = self._loop_fixpoint(loop_state, [node.body], excluded=frozenset({read_words.variable}))
             for value in read_words.values:
+                at_fixpoint = fixpoint.reached(loop_state, self._loop_name_cache, self._output_marks())
+                if at_fixpoint:
+                    # The remaining iterations would leave everything but the read variable as it is
+                    value = read_words.values[-1]
                 loop_state.variables[read_words.variable] = value
                 loop_state.runtime_variables[read_words.variable] = value
                 loop_state.ambiguous_variables.discard(read_words.variable)
+                if at_fixpoint:
+                    break
                 loop_state.loop_depth += 1
                 try:
                     self._evaluate_nodes(node.body, loop_state, stack)
@@ -1546,17 +1913,21 @@ class SourceEvaluator:
                     loop_state.loop_depth -= 1
             return
 
+        fixpoint = self._loop_fixpoint(state, [(node,)])
         for iteration in range(MAX_MODELED_LOOP_ITERATIONS):
+            if fixpoint.reached(state, self._loop_name_cache, self._output_marks()):
+                # Every later iteration evaluates like the last one, so the loop never ends
+                break
             try:
                 condition_status = self._evaluate_condition(node.condition, state)
             except UnsupportedSourceError as exc:
                 if self.mode == "context":
                     if self._node_list_may_source(node.body):
-                        loop_state = state.conditional_copy()
+                        loop_state = self._fork_state(state, node, conditional=True)
                         self._evaluate_nodes(node.body, loop_state, stack)
                     return
                 if not self._node_list_may_source(node.body):
-                    self._apply_source_free_unknown_loop_body(node.body, state, stack)
+                    self._apply_source_free_unknown_loop_body(node, state, stack)
                     return
                 raise with_source_diagnostic(
                     exc,
@@ -1570,7 +1941,7 @@ class SourceEvaluator:
             should_run = condition_status == "true" if node.keyword == "while" else condition_status == "false"
             if condition_status == "unknown":
                 if not self._node_list_may_source(node.body):
-                    self._apply_source_free_unknown_loop_body(node.body, state, stack)
+                    self._apply_source_free_unknown_loop_body(node, state, stack)
                     return
                 raise unsupported_source_error(
                     str(node.location.path),
@@ -1667,7 +2038,7 @@ class SourceEvaluator:
             raise self._unsupported_loop_condition(node, "unsupported read loop redirection")
 
         input_path = self._word_list_path(strip_shell_word_quotes(trailing_words[1]), node, state)
-        if not input_path.is_file():
+        if not filesystem().is_file(input_path):
             raise self._unsupported_loop_condition(node, "unsupported read loop input path")
         return False, self._read_loop_lines(input_path, include_incomplete)
 
@@ -1908,7 +2279,7 @@ class SourceEvaluator:
             if path_word.startswith("-"):
                 raise self._unsupported_loop_words(node, "unsupported cat command substitution option")
             path = self._word_list_path(path_word, node, state)
-            if not path.is_file():
+            if not filesystem().is_file(path):
                 raise self._unsupported_loop_words(node, "unsupported cat command substitution path")
             output.append(self._read_text_preserving_newlines(path))
         return ''.join(output)
@@ -1938,42 +2309,34 @@ class SourceEvaluator:
 
     def _find_word_list_matches(self, root_words: list[str], roots: list[str], filters: dict, node,
                                 state: EvaluationState):
+        query = FindQuery(filters)
         matches = []
         for root_word, root in zip(root_words, roots):
             display_root = self._resolve_exact_runtime_word(root_word, node, state, "loop word list")
-            for directory, dirnames, filenames in os.walk(root):
-                relative_directory = os.path.relpath(directory, root)
-                directory_depth = 0 if relative_directory == os.curdir else len(relative_directory.split(os.sep))
-                maxdepth = filters['maxdepth']
-                if maxdepth is not None and directory_depth >= maxdepth:
-                    dirnames[:] = []
-
-                for filename in filenames:
-                    candidate = os.path.join(directory, filename)
-                    candidate_depth = directory_depth + 1
-                    if candidate_depth < filters['mindepth']:
-                        continue
-                    if maxdepth is not None and candidate_depth > maxdepth:
-                        continue
-                    if not os.path.isfile(candidate):
-                        continue
-                    display_path = self._find_display_path(display_root, root, candidate)
-                    if filters['name'] and not any(fnmatch(filename, pattern) for pattern in filters['name']):
-                        continue
-                    if filters['path'] and not any(fnmatch(display_path, pattern) for pattern in filters['path']):
-                        continue
+            display_prefixes = {}
 
-                    matches.append(display_path)
-                    if filters.get('quit'):
-                        return matches
+            def enter_directory(directory):
+                display_prefix = self._find_display_prefix(display_root, root, directory)
+                display_prefixes[directory] = display_prefix
+                return query.may_match_under((display_prefix,))
+
+            for directory, filename in query.files(root, enter_directory):
+                display_path = display_prefixes[directory] + filename
+                if query.path_patterns and not query.path_matches((display_path,)):
+                    continue
+
+                matches.append(display_path)
+                if query.quit:
+                    return matches
         return matches
 
     @staticmethod
-    def _find_display_path(display_root: str, resolved_root: str, candidate: str):
-        relative = os.path.relpath(candidate, resolved_root)
+    def _find_display_prefix(display_root: str, resolved_root: str, directory: str):
+        """What precedes the name of a file in `directory` when `find` prints it from `display_root`."""
+        relative = os.path.relpath(directory, resolved_root)
         if relative == os.curdir:
-            return display_root
-        return os.path.join(display_root, relative)
+            return os.path.join(display_root, '')
+        return os.path.join(display_root, relative, '')
 
     def _evaluate_printf_word_list(self, words: list[str], node, state: EvaluationState):
         if len(words) < 2:
@@ -2080,7 +2443,7 @@ class SourceEvaluator:
         if len(words) < 2:
             raise self._unsupported_loop_words(node, "unsupported realpath command substitution without operands")
         paths = self._word_list_path_pairs(words[1:], node, state)
-        return self._lines_output([str(path.resolve()) for _, path in paths])
+        return self._lines_output([str(filesystem().resolve(path)) for _, path in paths])
 
     def _evaluate_path_transform_word_list(self, command_name: str, words: list[str], node, state: EvaluationState):
         if len(words) < 2:
@@ -2121,7 +2484,7 @@ class SourceEvaluator:
                     raise self._unsupported_loop_words(node, str(exc)) from exc
                 continue
             path = self._word_list_path(stripped, node, state)
-            if not path.is_file():
+            if not filesystem().is_file(path):
                 raise self._unsupported_loop_words(node, "unsupported command substitution path")
             pairs.append((self._resolve_exact_runtime_word(stripped, node, state, "loop word list"), path))
         return pairs
@@ -2153,7 +2516,7 @@ class SourceEvaluator:
         path = Path(resolved)
         if not path.is_absolute():
             path = state.cwd / path
-        return path.resolve()
+        return filesystem().resolve(path)
 
     @staticmethod
     def _resolve_exact_runtime_word(word: str, node, state: EvaluationState, label: str):
@@ -2317,7 +2680,7 @@ class SourceEvaluator:
                     branch,
                 ))
             except UnsupportedSourceError as exc:
-                if self.mode == "context" or not self._raw_command_may_source(branch.condition):
+                if self.mode == "context" or not raw_command_may_source(branch.condition):
                     statuses.append("unknown")
                     continue
                 raise with_source_diagnostic(
@@ -2346,10 +2709,11 @@ class SourceEvaluator:
         for branch, is_reachable in zip(node.branches, branch_reachability):
             if not is_reachable:
                 self._disable_unreachable_sources(branch.body, branch.condition or "else")
-                branch_outcomes.append(EvaluationOutcome(base_state.child_shell_copy()))
+                # Outcome states are only read by the merge, so unreachable branches share the base state
+                branch_outcomes.append(EvaluationOutcome(base_state))
                 continue
 
-            branch_state = state.child_shell_copy()
+            branch_state = self._fork_state(state, node)
             branch_state.occurrence_context = occurrence_model
             branch_state.condition_context = branch.condition or "else"
             return_signal = None
@@ -2390,6 +2754,7 @@ class SourceEvaluator:
                     for outcome in active_outcomes:
                         completed_outcomes.append(
                             self._evaluate_if_branch_body(
+                                node,
                                 branch,
                                 outcome.state,
                                 stack,
@@ -2403,7 +2768,7 @@ class SourceEvaluator:
                 next_active_outcomes = []
                 body_reachable = False
                 for outcome in active_outcomes:
-                    condition_state = outcome.state.child_shell_copy()
+                    condition_state = self._fork_state(outcome.state, node)
                     condition_state.condition_context = branch.condition
                     try:
                         status = self._evaluate_condition(
@@ -2437,6 +2802,7 @@ class SourceEvaluator:
                         body_reachable = True
                         completed_outcomes.append(
                             self._evaluate_if_branch_body(
+                                node,
                                 branch,
                                 condition_state,
                                 stack,
@@ -2464,13 +2830,14 @@ class SourceEvaluator:
 
     def _evaluate_if_branch_body(
         self,
+        node: IfBlock,
         branch,
         input_state: EvaluationState,
         stack: tuple[Path, ...],
         occurrence_model: OccurrenceModel,
         condition_context: str,
     ):
-        branch_state = input_state.child_shell_copy()
+        branch_state = self._fork_state(input_state, node)
         branch_state.occurrence_context = occurrence_model
         branch_state.condition_context = condition_context
         return_signal = None
@@ -2499,10 +2866,10 @@ class SourceEvaluator:
         for index, branch in enumerate(node.branches):
             is_reachable = branch_reachability[index]
             if not is_reachable:
-                branch_outcomes.append(EvaluationOutcome(base_state.child_shell_copy()))
+                branch_outcomes.append(EvaluationOutcome(base_state))
                 continue
 
-            branch_state = base_state.child_shell_copy()
+            branch_state = self._fork_state(base_state, node)
             branch_state.occurrence_context = occurrence_model
             branch_state.condition_context = branch.condition or "else"
             return_signal = None
@@ -2667,7 +3034,7 @@ class SourceEvaluator:
         stack: tuple[Path, ...],
         reachable_arms: list[bool],
     ):
-        arm_state = state.child_shell_copy()
+        arm_state = self._fork_state(state, node)
         occurrence_model = self._case_occurrence_model(node)
         return_signal = None
 
@@ -2695,7 +3062,7 @@ class SourceEvaluator:
         arm_outcomes = []
 
         for arm in node.arms:
-            arm_state = state.child_shell_copy()
+            arm_state = self._fork_state(state, node)
             arm_state.occurrence_context = occurrence_model
             arm_state.condition_context = self._case_arm_condition(node, arm)
             return_signal = None
@@ -2729,7 +3096,7 @@ class SourceEvaluator:
         occurrence_model = self._case_occurrence_model(node)
 
         for arm in node.arms:
-            arm_state = state.child_shell_copy()
+            arm_state = self._fork_state(state, node)
             arm_state.occurrence_context = occurrence_model
             arm_state.condition_context = self._case_arm_condition(node, arm)
             return_signal = None
@@ -2811,11 +3178,60 @@ class SourceEvaluator:
         return False
 
     def _validate_case_patterns(self, node: CaseBlock, state: EvaluationState):
+        self._case_dispatch(node, state)
+
+    def _case_dispatch(self, node: CaseBlock, state: EvaluationState):
+        """The compiled arm patterns of `node`, validating them the first time they are compiled for `state`."""
+        entry = self._case_dispatches.get(id(node))
+        if entry is None or entry[0] is not node:
+            pattern_variables = {
+                match.group(1) or match.group(2)
+                for arm in node.arms
+                for pattern in arm.patterns
+                for match in SCALAR_REFERENCE_PATTERN.finditer(pattern)
+            }
+            entry = (node, tuple(sorted(pattern_variables)), {})
+            self._case_dispatches[id(node)] = entry
+        _, pattern_variables, dispatches = entry
+        key = self._case_dispatch_key(pattern_variables, state)
+        dispatch = dispatches.get(key) if key is not None else None
+        if dispatch is not None:
+            return dispatch
+
+        flags = re.S | (re.I if "nocasematch" in state.shell_options else 0)
+        arm_sources = []
         for arm in node.arms:
+            pattern_sources = []
             for pattern in arm.patterns:
-                self._validate_case_pattern(pattern, state)
+                pattern_sources.append(self._validate_case_pattern(pattern, state))
+            arm_sources.append("|".join(f"(?:{source})" for source in pattern_sources) or "(?!)")
+        combined = "|".join(f"(?P<arm{index}>{source})" for index, source in enumerate(arm_sources))
+        dispatch = CaseDispatch(
+            combined=re.compile(rf'\A(?:{combined})\Z', flags),
+            arms=tuple(re.compile(rf'\A(?:{source})\Z', flags) for source in arm_sources),
+        )
+        if key is not None:
+            if len(dispatches) >= MAX_CASE_DISPATCHES_PER_BLOCK:
+                dispatches.clear()
+            dispatches[key] = dispatch
+        return dispatch
+
+    @staticmethod
+    def _case_dispatch_key(pattern_variables: tuple[str, ...], state: EvaluationState):
+        """What compiling case patterns that mention `pattern_variables` depends on, or None when it is not exact."""
+        values = []
+        for name in pattern_variables:
+            if name in state.ambiguous_variables:
+                return None
+            values.append(state.runtime_variables.get(name, os.environ.get(name)))
+        return (
+            "extglob" in state.glob_options,
+            "nocasematch" in state.shell_options,
+            tuple(values),
+        )
 
     def _validate_case_pattern(self, pattern: str, state: EvaluationState):
+        """The regex source matching `pattern`, raising if the pattern is outside the modeled subset."""
         stripped_pattern = pattern.strip()
         if self._contains_case_command_substitution(stripped_pattern):
             raise UnsupportedSourceError(
@@ -2829,7 +3245,7 @@ class SourceEvaluator:
                 code="unsupported.source.case-pattern",
                 hint="Enable extglob exactly before source-bearing case patterns that use extglob syntax.",
             )
-        self._case_pattern_regex(stripped_pattern, state)
+        return self._case_pattern_regex_source(stripped_pattern, state)
 
     def _ensure_case_terminators_supported(self, node: CaseBlock):
         for arm in node.arms:
@@ -2843,22 +3259,18 @@ class SourceEvaluator:
 
     def _case_arm_reachability(self, node: CaseBlock, subject_value: str, state: EvaluationState):
         reachable = [False] * len(node.arms)
-        mode = "test"
+        dispatch = self._case_dispatch(node, state)
+        index = dispatch.first_match(subject_value)
 
-        for index, arm in enumerate(node.arms):
-            is_reachable = mode == "execute" or (
-                mode == "test" and self._case_arm_matches(arm, subject_value, state)
-            )
-            reachable[index] = is_reachable
-            if not is_reachable:
-                continue
-
-            if arm.terminator == ";;":
+        while index is not None:
+            reachable[index] = True
+            terminator = node.arms[index].terminator
+            if terminator == ";;":
                 break
-            if arm.terminator == ";&":
-                mode = "execute"
+            if terminator == ";&":
+                index = index + 1 if index + 1 < len(node.arms) else None
                 continue
-            mode = "test"
+            index = dispatch.first_match(subject_value, index + 1)
         return reachable
 
     @staticmethod
@@ -2869,20 +3281,6 @@ class SourceEvaluator:
             return OccurrenceModel.CONDITIONAL
         return OccurrenceModel.MUTUALLY_EXCLUSIVE
 
-    def _case_arm_matches(self, arm, subject_value: str, state: EvaluationState):
-        return any(self._case_pattern_matches(pattern, subject_value, state) for pattern in arm.patterns)
-
-    def _case_pattern_matches(self, pattern: str, subject_value: str, state: EvaluationState):
-        try:
-            regex = self._case_pattern_regex(pattern.strip(), state)
-        except UnsupportedSourceError:
-            return False
-        return bool(regex.fullmatch(subject_value))
-
-    def _case_pattern_regex(self, pattern: str, state: EvaluationState):
-        flags = re.S | (re.I if "nocasematch" in state.shell_options else 0)
-        return re.compile(rf'\A{self._case_pattern_regex_source(pattern, state)}\Z', flags)
-
     def _case_pattern_regex_source(
         self,
         pattern: str,
@@ -3251,36 +3649,52 @@ class SourceEvaluator:
         )
 
     @staticmethod
-    def _merge_state_mapping(target: dict, state_mappings: list[dict], ambiguous: set[str],
+    def _merge_state_mapping(target: CopyOnWriteDict, state_mappings: list[CopyOnWriteDict], ambiguous: set[str],
                              ambiguous_sets: list[set[str]], clear_ambiguous: bool = True):
-        merged = {}
         if clear_ambiguous:
             ambiguous.clear()
-        keys = set().union(*(mapping.keys() for mapping in state_mappings), *ambiguous_sets)
-        for key in keys:
+        ambiguous_keys = set().union(*ambiguous_sets)
+        keys = SourceEvaluator._keys_written_since_fork(target, state_mappings)
+        for key in keys | ambiguous_keys:
             values = [mapping.get(key) for mapping in state_mappings]
-            if key in set().union(*ambiguous_sets) or any(value != values[0] for value in values[1:]):
+            if key in ambiguous_keys or any(value != values[0] for value in values[1:]):
                 ambiguous.add(key)
-                continue
-            if values[0] is not None:
-                merged[key] = copy.deepcopy(values[0])
-        target.clear()
-        target.update(merged)
+                target.pop(key, None)
+            elif values[0] is None:
+                target.pop(key, None)
+            elif target.get(key) is not values[0]:
+                target[key] = values[0]
+
+    @staticmethod
+    def _keys_written_since_fork(target: CopyOnWriteDict, state_mappings: list[CopyOnWriteDict]):
+        """Keys in which any of `state_mappings`, forked from `target`, or `target` itself changed since the fork.
+
+        Every other key still has the value all of them shared at the fork.
+        Mappings not forked from `target` fall back to every key.
+        """
+        keys = set()
+        for mapping in state_mappings:
+            written = mapping.keys_written_since(target)
+            if written is None:
+                return set().union(target.keys(), *(mapping.keys() for mapping in state_mappings))
+            keys.update(written)
+        return keys
 
     @staticmethod
     def _merge_function_state(target: EvaluationState, possible_states: list[EvaluationState]):
-        target.functions.clear()
-        target.function_variants.clear()
         target.ambiguous_functions.clear()
 
-        keys = set().union(
-            *(state.functions.keys() for state in possible_states),
-            *(state.function_variants.keys() for state in possible_states),
-            *(state.ambiguous_functions for state in possible_states),
+        ambiguous_keys = set().union(*(state.ambiguous_functions for state in possible_states))
+        keys = SourceEvaluator._keys_written_since_fork(
+            target.functions,
+            [state.functions for state in possible_states],
+        ) | SourceEvaluator._keys_written_since_fork(
+            target.function_variants,
+            [state.function_variants for state in possible_states],
         )
-        for key in keys:
-            if any(key in state.ambiguous_functions for state in possible_states):
-                target.ambiguous_functions.add(key)
+        for key in keys | ambiguous_keys:
+            if key in ambiguous_keys:
+                SourceEvaluator._mark_function_ambiguous(target, key)
                 continue
 
             variants_by_signature = {}
@@ -3301,17 +3715,40 @@ class SourceEvaluator:
                     if function_def not in signature_variants:
                         signature_variants.append(function_def)
 
+            if missing and not variants_by_signature:
+                target.functions.pop(key, None)
+                target.function_variants.pop(key, None)
+                continue
             if missing or len(variants_by_signature) != 1:
-                target.ambiguous_functions.add(key)
+                SourceEvaluator._mark_function_ambiguous(target, key)
                 continue
 
             variants = tuple(next(iter(variants_by_signature.values())))
-            target.functions[key] = variants[0]
+            if target.functions.get(key) is not variants[0]:
+                target.functions[key] = variants[0]
             if len(variants) > 1:
-                target.function_variants[key] = variants
+                if target.function_variants.get(key) != variants:
+                    target.function_variants[key] = variants
+            else:
+                target.function_variants.pop(key, None)
+
+    @staticmethod
+    def _mark_function_ambiguous(target: EvaluationState, key: str):
+        target.ambiguous_functions.add(key)
+        target.functions.pop(key, None)
+        target.function_variants.pop(key, None)
 
     @staticmethod
     def _function_signature(function_def: FunctionDef):
+        return SourceEvaluator._node_signature(function_def)
+
+    @staticmethod
+    def _node_signature(node):
+        # `_signature` only ever holds what `_build_node_signature` returns
+        return node.memoized('_signature', SourceEvaluator._build_node_signature)
+
+    @staticmethod
+    def _build_function_signature(function_def: FunctionDef):
         return (
             "function",
             function_def.name,
@@ -3319,7 +3756,7 @@ class SourceEvaluator:
         )
 
     @staticmethod
-    def _node_signature(node):
+    def _build_node_signature(node):
         if isinstance(node, Assignment):
             return ("assignment", node.name, node.value, node.prefix)
         if isinstance(node, ArrayAssignment):
@@ -3338,7 +3775,7 @@ class SourceEvaluator:
         if isinstance(node, SetCommand):
             return ("set", node.arguments)
         if isinstance(node, FunctionDef):
-            return SourceEvaluator._function_signature(node)
+            return SourceEvaluator._build_function_signature(node)
         if isinstance(node, ForLoop):
             return (
                 "for",
@@ -3457,7 +3894,7 @@ class SourceEvaluator:
     ):
         atoms = self._source_logical_condition_atoms(condition)
         if not any(atom.source_command for atom in atoms):
-            if self._raw_command_may_source(condition):
+            if raw_command_may_source(condition):
                 raise UnsupportedSourceError(f"unsupported source if condition: {condition}")
             return None
 
@@ -3623,7 +4060,7 @@ class SourceEvaluator:
         try:
             return self._evaluate_condition(atom.text, state)
         except UnsupportedSourceError:
-            if self._raw_command_may_source(atom.text):
+            if raw_command_may_source(atom.text):
                 raise
             return "unknown"
 
@@ -3706,7 +4143,7 @@ class SourceEvaluator:
                 replacement_kind="source",
                 condition=condition,
             ))
-        if not disabled_direct_source and self._raw_command_contains_literal_source(branch.condition):
+        if not disabled_direct_source and raw_command_contains_literal_source(branch.condition):
             self.disabled_sources.append(DisabledSourceSite(
                 location=location,
                 source_expression=branch.condition.strip(),
@@ -3719,7 +4156,7 @@ class SourceEvaluator:
     def _condition_text_may_source(condition: str):
         return bool(
             re.search(r'(^|[\s!(&|])(?:source|\.)\s+', condition)
-            or SourceEvaluator._raw_command_may_source(condition)
+            or raw_command_may_source(condition)
         )
 
     def _condition_has_source_atom(self, condition: str):
@@ -3813,13 +4250,13 @@ class SourceEvaluator:
             path = self._condition_path(operand, state, condition)
             if path is None:
                 return "unknown"
-            result = path.exists()
+            result = filesystem().exists(path)
             if operator == "-f":
-                result = path.is_file()
+                result = filesystem().is_file(path)
             elif operator == "-d":
-                result = path.is_dir()
+                result = filesystem().is_dir(path)
             elif operator == "-r":
-                result = os.access(path, os.R_OK)
+                result = filesystem().is_readable(path)
             return "true" if result else "false"
 
         value = self._condition_value(operand, state)
@@ -3845,7 +4282,7 @@ class SourceEvaluator:
             path = self._condition_path(operand, state, condition)
             if path is None:
                 return "unknown"
-            result = path.is_file() if operator == "-f" else os.access(path, os.R_OK)
+            result = filesystem().is_file(path) if operator == "-f" else filesystem().is_readable(path)
             return "true" if result else "false"
         if has_unquoted_brace_expansion(operand):
             raise UnsupportedSourceError(f"unsupported brace glob if condition: {condition}")
@@ -3864,7 +4301,7 @@ class SourceEvaluator:
             path = self._condition_path(operand, state, condition)
             if path is None:
                 return "unknown"
-            result = path.is_file() if operator == "-f" else os.access(path, os.R_OK)
+            result = filesystem().is_file(path) if operator == "-f" else filesystem().is_readable(path)
             return "true" if result else "false"
 
         if not matches:
@@ -3872,8 +4309,8 @@ class SourceEvaluator:
         if len(matches) != 1:
             raise UnsupportedSourceError(f"unsupported multi-match glob if condition: {condition}")
 
-        path = Path(matches[0].path).resolve()
-        result = path.is_file() if operator == "-f" else os.access(path, os.R_OK)
+        path = filesystem().resolve(matches[0].path)
+        result = filesystem().is_file(path) if operator == "-f" else filesystem().is_readable(path)
         return "true" if result else "false"
 
     def _evaluate_condition_binary(
@@ -3981,7 +4418,7 @@ class SourceEvaluator:
 
     def _evaluate_command_condition(self, condition: str, state: EvaluationState):
         try:
-            words = parse_shell_words_preserving_quotes(condition)
+            words = self._command_condition_words(condition)
         except UnsupportedSourceError as exc:
             raise UnsupportedSourceError(f"unsupported if condition syntax: {condition}") from exc
         if not words:
@@ -3998,7 +4435,12 @@ class SourceEvaluator:
             return self._evaluate_shopt_query_condition(words, state, condition)
         raise UnsupportedSourceError(f"unsupported command if condition: {condition}")
 
-    def _evaluate_shopt_query_condition(self, words: list[str], state: EvaluationState, condition: str):
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _command_condition_words(condition: str):
+        return tuple(parse_shell_words_preserving_quotes(condition))
+
+    def _evaluate_shopt_query_condition(self, words: tuple[str, ...], state: EvaluationState, condition: str):
         if len(words) < 3 or strip_shell_word_quotes(words[1]) != "-q":
             raise UnsupportedSourceError(f"unsupported shopt if condition: {condition}")
         if state.ambiguous_shell_options or state.ambiguous_glob_options:
@@ -4017,7 +4459,7 @@ class SourceEvaluator:
                 return "false"
         return "true"
 
-    def _evaluate_grep_condition(self, words: list[str], state: EvaluationState, condition: str):
+    def _evaluate_grep_condition(self, words: tuple[str, ...], state: EvaluationState, condition: str):
         options = set()
         index = 1
         while index < len(words):
@@ -4044,7 +4486,7 @@ class SourceEvaluator:
         path = self._condition_path(words[index + 1], state, condition)
         if pattern is None or path is None:
             return "unknown"
-        if not path.is_file():
+        if not filesystem().is_file(path):
             return "false"
 
         if "F" in options:
@@ -4089,12 +4531,23 @@ class SourceEvaluator:
         return "true" if bool(value) else "false"
 
     def _evaluate_arithmetic_expression(self, expression: str, state: EvaluationState, condition: str):
-        normalized = self._normalize_arithmetic_expression(expression)
+        tree = self._parse_arithmetic_expression(expression)
+        if tree is None:
+            raise UnsupportedSourceError(f"unsupported arithmetic if condition: {condition}")
+        return self._evaluate_arithmetic_ast(tree, state, condition)
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _parse_arithmetic_expression(expression: str):
+        """The AST of `expression` once normalized, or None when it does not parse.
+
+        Loops and repeated calls evaluate the same expression text many times, so
+        trees are cached by text and shared; evaluation must not modify them.
+        """
         try:
-            tree = ast.parse(normalized, mode="eval")
-        except SyntaxError as exc:
-            raise UnsupportedSourceError(f"unsupported arithmetic if condition: {condition}") from exc
-        return self._evaluate_arithmetic_ast(tree.body, state, condition)
+            return ast.parse(SourceEvaluator._normalize_arithmetic_expression(expression), mode="eval").body
+        except SyntaxError:
+            return None
 
     @staticmethod
     def _normalize_arithmetic_expression(expression: str):
@@ -4185,11 +4638,12 @@ class SourceEvaluator:
             return None
         raw_value = state.runtime_variables.get(name, os.environ.get(name, "0"))
         raw_value = strip_matching_quotes(str(raw_value))
-        if not re.fullmatch(r'[+-]?\d+', raw_value):
+        if not INTEGER_PATTERN.fullmatch(raw_value):
             raise UnsupportedSourceError(f"unsupported non-integer arithmetic variable in if condition: {condition}")
         return int(raw_value)
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _condition_words(condition: str):
         stripped = condition.strip()
         if stripped.startswith("[[") and stripped.endswith("]]"):
@@ -4223,7 +4677,7 @@ class SourceEvaluator:
         resolved = self._condition_value(value, state)
         if resolved is None:
             return None
-        if not re.fullmatch(r'[+-]?\d+', resolved):
+        if not INTEGER_PATTERN.fullmatch(resolved):
             raise UnsupportedSourceError(f"unsupported integer if condition: {condition}")
         return int(resolved)
 
@@ -4238,7 +4692,7 @@ class SourceEvaluator:
         path = Path(resolved)
         if not path.is_absolute():
             path = state.cwd / path
-        return path.resolve()
+        return filesystem().resolve(path)
 
     def _apply_source_site(self, node: SourceSite, state: EvaluationState, stack: tuple[Path, ...]):
         if self._source_site_skipped_by_known_status(node, state):
@@ -4346,7 +4800,7 @@ class SourceEvaluator:
 
         if self._source_site_has_unknown_status_guard(node, state):
             base_state = state.child_shell_copy()
-            branch_state = state.conditional_copy()
+            branch_state = self._fork_state(state, node, conditional=True)
             self._record_event(
                 source_path,
                 node,
@@ -4430,7 +4884,7 @@ class SourceEvaluator:
             state,
         )
         try:
-            resolved_source = SOURCE_RESOLVER.resolve_source_expression(
+            resolved_source = self.resolutions.resolve_source_expression(
                 path_expression,
                 source_site,
                 state.resolver_context(),
@@ -4540,7 +4994,7 @@ class SourceEvaluator:
                 source_value=source_word.word,
             )
         else:
-            resolved_source = SOURCE_RESOLVER.resolve_source_expression(
+            resolved_source = self.resolutions.resolve_source_expression(
                 self._shell_quote(source_word.word),
                 source_site,
                 resolver_context,
@@ -4814,7 +5268,7 @@ class SourceEvaluator:
         source_site = f"{node.command_name} {node.source_expression.strip()}"
         quoted_argument = self._shell_quote(arguments[0])
         try:
-            resolved_source = SOURCE_RESOLVER.resolve_source_expression(
+            resolved_source = self.resolutions.resolve_source_expression(
                 quoted_argument,
                 source_site,
                 state.resolver_context(),
@@ -4885,7 +5339,7 @@ class SourceEvaluator:
     ):
         if self._source_site_has_unknown_status_guard(node, state):
             base_state = state.child_shell_copy()
-            branch_state = state.conditional_copy()
+            branch_state = self._fork_state(state, node, conditional=True)
             self._record_event(
                 source_path,
                 node,
@@ -5027,7 +5481,7 @@ class SourceEvaluator:
                 "unsupported.source.command-resolution",
             ) from exc
 
-        if not resolved_sources and self._raw_command_may_source(node.text) and self.mode == "executable":
+        if not resolved_sources and raw_command_may_source(node.text) and self.mode == "executable":
             raise unsupported_source_error(
                 str(node.location.path),
                 node.location.line - 1,
@@ -5660,6 +6114,9 @@ class SourceEvaluator:
                     "unsupported dynamic function dispatch",
                     "Function dispatch must resolve exactly when source-relevant functions are in scope.",
                 )
+            # That no function in scope may source is not captured by any name a summary reads
+            for recorder in self._summary_recorders:
+                recorder.unbounded = True
             return False
 
         if function_name in state.ambiguous_functions:
@@ -5706,6 +6163,43 @@ class SourceEvaluator:
 
         arguments = self._resolve_function_arguments(function_name, words[index + 1:], node, state)
         prefix_words = words[:index]
+        if not self.summarize_functions:
+            self._apply_function_call_variants(variants, function_name, arguments, prefix_words, node, state, stack)
+            return True
+
+        self._evaluate_summarized(
+            (
+                function_name,
+                tuple(id(variant) for variant in variants),
+                arguments,
+                tuple(prefix_words),
+                stack,
+                tuple(self._retained_helper_stack),
+            ),
+            state,
+            lambda: self._apply_function_call_variants(
+                variants,
+                function_name,
+                arguments,
+                prefix_words,
+                node,
+                state,
+                stack,
+            ),
+            node_lists=[variant.body for variant in variants],
+        )
+        return True
+
+    def _apply_function_call_variants(
+        self,
+        variants: tuple[FunctionDef, ...],
+        function_name: str,
+        arguments: tuple[str, ...],
+        prefix_words: list[str],
+        node: RawCommand,
+        state: EvaluationState,
+        stack: tuple[Path, ...],
+    ):
         if len(variants) == 1:
             self._apply_function_call_variant(
                 variants[0],
@@ -5716,12 +6210,16 @@ class SourceEvaluator:
                 state,
                 stack,
             )
-            return True
+            return
+
+        if self.budget_meter.exhausted is not None:
+            self._widen_over_budget(node, [variant.body for variant in variants], state)
+            return
 
         base_state = state.child_shell_copy()
         outcomes = []
         for variant in variants:
-            variant_state = base_state.child_shell_copy()
+            variant_state = self._fork_state(base_state, node)
             variant_state.occurrence_context = OccurrenceModel.MUTUALLY_EXCLUSIVE
             self._apply_function_call_variant(
                 variant,
@@ -5735,7 +6233,6 @@ class SourceEvaluator:
             outcomes.append(EvaluationOutcome(variant_state))
 
         self._merge_possible_states(state, [outcome.state for outcome in outcomes])
-        return True
 
     def _apply_function_call_variant(
         self,
@@ -6160,7 +6657,7 @@ class SourceEvaluator:
             return state.last_status % 256
 
         status_text = self._resolve_function_control_word(words[1], node, state, "return")
-        if not re.fullmatch(r'[+-]?\d+', status_text):
+        if not INTEGER_PATTERN.fullmatch(status_text):
             raise self._unsupported_function_control(node, "unsupported non-integer function return status")
         return int(status_text) % 256
 
@@ -6281,7 +6778,7 @@ class SourceEvaluator:
             raise self._unsupported_array_population(node, "unsupported array population redirection")
 
         input_path = self._word_list_path(strip_shell_word_quotes(words[index + 1]), node, state)
-        if not input_path.is_file():
+        if not filesystem().is_file(input_path):
             raise self._unsupported_array_population(node, "unsupported array population input path")
 
         values = tuple(input_path.read_text().splitlines())
@@ -6476,15 +6973,13 @@ class SourceEvaluator:
             state.ambiguous_positionals = False
             self._push_source_argument_frame(state)
         try:
-            try:
-                had_nodes = self._evaluate_file(source_path, state, stack, as_source=True)
-            except SourceReturnSignal as signal:
-                return_status = signal.status
+            had_nodes, signal_status = self._evaluate_summarized_source(source_path, state, stack)
+            if signal_status is not None:
+                return_status = signal_status
+            elif not had_nodes:
+                return_status = 0
             else:
-                if not had_nodes:
-                    return_status = 0
-                else:
-                    return_status = state.last_status
+                return_status = state.last_status
             if source_arguments is None:
                 sync_positionals = (
                     source_argument_frame_active
@@ -6517,12 +7012,76 @@ class SourceEvaluator:
                         )
         return return_status, sync_positionals
 
+    def _evaluate_summarized_source(self, source_path: Path, state: EvaluationState, stack: tuple[Path, ...]):
+        """Evaluate a sourced file, or replay the summary of an earlier evaluation that read the same state.
+
+        Returns whether the file had nodes and the status of a top-level `return`, if any.
+        """
+        if not self.summarize_sources:
+            return self._evaluate_source_outcome(source_path, state, stack)
+
+        path = filesystem().resolve(source_path)
+        return self._evaluate_summarized(
+            (path, self._source_text(path), stack, tuple(self._retained_helper_stack)),
+            state,
+            lambda: self._evaluate_source_outcome(path, state, stack),
+            # Replays still read the parsed script, so parse cache counters match a full evaluation
+            on_replay=lambda: self._parse_file(path),
+        )
+
+    def _evaluate_summarized(self, key, state: EvaluationState, evaluate, *, node_lists=(), on_replay=None):
+        """Run `evaluate`, or replay the summary stored under `key` for a state with the same fingerprint.
+
+        `node_lists` are the bodies `evaluate` runs besides the scripts it parses.
+        """
+        summary = self.summaries.lookup(key, state)
+        if summary is not None:
+            if on_replay is not None:
+                on_replay()
+            for recorder in self._summary_recorders:
+                recorder.replayed_names.update(summary.names)
+            for recorded_event in summary.events:
+                self.events.append(recorded_event.relocate(state))
+            self.disabled_sources.extend(summary.disabled_sources)
+            self.line_replacements.extend(summary.line_replacements)
+            summary.delta.apply(state)
+            return summary.outcome
+
+        recorder = SummaryRecorder(state.child_shell_copy(), COPY_ON_WRITE_STATE_FIELDS)
+        event_start = len(self.events)
+        disabled_start = len(self.disabled_sources)
+        replacement_start = len(self.line_replacements)
+        retained_start = len(self.retained_helper_source_sites)
+        self._summary_recorders.append(recorder)
+        for active_recorder in self._summary_recorders:
+            active_recorder.node_lists.extend(node_lists)
+        try:
+            outcome = evaluate()
+        finally:
+            self._summary_recorders.pop()
+        if len(self.retained_helper_source_sites) == retained_start:
+            self.summaries.store(key, recorder.summary(
+                self.summaries.name_cache,
+                state,
+                self.events[event_start:],
+                self.disabled_sources[disabled_start:],
+                self.line_replacements[replacement_start:],
+                outcome,
+            ))
+        return outcome
+
+    def _evaluate_source_outcome(self, source_path: Path, state: EvaluationState, stack: tuple[Path, ...]):
+        try:
+            return self._evaluate_file(source_path, state, stack, as_source=True), None
+        except SourceReturnSignal as signal:
+            return True, signal.status
+
     def _record_event(self, source_path: Path, node, source_expression: str, source_site: str,
                       execution_model: ExecutionModel, replacement_kind: str, state: EvaluationState,
                       occurrence_model: OccurrenceModel | None = None, source_value: str | None = None,
                       source_arguments: tuple[str, ...] | None = None):
         self.events.append(SourceEvent(
-            path=source_path.resolve(),
+            path=filesystem().resolve(source_path),
             location=node.location,
             source_expression=source_expression.strip(),
             source_site=source_site.strip(),
@@ -6641,7 +7200,7 @@ class SourceEvaluator:
     def _source_line_text(self, path: Path, line: int):
         lines = self._source_line_cache.get(path)
         if lines is None:
-            lines = tuple(path.read_text().splitlines())
+            lines = tuple(self._source_text(path).splitlines())
             self._source_line_cache[path] = lines
         try:
             return lines[line - 1].strip()
@@ -6681,7 +7240,7 @@ class SourceEvaluator:
                 ))
             elif isinstance(node, RawCommand):
                 stripped_text = node.text.strip()
-                if self._raw_command_contains_literal_source(node.text):
+                if raw_command_contains_literal_source(node.text):
                     self.disabled_sources.append(DisabledSourceSite(
                         location=node.location,
                         source_expression=stripped_text,
@@ -6705,116 +7264,13 @@ class SourceEvaluator:
                     self._disable_unreachable_sources(arm.body, self._case_arm_condition(node, arm))
 
     def _nodes_may_source(self, arms):
-        for arm in arms:
-            if self._node_list_may_source(arm.body):
-                return True
-        return False
+        return any(nodes_may_source(arm.body) for arm in arms)
 
     def _if_block_may_source(self, node: IfBlock):
-        for branch in node.branches:
-            if branch.condition and self._raw_command_may_source(branch.condition):
-                return True
-            if self._node_list_may_source(branch.body):
-                return True
-        return False
+        return node_may_source(node)
 
     def _node_list_may_source(self, nodes):
-        for node in nodes:
-            if isinstance(node, SourceSite):
-                return True
-            if isinstance(node, RawCommand) and self._raw_command_may_source(node.text):
-                return True
-            if isinstance(node, FunctionDef) and self._node_list_may_source(node.body):
-                return True
-            if isinstance(node, ForLoop) and self._node_list_may_source(node.body):
-                return True
-            if isinstance(node, CStyleForLoop) and self._node_list_may_source(node.body):
-                return True
-            if isinstance(node, WhileLoop) and self._node_list_may_source(node.body):
-                return True
-            if isinstance(node, IfBlock):
-                if self._if_block_may_source(node):
-                    return True
-            if isinstance(node, CaseBlock) and self._nodes_may_source(node.arms):
-                return True
-        return False
-
-    @staticmethod
-    def _raw_command_may_source(command: str):
-        if command.strip() in {"(", ")", "{", "}"}:
-            return False
-        return bool(
-            contains_source_command(command)
-            or contains_nested_source_command(command)
-            or SourceEvaluator._raw_command_payload_may_source(command)
-            or SourceEvaluator._raw_command_may_expand_to_source(command)
-        )
-
-    @staticmethod
-    def _raw_command_contains_literal_source(command: str):
-        if command.strip() in {"(", ")", "{", "}"}:
-            return False
-        return bool(
-            contains_source_command(command)
-            or contains_nested_source_command(command)
-            or SourceEvaluator._raw_command_payload_may_source(command)
-        )
-
-    @staticmethod
-    def _raw_command_payload_may_source(command: str):
-        try:
-            words = parse_shell_words_preserving_quotes(command.strip())
-        except UnsupportedSourceError:
-            return bool(
-                re.search(r'^\s*(?:[a-zA-Z_]\w*(?:\+)?=\S+\s+)*(?:eval|bash|/bin/bash|/usr/bin/bash)\b', command)
-                and re.search(r'\bsource\b|(?:^|[\s;&|])\.', command)
-            )
-
-        index = 0
-        while index < len(words) and ASSIGNMENT_WORD_PATTERN.match(words[index]):
-            index += 1
-        if index >= len(words):
-            return False
-
-        command_name = words[index]
-        if command_name == "eval":
-            payload = strip_matching_quotes(" ".join(words[index + 1:]))
-            return contains_source_command(payload) or contains_nested_source_command(payload)
-
-        if command_name in {"bash", "/bin/bash", "/usr/bin/bash"} and len(words) > index + 2 and words[index + 1] == "-c":
-            payload = strip_matching_quotes(words[index + 2])
-            return contains_source_command(payload) or contains_nested_source_command(payload)
-
-        return False
-
-    @staticmethod
-    def _raw_command_may_expand_to_source(command: str):
-        try:
-            words = parse_shell_words_preserving_quotes(command.strip())
-        except UnsupportedSourceError:
-            return bool(
-                '$' in command
-                and re.search(r'^\s*(?:[a-zA-Z_]\w*(?:\+)?=\S+\s+)*(?:eval|bash|/bin/bash|/usr/bin/bash)\b', command)
-            )
-
-        index = 0
-        while index < len(words) and ASSIGNMENT_WORD_PATTERN.match(words[index]):
-            index += 1
-        if index >= len(words):
-            return False
-
-        command_name = words[index]
-        if command_name == "eval":
-            return any("$" in word for word in words[index + 1:])
-
-        if command_name in {"bash", "/bin/bash", "/usr/bin/bash"}:
-            return (
-                len(words) > index + 2
-                and words[index + 1] == "-c"
-                and "$" in words[index + 2]
-            )
-
-        return False
+        return nodes_may_source(nodes)
 
     @staticmethod
     def _ensure_source_state_can_resolve(node, source_expression: str, state: EvaluationState):
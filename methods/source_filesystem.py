@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import fnmatch
+import glob
+import os
+import stat
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True, slots=True)
+class DirectoryEntry:
+    """One entry of a directory listing, typed from `os.scandir` without further stats.
+
+    `is_dir` and `is_file` follow symlinks, as `os.path.isdir` and `os.path.isfile` do.
+    """
+
+    name: str
+    is_dir: bool
+    is_file: bool
+    is_symlink: bool
+
+
+class FileSystemView:
+    """Stat results, directory listings, access checks and real paths, each looked up once.
+
+    The resolver and evaluator only read the filesystem, so while a view is
+    active (see `cached_filesystem`) its answers are reused instead of being
+    asked of the operating system again. An uncached view answers every call
+    directly. `syscalls` counts lookups by kind and `hits` the ones the cache
+    served.
+    """
+
+    def __init__(self, cached: bool = True):
+        self.cached = cached
+        self.syscalls = Counter()
+        self.hits = 0
+        self._stats = {}
+        self._lstats = {}
+        self._access = {}
+        self._listings = {}
+        self._realpaths = {}
+
+    def _lookup(self, cache, kind, key, load):
+        if self.cached:
+            try:
+                value = cache[key]
+            except KeyError:
+                pass
+            else:
+                self.hits += 1
+                return value
+        self.syscalls[kind] += 1
+        value = load(key)
+        if self.cached:
+            cache[key] = value
+        return value
+
+    def stat(self, path) -> os.stat_result | None:
+        """`os.stat` of `path`, following symlinks, or None if it cannot be stat'ed."""
+        return self._lookup(self._stats, 'stat', os.fspath(path), _stat)
+
+    def exists(self, path) -> bool:
+        return self.stat(path) is not None
+
+    def lexists(self, path) -> bool:
+        """`os.path.lexists(path)`: whether `path` exists, counting broken symlinks."""
+        return self._lookup(self._lstats, 'lstat', os.fspath(path), _lstat) is not None
+
+    def is_file(self, path) -> bool:
+        result = self.stat(path)
+        return result is not None and stat.S_ISREG(result.st_mode)
+
+    def is_dir(self, path) -> bool:
+        result = self.stat(path)
+        return result is not None and stat.S_ISDIR(result.st_mode)
+
+    def is_readable(self, path) -> bool:
+        return self._lookup(self._access, 'access', os.fspath(path), _readable)
+
+    def listdir(self, path) -> tuple[DirectoryEntry, ...] | None:
+        """The entries of directory `path`, in `os.scandir` order.
+
+        None if the directory cannot be listed.
+        """
+        return self._lookup(self._listings, 'scandir', os.fspath(path), _scandir)
+
+    def walk(self, top):
+        """`os.walk(top)`, top-down without following symlinks, over cached listings.
+
+        Like `os.walk`, callers may prune the yielded directory names in place.
+        """
+        top = os.fspath(top)
+        entries = self.listdir(top)
+        if entries is None:
+            return
+        dirnames = [entry.name for entry in entries if entry.is_dir]
+        filenames = [entry.name for entry in entries if not entry.is_dir]
+        yield top, dirnames, filenames
+        symlinks = {entry.name for entry in entries if entry.is_symlink}
+        for name in dirnames:
+            if name not in symlinks:
+                yield from self.walk(os.path.join(top, name))
+
+    def glob(self, pattern: str, root_dir=None, recursive: bool = False) -> list[str]:
+        """`glob.glob(pattern, root_dir=root_dir, recursive=recursive)` over cached listings."""
+        root_dir = os.fspath(root_dir) if root_dir is not None else ''
+        matches = list(self._iglob(pattern, root_dir, recursive, False))
+        if matches and not matches[0] and (not pattern or recursive and pattern[:2] == '**'):
+            # Like `glob.glob`, drop the empty match `**` yields for the root itself
+            del matches[0]
+        return matches
+
+    def _iglob(self, pattern, root_dir, recursive, dironly):
+        dirname, basename = os.path.split(pattern)
+        if not glob.has_magic(pattern):
+            if basename:
+                if self.lexists(_join(root_dir, pattern)):
+                    yield pattern
+            elif self.is_dir(_join(root_dir, dirname)):
+                # Patterns ending with a slash only match directories
+                yield pattern
+            return
+        if not dirname:
+            if recursive and basename == '**':
+                yield from self._glob_recursive(root_dir, dironly)
+            else:
+                yield from self._glob_in_directory(root_dir, basename, dironly)
+            return
+        if dirname != pattern and glob.has_magic(dirname):
+            dirs = self._iglob(dirname, root_dir, recursive, True)
+        else:
+            dirs = [dirname]
+        for dirname in dirs:
+            directory = _join(root_dir, dirname)
+            if not glob.has_magic(basename):
+                if basename:
+                    names = [basename] if self.lexists(_join(directory, basename)) else []
+                else:
+                    names = [basename] if self.is_dir(directory) else []
+            elif recursive and basename == '**':
+                names = self._glob_recursive(directory, dironly)
+            else:
+                names = self._glob_in_directory(directory, basename, dironly)
+            for name in names:
+                yield os.path.join(dirname, name)
+
+    def _glob_names(self, directory, dironly):
+        entries = self.listdir(directory or os.curdir)
+        if entries is None:
+            return []
+        return [entry.name for entry in entries if not dironly or entry.is_dir]
+
+    def _glob_in_directory(self, directory, pattern, dironly):
+        names = self._glob_names(directory, dironly)
+        if not pattern.startswith('.'):
+            names = [name for name in names if not name.startswith('.')]
+        return fnmatch.filter(names, pattern)
+
+    def _glob_recursive(self, directory, dironly):
+        yield ''
+        yield from self._glob_descendants(directory, dironly)
+
+    def _glob_descendants(self, directory, dironly):
+        for name in self._glob_names(directory, dironly):
+            if not name.startswith('.'):
+                yield name
+                for descendant in self._glob_descendants(_join(directory, name), dironly):
+                    yield _join(name, descendant)
+
+    def realpath(self, path) -> str:
+        return self._lookup(self._realpaths, 'realpath', os.fspath(path), os.path.realpath)
+
+    def resolve(self, path) -> Path:
+        """`Path(path).resolve()`."""
+        return Path(self.realpath(path))
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _lstat(path):
+    try:
+        return os.lstat(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _join(directory, name):
+    if not directory or not name:
+        return directory or name
+    return os.path.join(directory, name)
+
+
+def _readable(path):
+    return os.access(path, os.R_OK)
+
+
+def _scandir(path):
+    entries = []
+    try:
+        with os.scandir(path) as iterator:
+            for entry in iterator:
+                entries.append(DirectoryEntry(
+                    entry.name,
+                    _entry_type(entry.is_dir),
+                    _entry_type(entry.is_file),
+                    _entry_type(entry.is_symlink),
+                ))
+    except OSError:
+        return None
+    return tuple(entries)
+
+
+def _entry_type(test):
+    try:
+        return test()
+    except OSError:
+        return False
+
+
+_UNCACHED = FileSystemView(cached=False)
+_active_view: ContextVar[FileSystemView] = ContextVar('filesystem_view', default=_UNCACHED)
+
+
+def filesystem() -> FileSystemView:
+    """The view activated by the innermost `cached_filesystem`, or one that caches nothing."""
+    return _active_view.get()
+
+
+@contextmanager
+def cached_filesystem():
+    """Activate a caching `FileSystemView` for the block, reusing one already active."""
+    view = _active_view.get()
+    if view.cached:
+        yield view
+        return
+    view = FileSystemView()
+    token = _active_view.set(view)
+    try:
+        yield view
+    finally:
+        _active_view.reset(token)
@@ -5,7 +5,7 @@ from pathlib import Path
 from typing import Protocol
 
 from methods.regex.patterns import SOURCE_PATTERN, VARIABLE_ASSIGNMENT_PATTERN
-from methods.regex.utilities import remove_comments
+from methods.regex.utilities import comment_stripper
 from methods.source_effects import (
     ArrayAssignment,
     Assignment,
@@ -25,6 +25,7 @@ from methods.source_effects import (
     WhileLoop,
 )
 from methods.source_patterns import extglob_operator_at
+from methods.source_relevance import annotate_nodes
 from methods.source_resolver import (
     contains_source_command,
     contains_nested_source_command,
@@ -39,7 +40,7 @@ from methods.source_resolver import (
     source_command_index,
     UnsupportedSourceError,
 )
-from methods.shell_line import first_top_level_pipeline_index, get_commands
+from methods.shell_line import first_top_level_pipeline_index, get_command_spans, get_commands
 
 ARRAY_ASSIGNMENT_PATTERN = re.compile(r'^(?:(declare)\s+(-[aA])\s+)?([a-zA-Z_]\w*)(\+?)=\((.*)\)$')
 ARRAY_INDEX_ASSIGNMENT_PATTERN = re.compile(r'^([a-zA-Z_]\w*)\[([^\]]+)\](\+?)=(.*)$')
@@ -74,6 +75,62 @@ CASE_TERMINATOR_COMMANDS = {
 }
 
 
+LEADING_WORD_PATTERN = re.compile(r'[\s;&|]*([^\s;&|]*)')
+SHELL_COMMENT_STRIPPER = comment_stripper(['#'], exclusion_patterns=[r'\#\!.*'], escape_exclusions=False)
+
+
+class LineLexer:
+    """Line-level token scans shared by every block parser of one parse.
+
+    Block parsers look ahead over the same physical lines, and nested bodies are
+    re-parsed from their already comment-stripped text, so each scan is memoized
+    by line text and every distinct line is lexed once per file.
+    """
+
+    def __init__(self, lines=()):
+        self._code = dict(zip(lines, SHELL_COMMENT_STRIPPER.strip_lines(lines)))
+        self._commands = {}
+        self._command_spans = {}
+        self._heredocs = {}
+        self._keywords = {}
+
+    def code(self, line: str):
+        code = self._code.get(line)
+        if code is None:
+            code = SHELL_COMMENT_STRIPPER.strip(line)
+            self._code[line] = code
+        return code
+
+    def commands(self, line: str):
+        commands = self._commands.get(line)
+        if commands is None:
+            commands = tuple(command for command, _, _ in self.command_spans(line))
+            self._commands[line] = commands
+        return commands
+
+    def command_spans(self, line: str):
+        spans = self._command_spans.get(line)
+        if spans is None:
+            spans = get_command_spans(line)
+            self._command_spans[line] = spans
+        return spans
+
+    def heredocs(self, line: str):
+        heredocs = self._heredocs.get(line)
+        if heredocs is None:
+            heredocs = tuple(extract_heredoc_delimiters(line))
+            self._heredocs[line] = heredocs
+        return heredocs
+
+    def keyword(self, line: str):
+        """Return the first word after any leading separators, e.g. ``if`` or ``for((``."""
+        keyword = self._keywords.get(line)
+        if keyword is None:
+            keyword = LEADING_WORD_PATTERN.match(line).group(1)
+            self._keywords[line] = keyword
+        return keyword
+
+
 class ParserFrontend(Protocol):
     def parse(self, path: Path | str, content: str) -> ScriptIR:
         ...
@@ -86,10 +143,21 @@ class LineParserFrontend:
     the stable contract that a future real parser adapter must preserve.
     """
 
+    # Bump whenever parse output changes so persisted ScriptIR entries are rejected.
+    cache_version = "line-3"
+    _lexer: LineLexer | None = None
+
     def parse(self, path: Path | str, content: str) -> ScriptIR:
         script_path = Path(path)
         lines = content.splitlines()
-        return ScriptIR(path=script_path, nodes=tuple(self._parse_lines(script_path, lines, 0, len(lines))))
+        previous_lexer = self._lexer
+        self._lexer = LineLexer(lines)
+        try:
+            nodes = tuple(self._parse_lines(script_path, lines, 0, len(lines)))
+            annotate_nodes(nodes)
+            return ScriptIR(path=script_path, nodes=nodes)
+        finally:
+            self._lexer = previous_lexer
 
     def _parse_lines(self, script_path: Path, lines: list[str], start_index: int, end_index: int):
         nodes = []
@@ -106,19 +174,31 @@ class LineParserFrontend:
                 line_index += 1
                 continue
 
-            code_line = remove_comments(
-                line,
-                ['#'],
-                exclusion_patterns=[r'\#\!.*'],
-                escape_exclusions=False,
-            )
+            code_line = self._lexer.code(line)
+            block_nodes, next_line_index = self._parse_block(script_path, line_number, code_line, lines, line_index)
+            if block_nodes:
+                nodes.extend(block_nodes)
+                line_index = next_line_index
+                continue
+
+            control_flow_source_ranges = self._control_flow_source_ranges(code_line, control_depth)
+            nodes.extend(self._parse_line(script_path, line_number, code_line, control_flow_source_ranges))
+            control_depth = self._next_control_depth(code_line, control_depth)
+            active_heredocs.extend(self._lexer.heredocs(line))
+            line_index += 1
 
+        return nodes
+
+    def _parse_block(self, script_path: Path, line_number: int, code_line: str, lines: list[str], line_index: int):
+        # Only try the block parsers whose header can start with this line's leading word.
+        keyword = self._lexer.keyword(code_line)
+
+        if keyword == "if":
             if_block, next_line_index = self._parse_if_block(script_path, line_number, code_line, lines, line_index)
             if if_block:
-                nodes.append(if_block)
-                line_index = next_line_index
-                continue
+                return (if_block,), next_line_index
 
+        if keyword == "function" or "(" in code_line:
             function_def, next_line_index = self._parse_function_def(
                 script_path,
                 line_number,
@@ -127,19 +207,20 @@ class LineParserFrontend:
                 line_index,
             )
             if function_def:
-                if isinstance(function_def, tuple):
-                    nodes.extend(function_def)
-                else:
-                    nodes.append(function_def)
-                line_index = next_line_index
-                continue
+                return function_def if isinstance(function_def, tuple) else (function_def,), next_line_index
 
-            case_block, next_line_index = self._parse_case_block(script_path, line_number, code_line, lines, line_index)
+        if keyword == "case":
+            case_block, next_line_index = self._parse_case_block(
+                script_path,
+                line_number,
+                code_line,
+                lines,
+                line_index,
+            )
             if case_block:
-                nodes.append(case_block)
-                line_index = next_line_index
-                continue
+                return (case_block,), next_line_index
 
+        if keyword.startswith("for"):
             c_for_loop, next_line_index = self._parse_c_style_for_loop(
                 script_path,
                 line_number,
@@ -148,29 +229,24 @@ class LineParserFrontend:
                 line_index,
             )
             if c_for_loop:
-                nodes.append(c_for_loop)
-                line_index = next_line_index
-                continue
+                return (c_for_loop,), next_line_index
 
             for_loop, next_line_index = self._parse_for_loop(script_path, line_number, code_line, lines, line_index)
             if for_loop:
-                nodes.append(for_loop)
-                line_index = next_line_index
-                continue
+                return (for_loop,), next_line_index
 
-            while_loop, next_line_index = self._parse_while_loop(script_path, line_number, code_line, lines, line_index)
+        if keyword in {"while", "until"} or "while" in code_line:
+            while_loop, next_line_index = self._parse_while_loop(
+                script_path,
+                line_number,
+                code_line,
+                lines,
+                line_index,
+            )
             if while_loop:
-                nodes.append(while_loop)
-                line_index = next_line_index
-                continue
-
-            control_flow_source_ranges = self._control_flow_source_ranges(code_line, control_depth)
-            nodes.extend(self._parse_line(script_path, line_number, code_line, control_flow_source_ranges))
-            control_depth = self._next_control_depth(code_line, control_depth)
-            active_heredocs.extend(extract_heredoc_delimiters(line))
-            line_index += 1
+                return (while_loop,), next_line_index
 
-        return nodes
+        return (), line_index + 1
 
     def _parse_line(self, script_path: Path, line_number: int, line: str, control_flow_source_ranges):
         nodes = []
@@ -218,20 +294,8 @@ class LineParserFrontend:
 
         return sorted(nodes, key=lambda node: node.location.column)
 
-    @staticmethod
-    def _commands_with_spans(line: str):
-        commands = []
-        search_start = 0
-        for command in get_commands(line):
-            command_start = line.find(command, search_start)
-            if command_start < 0:
-                command_start = line.find(command)
-            if command_start < 0:
-                command_start = 0
-            command_end = command_start + len(command)
-            commands.append((command, command_start, command_end))
-            search_start = command_end
-        return tuple(commands)
+    def _commands_with_spans(self, line: str):
+        return self._lexer.command_spans(line)
 
     @staticmethod
     def _spans_overlap(left, right):
@@ -276,12 +340,7 @@ class LineParserFrontend:
 
         while index < len(lines):
             line = lines[index]
-            code = remove_comments(
-                line,
-                ['#'],
-                exclusion_patterns=[r'\#\!.*'],
-                escape_exclusions=False,
-            )
+            code = self._lexer.code(line)
 
             if (
                 current_keyword is not None
@@ -399,16 +458,15 @@ class LineParserFrontend:
 
         return None, line_index + 1
 
-    @staticmethod
-    def _if_block_commands(code: str):
+    def _if_block_commands(self, code: str):
         stripped = code.strip()
         if not re.match(r'^(?:if|elif)\s+', stripped):
-            return get_commands(code)
+            return self._lexer.commands(code)
 
         if match := IF_INLINE_THEN_PATTERN.match(stripped):
             header, tail = match.groups()
             commands = [header.strip()]
-            tail_commands = get_commands(tail or "")
+            tail_commands = self._lexer.commands(tail or "")
             if tail_commands:
                 commands.append(f"then {tail_commands[0]}")
                 commands.extend(tail_commands[1:])
@@ -481,12 +539,7 @@ class LineParserFrontend:
         while body_index < len(lines):
             body_line_number = body_index + 1
             body_line = lines[body_index]
-            body_code_line = remove_comments(
-                body_line,
-                ['#'],
-                exclusion_patterns=[r'\#\!.*'],
-                escape_exclusions=False,
-            )
+            body_code_line = self._lexer.code(body_line)
 
             if active_heredocs:
                 body_lines.append((body_line_number, body_code_line))
@@ -512,7 +565,7 @@ class LineParserFrontend:
                 ), body_index + 1
 
             body_lines.append((body_line_number, body_code_line))
-            active_heredocs.extend(extract_heredoc_delimiters(body_line))
+            active_heredocs.extend(self._lexer.heredocs(body_line))
             body_index += 1
 
         return None, line_index + 1
@@ -569,15 +622,9 @@ class LineParserFrontend:
 
         return tail
 
-    @staticmethod
-    def _next_function_opening_line(lines: list[str], line_index: int):
+    def _next_function_opening_line(self, lines: list[str], line_index: int):
         while line_index < len(lines):
-            code_line = remove_comments(
-                lines[line_index],
-                ['#'],
-                exclusion_patterns=[r'\#\!.*'],
-                escape_exclusions=False,
-            )
+            code_line = self._lexer.code(lines[line_index])
             if code_line.strip():
                 return line_index, code_line
             line_index += 1
@@ -642,12 +689,7 @@ class LineParserFrontend:
             if index == line_index:
                 commands = self._case_commands(first_tail or "")
             else:
-                code = remove_comments(
-                    lines[index],
-                    ['#'],
-                    exclusion_patterns=[r'\#\!.*'],
-                    escape_exclusions=False,
-                )
+                code = self._lexer.code(lines[index])
                 commands = self._case_commands(code)
 
             for command in commands:
@@ -766,9 +808,8 @@ class LineParserFrontend:
             terminator=terminator,
         )
 
-    @staticmethod
-    def _case_commands(line: str):
-        return get_commands(LineParserFrontend._mark_case_terminators(line))
+    def _case_commands(self, line: str):
+        return self._lexer.commands(self._mark_case_terminators(line))
 
     @staticmethod
     def _mark_case_terminators(line: str):
@@ -1041,12 +1082,7 @@ class LineParserFrontend:
                 return None, line_index + 1
 
             do_line_index = line_index + 1
-            do_code_line = remove_comments(
-                lines[do_line_index],
-                ['#'],
-                exclusion_patterns=[r'\#\!.*'],
-                escape_exclusions=False,
-            )
+            do_code_line = self._lexer.code(lines[do_line_index])
             do_match = DO_LINE_PATTERN.match(do_code_line)
             if not do_match:
                 return None, line_index + 1
@@ -1089,19 +1125,14 @@ class LineParserFrontend:
                     body_index += 1
                     continue
 
-                body_code_line = remove_comments(
-                    body_line,
-                    ['#'],
-                    exclusion_patterns=[r'\#\!.*'],
-                    escape_exclusions=False,
-                )
+                body_code_line = self._lexer.code(body_line)
                 stripped_body_line = body_code_line.strip()
                 if stripped_body_line == "done" and control_depth == 0:
                     next_line_index = body_index + 1
                     break
 
                 body_lines.append((body_line_number, body_code_line))
-                active_heredocs.extend(extract_heredoc_delimiters(body_line))
+                active_heredocs.extend(self._lexer.heredocs(body_line))
                 control_depth = self._next_control_depth(body_code_line, control_depth)
                 body_index += 1
             else:
@@ -1128,12 +1159,7 @@ class LineParserFrontend:
                 return None, line_index + 1
 
             do_line_index = line_index + 1
-            do_code_line = remove_comments(
-                lines[do_line_index],
-                ['#'],
-                exclusion_patterns=[r'\#\!.*'],
-                escape_exclusions=False,
-            )
+            do_code_line = self._lexer.code(lines[do_line_index])
             do_match = DO_LINE_PATTERN.match(do_code_line)
             if not do_match:
                 return None, line_index + 1
@@ -1179,12 +1205,7 @@ class LineParserFrontend:
                     body_index += 1
                     continue
 
-                body_code_line = remove_comments(
-                    body_line,
-                    ['#'],
-                    exclusion_patterns=[r'\#\!.*'],
-                    escape_exclusions=False,
-                )
+                body_code_line = self._lexer.code(body_line)
                 stripped_body_line = body_code_line.strip()
                 if stripped_body_line == "done" and control_depth == 0:
                     end_line_number = body_line_number
@@ -1192,7 +1213,7 @@ class LineParserFrontend:
                     break
 
                 body_lines.append((body_line_number, body_code_line))
-                active_heredocs.extend(extract_heredoc_delimiters(body_line))
+                active_heredocs.extend(self._lexer.heredocs(body_line))
                 control_depth = self._next_control_depth(body_code_line, control_depth)
                 body_index += 1
             else:
@@ -1241,12 +1262,7 @@ class LineParserFrontend:
                     return None, line_index + 1
 
                 do_line_index = line_index + 1
-                do_code_line = remove_comments(
-                    lines[do_line_index],
-                    ['#'],
-                    exclusion_patterns=[r'\#\!.*'],
-                    escape_exclusions=False,
-                )
+                do_code_line = self._lexer.code(lines[do_line_index])
                 do_match = DO_LINE_PATTERN.match(do_code_line)
                 if not do_match:
                     return None, line_index + 1
@@ -1291,12 +1307,7 @@ class LineParserFrontend:
                     body_index += 1
                     continue
 
-                body_code_line = remove_comments(
-                    body_line,
-                    ['#'],
-                    exclusion_patterns=[r'\#\!.*'],
-                    escape_exclusions=False,
-                )
+                body_code_line = self._lexer.code(body_line)
                 stripped_body_line = body_code_line.strip()
                 done_match = re.match(r'^done(?:\s+(.*))?$', stripped_body_line)
                 if done_match and control_depth == 0:
@@ -1306,7 +1317,7 @@ class LineParserFrontend:
                     break
 
                 body_lines.append((body_line_number, body_code_line))
-                active_heredocs.extend(extract_heredoc_delimiters(body_line))
+                active_heredocs.extend(self._lexer.heredocs(body_line))
                 control_depth = self._next_control_depth(body_code_line, control_depth)
                 body_index += 1
             else:
@@ -1487,13 +1498,12 @@ class LineParserFrontend:
             is_control_flow=is_control_flow,
         )
 
-    @staticmethod
-    def _control_flow_source_ranges(line: str, control_depth: int):
+    def _control_flow_source_ranges(self, line: str, control_depth: int):
         ranges = []
         simulated_depth = control_depth
         search_start = 0
 
-        for command in get_commands(line):
+        for command in self._lexer.commands(line):
             command_start = line.find(command, search_start)
             if command_start < 0:
                 command_start = search_start
@@ -1511,9 +1521,8 @@ class LineParserFrontend:
 
         return tuple(ranges)
 
-    @staticmethod
-    def _next_control_depth(line: str, control_depth: int):
-        for command in get_commands(line):
+    def _next_control_depth(self, line: str, control_depth: int):
+        for command in self._lexer.commands(line):
             if starts_unsupported_control_block(command):
                 control_depth += 1
             elif ends_unsupported_control_block(command):
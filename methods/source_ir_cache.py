@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from methods.source_effects import ScriptIR
+
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_ENTRY_SUFFIX = ".ir"
+
+
+class ScriptIRCache:
+    """Persistent ScriptIR store shared across compiler runs.
+
+    Entries are keyed by the frontend cache version, the parsed path and a hash
+    of the file content. Reads refresh an entry's mtime so eviction removes the
+    least recently used entries once the directory exceeds ``max_bytes``.
+    Only frontends that declare a ``cache_version`` are cached.
+    """
+
+    def __init__(self, directory: Path | str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError(f"Cache size limit must not be negative: {max_bytes}")
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def parse(self, frontend, path: Path, content: str) -> ScriptIR:
+        version = getattr(frontend, "cache_version", None)
+        if version is None:
+            return frontend.parse(path, content)
+
+        entry = self._entry_path(version, path, content)
+        ir = self._load(entry)
+        if ir is not None:
+            self.hits += 1
+            return ir
+
+        self.misses += 1
+        ir = frontend.parse(path, content)
+        self._store(entry, ir)
+        return ir
+
+    def _entry_path(self, version: str, path: Path, content: str):
+        digest = hashlib.sha256()
+        for part in (version, str(path), content):
+            digest.update(part.encode("utf-8", "surrogateescape"))
+            digest.update(b"\0")
+        return self.directory / f"{digest.hexdigest()}{CACHE_ENTRY_SUFFIX}"
+
+    @staticmethod
+    def _load(entry: Path):
+        try:
+            with entry.open("rb") as handle:
+                ir = pickle.load(handle)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            entry.unlink(missing_ok=True)
+            return None
+        if not isinstance(ir, ScriptIR):
+            entry.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return ir
+
+    def _store(self, entry: Path, ir: ScriptIR):
+        payload = pickle.dumps(ir, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(descriptor, "wb") as handle:
+                    handle.write(payload)
+                os.replace(temporary, entry)
+            except BaseException:
+                Path(temporary).unlink(missing_ok=True)
+                raise
+        except OSError:
+            return
+        self._evict(keep=entry)
+
+    def _evict(self, keep: Path):
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as scanner:
+                for item in scanner:
+                    if not item.name.endswith(CACHE_ENTRY_SUFFIX) or not item.is_file(follow_symlinks=False):
+                        continue
+                    try:
+                        stat = item.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime_ns, item.name, stat.st_size))
+                    total += stat.st_size
+        except OSError:
+            return
+
+        entries.sort()
+        for _, name, size in entries:
+            if total <= self.max_bytes:
+                break
+            if name == keep.name:
+                continue
+            try:
+                (self.directory / name).unlink()
+            except OSError:
+                continue
+            total -= size
+            self.evictions += 1
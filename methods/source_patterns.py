@@ -19,6 +19,11 @@ def shell_pattern_matches(pattern: str, value: str, *, extglob: bool = False, no
     return bool(regex.fullmatch(value))
 
 
+def compile_shell_pattern(pattern: str, *, extglob: bool = False, nocase: bool = False):
+    """The compiled regex `shell_pattern_matches` matches whole values against."""
+    return _compiled_shell_pattern(pattern, extglob, nocase)
+
+
 @lru_cache(maxsize=4096)
 def _compiled_shell_pattern(pattern: str, extglob: bool, nocase: bool):
     flags = re.S | (re.I if nocase else 0)
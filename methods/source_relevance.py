@@ -0,0 +1,416 @@
+import re
+from functools import lru_cache
+
+from methods.regex.utilities import strip_matching_quotes
+from methods.source_effects import (
+    ArrayAssignment,
+    Assignment,
+    CaseBlock,
+    CdCommand,
+    CStyleForLoop,
+    ForLoop,
+    FunctionDef,
+    IfBlock,
+    RawCommand,
+    SetCommand,
+    SourceSite,
+    WhileLoop,
+)
+from methods.source_resolver import (
+    ASSIGNMENT_WORD_PATTERN,
+    UnsupportedSourceError,
+    contains_nested_source_command,
+    contains_source_command,
+    parse_shell_words_preserving_quotes,
+)
+
+SHELL_EVAL_COMMAND_PATTERN = re.compile(r'^\s*(?:[a-zA-Z_]\w*(?:\+)?=\S+\s+)*(?:eval|bash|/bin/bash|/usr/bin/bash)\b')
+SOURCE_WORD_PATTERN = re.compile(r'\bsource\b|(?:^|[\s;&|])\.')
+SHELL_BINARIES = {"bash", "/bin/bash", "/usr/bin/bash"}
+BLOCK_DELIMITERS = {"(", ")", "{", "}"}
+
+# Commands that cannot change cwd, variables, shell options or functions. A
+# function or alias of the same name can, so callers that skip such commands
+# must still check the command word against the functions defined at that point.
+STATE_FREE_COMMANDS = frozenset({
+    ":", "true", "false", "test", "[", "[[", "echo", "printf",
+    "complete", "compgen", "compopt",
+})
+STATE_FREE_COMMAND_PATTERN = re.compile(r'\s*([^\s;&|<>()]+)')
+# Syntax that assigns even inside a state-free command (`$((i++))`, `${x:=y}`,
+# `printf -v x`) or runs other commands (pipelines, lists, substitutions)
+STATE_MUTATING_SYNTAX_PATTERN = re.compile(r'\(\(|\$\{[^}]*=|(?:^|\s)-v\b|\||&&|;|\$\(|`|[<>]\(')
+# Expansions of the previous command's exit status
+STATUS_REFERENCE_PATTERN = re.compile(r'\$\{?\?')
+# Commands that leave the running function, loop or shell before the code that follows
+CONTROL_TRANSFER_COMMANDS = frozenset({"return", "break", "continue", "exit"})
+CONTROL_TRANSFER_PATTERN = re.compile(
+    r'(?:^|[;&|({!]|\b(?:then|do|else)\b)\s*(return|break|continue|exit)(?:\s+([^\s;&|)]+))?(?=\s|$|[;&|)])'
+)
+
+
+@lru_cache(maxsize=4096)
+def raw_command_may_source(command: str):
+    if command.strip() in BLOCK_DELIMITERS:
+        return False
+    return bool(
+        contains_source_command(command)
+        or contains_nested_source_command(command)
+        or raw_command_payload_may_source(command)
+        or raw_command_may_expand_to_source(command)
+    )
+
+
+@lru_cache(maxsize=4096)
+def raw_command_contains_literal_source(command: str):
+    if command.strip() in BLOCK_DELIMITERS:
+        return False
+    return bool(
+        contains_source_command(command)
+        or contains_nested_source_command(command)
+        or raw_command_payload_may_source(command)
+    )
+
+
+def _command_words(command: str):
+    words = parse_shell_words_preserving_quotes(command.strip())
+    index = 0
+    while index < len(words) and ASSIGNMENT_WORD_PATTERN.match(words[index]):
+        index += 1
+    return words, index
+
+
+def raw_command_payload_may_source(command: str):
+    try:
+        words, index = _command_words(command)
+    except UnsupportedSourceError:
+        return bool(SHELL_EVAL_COMMAND_PATTERN.search(command) and SOURCE_WORD_PATTERN.search(command))
+
+    if index >= len(words):
+        return False
+
+    command_name = words[index]
+    if command_name == "eval":
+        payload = strip_matching_quotes(" ".join(words[index + 1:]))
+        return contains_source_command(payload) or contains_nested_source_command(payload)
+
+    if command_name in SHELL_BINARIES and len(words) > index + 2 and words[index + 1] == "-c":
+        payload = strip_matching_quotes(words[index + 2])
+        return contains_source_command(payload) or contains_nested_source_command(payload)
+
+    return False
+
+
+def raw_command_may_expand_to_source(command: str):
+    try:
+        words, index = _command_words(command)
+    except UnsupportedSourceError:
+        return bool('$' in command and SHELL_EVAL_COMMAND_PATTERN.search(command))
+
+    if index >= len(words):
+        return False
+
+    command_name = words[index]
+    if command_name == "eval":
+        return any("$" in word for word in words[index + 1:])
+
+    if command_name in SHELL_BINARIES:
+        return len(words) > index + 2 and words[index + 1] == "-c" and "$" in words[index + 2]
+
+    return False
+
+
+def raw_command_may_affect_state(command: str):
+    """Whether running `command` may change cwd, variables, shell options or functions.
+
+    Only commands named in `STATE_FREE_COMMANDS`, without assigning expansions,
+    are treated as state-free; anything else, including function calls, may.
+    """
+    if command.strip() in BLOCK_DELIMITERS:
+        return False
+    match = STATE_FREE_COMMAND_PATTERN.match(command)
+    if match is None or match.group(1) not in STATE_FREE_COMMANDS:
+        return True
+    return bool(STATE_MUTATING_SYNTAX_PATTERN.search(command))
+
+
+def node_overwrites_status(node):
+    """Whether evaluating `node` sets the exit status without reading the previous one.
+
+    Assignments, `cd` and function definitions do, and so do state-free commands
+    that do not follow `&&` or `||`, unless a function of the same name is
+    defined. Nothing that expands `$?` does.
+    """
+    if STATUS_REFERENCE_PATTERN.search(node.text):
+        return False
+    if isinstance(node, (Assignment, ArrayAssignment, CdCommand, FunctionDef)):
+        return True
+    if not isinstance(node, RawCommand) or node.separator in {"&&", "||"}:
+        return False
+    match = STATE_FREE_COMMAND_PATTERN.match(node.text)
+    return match is not None and match.group(1) in STATE_FREE_COMMANDS and not raw_command_may_affect_state(node.text)
+
+
+def node_may_source(node):
+    """Whether evaluating `node` may record a source, computed once per node."""
+    return node.memoized('_may_source', _build_node_may_source)
+
+
+def node_may_affect_state(node):
+    """Whether evaluating `node` may change cwd, variables, options or functions, computed once per node."""
+    return node.memoized('_may_affect_state', _build_node_may_affect_state)
+
+
+def nodes_may_source(nodes):
+    return any(node_may_source(node) for node in nodes)
+
+
+def nodes_may_affect_state(nodes):
+    return any(node_may_affect_state(node) for node in nodes)
+
+
+def annotate_nodes(nodes):
+    """Compute the relevance flags of every node in `nodes` and their bodies."""
+    for node in nodes:
+        node_may_source(node)
+        node_may_affect_state(node)
+        for body in _child_bodies(node):
+            annotate_nodes(body)
+
+
+def _child_bodies(node):
+    if isinstance(node, (FunctionDef, ForLoop, CStyleForLoop, WhileLoop)):
+        return (node.body,)
+    if isinstance(node, IfBlock):
+        return tuple(branch.body for branch in node.branches)
+    if isinstance(node, CaseBlock):
+        return tuple(arm.body for arm in node.arms)
+    return ()
+
+
+def _build_node_may_source(node):
+    if isinstance(node, SourceSite):
+        return True
+    if isinstance(node, RawCommand):
+        return raw_command_may_source(node.text)
+    if isinstance(node, IfBlock):
+        return any(
+            bool(branch.condition and raw_command_may_source(branch.condition)) or nodes_may_source(branch.body)
+            for branch in node.branches
+        )
+    return any(nodes_may_source(body) for body in _child_bodies(node))
+
+
+def _build_node_may_affect_state(node):
+    if isinstance(node, (SourceSite, Assignment, ArrayAssignment, CdCommand, SetCommand, FunctionDef)):
+        return True
+    if isinstance(node, RawCommand):
+        return raw_command_may_affect_state(node.text)
+    if isinstance(node, (ForLoop, CStyleForLoop)):
+        # The loop variable, or the arithmetic in the header, is assigned
+        return True
+    if isinstance(node, WhileLoop):
+        if raw_command_may_affect_state(node.condition) or (
+            node.producer and raw_command_may_affect_state(node.producer)
+        ):
+            return True
+    elif isinstance(node, IfBlock):
+        if any(branch.condition and raw_command_may_affect_state(branch.condition) for branch in node.branches):
+            return True
+    elif isinstance(node, CaseBlock):
+        if STATE_MUTATING_SYNTAX_PATTERN.search(node.subject):
+            return True
+    return any(nodes_may_affect_state(body) for body in _child_bodies(node))
+
+
+IDENTIFIER_PATTERN = re.compile(r'[a-zA-Z_]\w*')
+# Reads whose variable name is only known at runtime: `${!name}`, `eval`, namerefs
+UNBOUNDED_REFERENCE_PATTERN = re.compile(r'\$\{!|\beval\b|\b(?:declare|local|typeset)\s+(?:-\w+\s+)*-\w*n')
+# Expansions inside an assignment value that assign other variables
+ASSIGNING_EXPANSION_PATTERN = re.compile(r'\(\(|\$\{[^}]*=')
+# Commands whose arguments only reach their output, never a source decision
+OUTPUT_ONLY_COMMANDS = frozenset({"echo", "complete", "compopt", "compgen"})
+# Variables the shell itself reads while resolving paths, words and options
+ALWAYS_TRACKED_VARIABLES = frozenset({
+    "0", "BASH_ARGC", "BASH_ARGV", "BASH_SOURCE", "BASHOPTS", "CDPATH", "FUNCNAME",
+    "GLOBIGNORE", "HOME", "IFS", "OLDPWD", "PATH", "POSIXLY_CORRECT", "PWD", "SHELLOPTS",
+})
+
+
+class RelevanceSlice:
+    """Variable names that can flow into source resolution, over the scripts seen so far.
+
+    A name is relevant when it is read anywhere other than by an output-only
+    command, or when it flows into the assignment of a relevant name. Names
+    read indirectly make every name relevant. Scripts are only discovered as
+    evaluation reaches them, so callers record the assignments they drop and
+    must re-evaluate once `widened()` reports that one of them became relevant.
+    """
+
+    def __init__(self):
+        self.reads = set(ALWAYS_TRACKED_VARIABLES)
+        self.dependencies: dict[str, set[str]] = {}
+        self.unbounded = False
+        self.dropped: set[str] = set()
+        self._scripts = {}
+        self._names = None
+
+    def add_script(self, ir):
+        if id(ir) in self._scripts:
+            return
+        self._scripts[id(ir)] = ir
+        self._add_nodes(ir.nodes)
+        self._names = None
+
+    def names(self):
+        if self._names is None:
+            names = set(self.reads)
+            pending = list(names)
+            while pending:
+                for dependency in self.dependencies.get(pending.pop(), ()):
+                    if dependency not in names:
+                        names.add(dependency)
+                        pending.append(dependency)
+            self._names = names
+        return self._names
+
+    def tracks(self, name: str):
+        return self.unbounded or name in self.names()
+
+    def may_drop(self, node):
+        """Whether assignment `node` may be skipped: its name is irrelevant and its value has no side effects."""
+        return (
+            not self.tracks(node.name)
+            and not ASSIGNING_EXPANSION_PATTERN.search(node.text)
+            and not raw_command_may_source(node.text)
+        )
+
+    def widened(self):
+        return bool(self.dropped) and (self.unbounded or not self.dropped.isdisjoint(self.names()))
+
+    def _read(self, text: str | None):
+        if not text:
+            return
+        if UNBOUNDED_REFERENCE_PATTERN.search(text):
+            self.unbounded = True
+        self.reads.update(IDENTIFIER_PATTERN.findall(text))
+
+    def _add_nodes(self, nodes):
+        for node in nodes:
+            if isinstance(node, (Assignment, ArrayAssignment)):
+                if UNBOUNDED_REFERENCE_PATTERN.search(node.text):
+                    self.unbounded = True
+                self.dependencies.setdefault(node.name, set()).update(IDENTIFIER_PATTERN.findall(node.text))
+                continue
+            if isinstance(node, RawCommand):
+                match = STATE_FREE_COMMAND_PATTERN.match(node.text)
+                if (
+                    match is not None
+                    and match.group(1) in OUTPUT_ONLY_COMMANDS
+                    and not STATE_MUTATING_SYNTAX_PATTERN.search(node.text)
+                ):
+                    continue
+            for text in _node_texts(node):
+                self._read(text)
+            for body in _child_bodies(node):
+                self._add_nodes(body)
+
+
+def _node_texts(node):
+    """The shell text of `node` itself, excluding its bodies."""
+    yield node.text
+    if isinstance(node, ForLoop):
+        yield node.words_text
+        yield node.trailing
+    elif isinstance(node, CStyleForLoop):
+        yield node.init
+        yield node.condition
+        yield node.update
+    elif isinstance(node, WhileLoop):
+        yield node.condition
+        yield node.trailing
+        yield node.producer
+    elif isinstance(node, IfBlock):
+        for branch in node.branches:
+            yield branch.condition
+    elif isinstance(node, CaseBlock):
+        yield node.subject
+        for arm in node.arms:
+            yield from arm.patterns
+
+
+def identifiers(text: str):
+    return IDENTIFIER_PATTERN.findall(text)
+
+
+def referenced_names(nodes):
+    """Every name `nodes` and their bodies mention, or None when some are only known at runtime.
+
+    This bounds the variables, arrays and functions evaluating `nodes` can read
+    or write, including the shell's own variables and state-free command names.
+    """
+    names = mentioned_names(nodes)
+    if names is None:
+        return None
+    return names | ALWAYS_TRACKED_VARIABLES | STATE_FREE_COMMANDS
+
+
+def mentioned_names(nodes):
+    """Every name the text of `nodes` and their bodies mentions, or None when some are only known at runtime."""
+    names = set()
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        for text in _node_texts(node):
+            if not text:
+                continue
+            if UNBOUNDED_REFERENCE_PATTERN.search(text):
+                return None
+            names.update(IDENTIFIER_PATTERN.findall(text))
+        for body in _child_bodies(node):
+            pending.extend(body)
+    return frozenset(names)
+
+
+def control_transfer_command(nodes, commands=CONTROL_TRANSFER_COMMANDS):
+    """The first of `commands` running `nodes` may run to leave them early, or None.
+
+    Function definitions among `nodes` are not run, and a `break` or `continue`
+    of one level inside a loop of `nodes` only leaves that loop.
+    """
+    pending = [(node, False) for node in nodes]
+    while pending:
+        node, in_loop = pending.pop()
+        if isinstance(node, FunctionDef):
+            continue
+        if isinstance(node, RawCommand):
+            texts = (node.text,)
+        elif isinstance(node, IfBlock):
+            texts = tuple(branch.condition for branch in node.branches if branch.condition)
+        elif isinstance(node, WhileLoop):
+            texts = (node.condition,)
+        else:
+            texts = ()
+        for text in texts:
+            for match in CONTROL_TRANSFER_PATTERN.finditer(text):
+                command, argument = match.groups()
+                if command not in commands:
+                    continue
+                if in_loop and command in {"break", "continue"} and argument in {None, "1"}:
+                    continue
+                return command
+        in_loop = in_loop or isinstance(node, (ForLoop, CStyleForLoop, WhileLoop))
+        for body in _child_bodies(node):
+            pending.extend((child, in_loop) for child in body)
+    return None
+
+
+def function_definitions(nodes):
+    """The function definitions in `nodes` and their bodies, including nested definitions."""
+    pending = list(nodes)
+    while pending:
+        node = pending.pop()
+        if isinstance(node, FunctionDef):
+            yield node
+        for body in _child_bodies(node):
+            pending.extend(body)
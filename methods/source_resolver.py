@@ -1,16 +1,18 @@
-import glob
+import fnmatch
 import os
 import re
+from collections import OrderedDict
 from dataclasses import dataclass
-from fnmatch import fnmatch
 
 from methods.regex.patterns import SOURCE_PATTERN, create_command_pattern
 from methods.regex.utilities import extract_bash_commands, strip_matching_quotes
 from methods.shell_line import get_commands
-from methods.source_patterns import UnsupportedPatternError, shell_pattern_matches
+from methods.source_filesystem import filesystem
+from methods.source_patterns import UnsupportedPatternError, compile_shell_pattern, shell_pattern_matches
 
 ASSIGNMENT_WORD_PATTERN = re.compile(r'^[a-zA-Z_]\w*(?:\+)?=.*$')
-BASH_COMMAND_PATTERN = create_command_pattern(r'bash|/bin/bash|/usr/bin/bash', regex=True)
+BASH_COMMAND_PATTERN = create_command_pattern(r'bash|/bin/bash|/usr/bin/bash', regex=True, literals=('bash',))
+SOURCE_WORD_CHARACTERS = frozenset('source')
 UNSUPPORTED_GLOB_OPTIONS = frozenset()
 MISSING_SOURCE = "missing-source"
 MISSING_SOURCE_NO_FILENAME = "missing-source-no-filename"
@@ -21,6 +23,13 @@ SOURCE_EXPANSION_FAILURE_REPLACEMENT_KINDS = frozenset({
     SOURCE_EXPANSION_FAILURE,
     SOURCE_EXPANSION_FAILURE_RETURN,
 })
+# Brace expansions of one word tried before the word is rejected; a resolver context's
+# 'max_brace_expansions' overrides it, and None there disables the bound
+MAX_BRACE_EXPANSIONS = 10_000
+# Source expression resolutions a `SourceResolutionCache` keeps before evicting the least recently used
+MAX_SOURCE_RESOLUTIONS = 4096
+# Names a variable reference can substitute: resolution looks up `$NAME`, `${NAME...}` and `$1` alike
+REFERENCED_NAME_PATTERN = re.compile(r'\w+')
 COMMAND_LEVEL_SOURCE_PATTERNS = (
     ('eval', None),
     (r'bash|/bin/bash|/usr/bin/bash', BASH_COMMAND_PATTERN),
@@ -100,6 +109,8 @@ class HeredocDelimiter:
 
 def extract_heredoc_delimiters(line: str):
     delimiters = []
+    if '<<' not in line:
+        return delimiters
     in_single_quote = False
     in_double_quote = False
     escaped = False
@@ -383,47 +394,104 @@ def has_unquoted_brace_expansion(text: str):
     return contains_unquoted_token(text, "{") and contains_unquoted_token(text, "}")
 
 
-def _brace_expand(pattern: str, raw_pattern: str, source_site: str):
+def _brace_expand(pattern: str, raw_pattern: str, source_site: str, *,
+                  limit: int | None = MAX_BRACE_EXPANSIONS, may_match=None):
+    """Yield the brace expansions of `pattern` in Bash order, raising once more than `limit` were produced.
+
+    The braces are parsed before anything is yielded, so malformed patterns
+    fail before any alternative is used. `may_match`, when given, is called
+    with each partially expanded prefix that is followed by further brace
+    groups; returning False skips every expansion starting with it.
+    """
     if not has_unquoted_brace_expansion(raw_pattern):
-        return [pattern]
-    return _brace_expand_pattern(pattern, source_site)
-
-
-def _brace_expand_pattern(pattern: str, source_site: str):
-    start = pattern.find("{")
-    if start < 0:
-        return [pattern]
-
-    depth = 0
-    end = -1
-    for index in range(start, len(pattern)):
-        char = pattern[index]
-        if char == "{":
-            depth += 1
-        elif char == "}":
-            depth -= 1
-            if depth == 0:
-                end = index
+        yield pattern
+        return
+
+    literals, groups = _brace_groups(pattern, source_site)
+    expansions = _expand_brace_groups(literals[0], literals, groups, 0, may_match)
+    for count, expanded in enumerate(expansions, 1):
+        if limit is not None and count > limit:
+            raise UnsupportedSourceError(
+                f"unsupported brace source pattern with more than {limit} expansions: {source_site.strip()}",
+                code="unsupported.source.brace-expansion",
+                hint="Narrow the brace expression, or raise the brace expansion limit.",
+                details={"limit": limit},
+            )
+        yield expanded
+
+
+def _brace_groups(pattern: str, source_site: str):
+    """Split `pattern` into literal text around its brace groups: `literals[i]` precedes `groups[i]`.
+
+    A group that is neither a list nor a sequence, such as `{a}`, ends the
+    expansion; it and the rest of the pattern stay literal.
+    """
+    literals = []
+    groups = []
+    position = 0
+    while True:
+        start = pattern.find("{", position)
+        if start < 0:
+            break
+
+        depth = 0
+        end = -1
+        for index in range(start, len(pattern)):
+            char = pattern[index]
+            if char == "{":
+                depth += 1
+            elif char == "}":
+                depth -= 1
+                if depth == 0:
+                    end = index
+                    break
+
+        if end < 0:
+            raise UnsupportedSourceError(f"unsupported brace source pattern: {source_site.strip()}")
+
+        body = pattern[start + 1:end]
+        if "{" in body or "}" in body:
+            raise UnsupportedSourceError(f"unsupported nested brace source pattern: {source_site.strip()}")
+        options = _brace_sequence_options(body)
+        if options is None:
+            if "," not in body:
                 break
+            options = body.split(",")
+        literals.append(pattern[position:start])
+        groups.append(options)
+        position = end + 1
+    literals.append(pattern[position:])
+    return literals, groups
+
+
+def _expand_brace_groups(prefix: str, literals: list[str], groups: list, index: int, may_match):
+    if index == len(groups):
+        yield prefix
+        return
+    for option in groups[index]:
+        expanded = f"{prefix}{option}{literals[index + 1]}"
+        if may_match is not None and index + 1 < len(groups) and not may_match(expanded):
+            continue
+        yield from _expand_brace_groups(expanded, literals, groups, index + 1, may_match)
 
-    if end < 0:
-        raise UnsupportedSourceError(f"unsupported brace source pattern: {source_site.strip()}")
-
-    body = pattern[start + 1:end]
-    if "{" in body or "}" in body:
-        raise UnsupportedSourceError(f"unsupported nested brace source pattern: {source_site.strip()}")
-    sequence_options = _brace_sequence_options(body)
-    if sequence_options is not None:
-        options = sequence_options
-    elif "," in body:
-        options = body.split(",")
-    else:
-        return [pattern]
 
-    expanded = []
-    for option in options:
-        expanded.extend(_brace_expand_pattern(f"{pattern[:start]}{option}{pattern[end + 1:]}", source_site))
-    return expanded
+@dataclass(frozen=True)
+class BraceSequence:
+    """The words of a `{start..end[..step]}` brace sequence, generated as they are iterated."""
+
+    values: range
+    width: int | None = None
+    letters: bool = False
+
+    def __iter__(self):
+        for value in self.values:
+            if self.letters:
+                yield chr(value)
+            elif self.width is not None:
+                sign = "-" if value < 0 else ""
+                yield f"{sign}{abs(value):0{self.width}d}"
+            else:
+                yield str(value)
 
 
 def _brace_sequence_options(body: str):
@@ -447,14 +515,7 @@ def _brace_sequence_options(body: str):
             len(end_text.lstrip("-")) > 1 and end_text.lstrip("-").startswith("0")
         )
         stop = end + (1 if step > 0 else -1)
-        values = []
-        for value in range(start, stop, step):
-            if zero_padded:
-                sign = "-" if value < 0 else ""
-                values.append(f"{sign}{abs(value):0{width}d}")
-            else:
-                values.append(str(value))
-        return values
+        return BraceSequence(range(start, stop, step), width if zero_padded else None)
 
     match = re.fullmatch(r'([A-Za-z])\.\.([A-Za-z])(?:\.\.(-?\d+))?', body)
     if match:
@@ -470,11 +531,53 @@ def _brace_sequence_options(body: str):
             if start > end:
                 step = -step
         stop = end + (1 if step > 0 else -1)
-        return [chr(value) for value in range(start, stop, step)]
+        return BraceSequence(range(start, stop, step), letters=True)
 
     return None
 
 
+def _unmatched_alternatives_are_dropped(pattern: str, glob_options: set[str], allow_missing_literal: bool):
+    """Whether brace alternatives of `pattern` that match nothing add nothing to its expansion."""
+    if 'failglob' in glob_options:
+        return False
+    if not allow_missing_literal:
+        return True
+    # Unmatched literal words are kept as missing paths, but under nullglob unmatched patterns are dropped,
+    # and every alternative ends with the text after the last brace
+    return (
+        'nullglob' in glob_options
+        and not any(char in pattern for char in "\\'\"")
+        and _has_pathname_expansion_pattern(pattern.rpartition("}")[2])
+    )
+
+
+def _brace_prefix_may_match(prefix: str, current_directory: str, glob_options: set[str]):
+    """Whether a path or glob pattern starting with `prefix` may match an existing path.
+
+    False only when the directory part of `prefix` is literal and is not a
+    directory, or no entry of it starts with the literal start of the last part.
+    """
+    directory, _, name = prefix.rpartition("/")
+    if (
+        any(char in prefix for char in "\\'\"")
+        or _has_pathname_expansion_pattern(directory)
+        or os.pardir in directory.split("/")
+    ):
+        return True
+    if directory or prefix.startswith("/"):
+        directory_path = os.path.join(current_directory, directory or "/")
+    else:
+        directory_path = current_directory
+    if not filesystem().is_dir(directory_path):
+        return False
+
+    name_prefix = re.split(r'[*?\[@!+(]', name, maxsplit=1)[0]
+    if not name_prefix or 'nocaseglob' in glob_options:
+        return True
+    entries = filesystem().listdir(directory_path)
+    return entries is None or any(entry.name.startswith(name_prefix) for entry in entries)
+
+
 def _glob_matches(pattern: str, current_directory: str, glob_options: set[str], include_hidden: bool):
     if (
         include_hidden
@@ -486,8 +589,8 @@ def _glob_matches(pattern: str, current_directory: str, glob_options: set[str],
 
     recursive = 'globstar' in glob_options
     if os.path.isabs(pattern):
-        return sorted(glob.glob(pattern, recursive=recursive))
-    return sorted(glob.glob(
+        return sorted(filesystem().glob(pattern, recursive=recursive))
+    return sorted(filesystem().glob(
         pattern,
         root_dir=current_directory,
         recursive=recursive,
@@ -502,32 +605,87 @@ def _manual_glob_matches(pattern: str, current_directory: str, glob_options: set
     absolute_pattern = pattern if os.path.isabs(pattern) else os.path.join(current_directory, pattern)
     absolute_pattern = os.path.normpath(absolute_pattern)
     root, pattern_parts = _glob_static_root(absolute_pattern)
-    if not os.path.isdir(root):
+    if not filesystem().is_dir(root):
         return []
 
-    recursive = 'globstar' in glob_options and '**' in pattern_parts
-    max_depth = None if recursive else len(pattern_parts)
+    segments = [GlobSegment(part, glob_options) for part in pattern_parts]
     matches = []
+    _descend_glob(root, _glob_closure(segments, (0,)), segments, include_hidden, matches)
+    return sorted(
+        candidate if os.path.isabs(pattern) else _relative_glob_word(candidate, current_directory, pattern)
+        for candidate in matches
+    )
 
-    for directory, dirnames, filenames in os.walk(root):
-        dirnames.sort()
-        filenames.sort()
-        relative_directory = os.path.relpath(directory, root)
-        directory_parts = [] if relative_directory == os.curdir else relative_directory.split(os.sep)
 
-        if max_depth is not None and len(directory_parts) >= max_depth:
-            dirnames[:] = []
+class GlobSegment:
+    """One `/`-separated part of a glob pattern, compiled the first time a name is matched against it."""
 
-        for name in [*dirnames, *filenames]:
-            candidate_parts = [*directory_parts, name]
-            if max_depth is not None and len(candidate_parts) > max_depth:
-                continue
-            if not _glob_parts_match(pattern_parts, candidate_parts, glob_options, include_hidden):
-                continue
-            candidate = os.path.join(root, *candidate_parts)
-            matches.append(candidate if os.path.isabs(pattern) else _relative_glob_word(candidate, current_directory, pattern))
+    __slots__ = ('pattern', 'globstar', 'literal', 'extglob', 'nocase', '_regex')
 
-    return sorted(matches)
+    def __init__(self, pattern: str, glob_options: set[str]):
+        self.pattern = pattern
+        self.extglob = 'extglob' in glob_options
+        self.nocase = 'nocaseglob' in glob_options
+        # A `**` under globstar matches any number of whole names, including none
+        self.globstar = pattern == "**" and 'globstar' in glob_options
+        self.literal = (
+            None
+            if self.nocase or "\\" in pattern or _glob_segment_has_magic(pattern)
+            else pattern
+        )
+        self._regex = None
+
+    def matches(self, name: str, include_hidden: bool):
+        if _hidden_glob_segment_blocked(self.pattern, name, include_hidden):
+            return False
+        if self.globstar:
+            return True
+        if self.literal is not None:
+            return name == self.literal
+        if self._regex is None:
+            self._regex = compile_shell_pattern(self.pattern, extglob=self.extglob, nocase=self.nocase)
+        return self._regex.fullmatch(name) is not None
+
+
+def _glob_closure(segments: list[GlobSegment], positions):
+    """`positions` in `segments`, plus the positions reached by letting `**` segments match no names."""
+    closure = set()
+    for position in positions:
+        while position not in closure:
+            closure.add(position)
+            if position == len(segments) or not segments[position].globstar:
+                break
+            position += 1
+    return closure
+
+
+def _descend_glob(directory: str, positions: set[int], segments: list[GlobSegment], include_hidden: bool,
+                  matches: list[str]):
+    """Match the entries of `directory` against `segments` at `positions`, entering only directories that match.
+
+    Like `os.walk`, directories that are symlinks are matched but not entered.
+    """
+    entries = filesystem().listdir(directory)
+    if entries is None:
+        return
+    end = len(segments)
+    for entry in entries:
+        name = entry.name
+        next_positions = set()
+        for position in positions:
+            if position == end:
+                continue
+            segment = segments[position]
+            if segment.matches(name, include_hidden):
+                next_positions.add(position if segment.globstar else position + 1)
+        if not next_positions:
+            continue
+        next_positions = _glob_closure(segments, next_positions)
+        path = os.path.join(directory, name)
+        if end in next_positions:
+            matches.append(path)
+        if entry.is_dir and not entry.is_symlink and (len(next_positions) > 1 or end not in next_positions):
+            _descend_glob(path, next_positions, segments, include_hidden, matches)
 
 
 def _pattern_with_quoted_literals(pattern: str, raw_pattern: str):
@@ -588,43 +746,10 @@ def _glob_segment_has_magic(segment: str):
     return any(char in segment for char in "*?[") or has_unquoted_extglob(segment)
 
 
-def _glob_parts_match(pattern_parts: list[str], candidate_parts: list[str], glob_options: set[str],
-                      include_hidden: bool):
-    if not pattern_parts:
-        return not candidate_parts
-
-    pattern = pattern_parts[0]
-    if pattern == "**" and "globstar" in glob_options:
-        if _glob_parts_match(pattern_parts[1:], candidate_parts, glob_options, include_hidden):
-            return True
-        if not candidate_parts:
-            return False
-        if _hidden_glob_segment_blocked(pattern, candidate_parts[0], include_hidden):
-            return False
-        return _glob_parts_match(pattern_parts, candidate_parts[1:], glob_options, include_hidden)
-
-    if not candidate_parts:
-        return False
-    if _hidden_glob_segment_blocked(pattern, candidate_parts[0], include_hidden):
-        return False
-    if not _glob_segment_matches(pattern, candidate_parts[0], glob_options):
-        return False
-    return _glob_parts_match(pattern_parts[1:], candidate_parts[1:], glob_options, include_hidden)
-
-
 def _hidden_glob_segment_blocked(pattern: str, candidate: str, include_hidden: bool):
     return candidate.startswith(".") and not include_hidden and not pattern.startswith(".")
 
 
-def _glob_segment_matches(pattern: str, candidate: str, glob_options: set[str]):
-    return shell_pattern_matches(
-        pattern,
-        candidate,
-        extglob='extglob' in glob_options,
-        nocase='nocaseglob' in glob_options,
-    )
-
-
 def _relative_glob_word(path: str, current_directory: str, pattern: str):
     relative = os.path.relpath(path, current_directory)
     if pattern.startswith("./") and not relative.startswith(os.pardir):
@@ -719,7 +844,18 @@ def expand_glob_word(
     matches = []
     matching_pattern = _pattern_with_quoted_literals(pattern, raw_pattern)
     try:
-        for expanded_pattern in _brace_expand(matching_pattern, raw_pattern, source_site):
+        may_match = None
+        if _unmatched_alternatives_are_dropped(matching_pattern, glob_options, allow_missing_literal):
+            def may_match(prefix):
+                return _brace_prefix_may_match(prefix, current_directory, glob_options)
+        expansions = _brace_expand(
+            matching_pattern,
+            raw_pattern,
+            source_site,
+            limit=context.get('max_brace_expansions', MAX_BRACE_EXPANSIONS),
+            may_match=may_match,
+        )
+        for expanded_pattern in expansions:
             has_pathname_pattern = _has_pathname_expansion_pattern(expanded_pattern)
             if has_pathname_pattern:
                 pattern_matches = _glob_matches(expanded_pattern, current_directory, glob_options, include_hidden)
@@ -729,7 +865,7 @@ def expand_glob_word(
                     if os.path.isabs(expanded_pattern)
                     else os.path.join(current_directory, expanded_pattern)
                 )
-                pattern_matches = [expanded_pattern] if os.path.exists(literal_path) else []
+                pattern_matches = [expanded_pattern] if filesystem().exists(literal_path) else []
             if not pattern_matches:
                 if 'failglob' in glob_options and has_pathname_pattern:
                     raise FailglobExpansionError(expanded_pattern, source_site)
@@ -770,7 +906,7 @@ def expand_glob_word(
             continue
         path = match if os.path.isabs(match) else os.path.join(current_directory, match)
         resolved_path = os.path.abspath(path)
-        is_file = os.path.isfile(resolved_path)
+        is_file = filesystem().is_file(resolved_path)
         if require_files and not is_file:
             raise UnsupportedSourceError(f"unsupported non-file source glob match: {source_site.strip()}")
         glob_matches.append(GlobMatch(word=match, path=resolved_path, is_file=is_file))
@@ -779,6 +915,11 @@ def expand_glob_word(
 
 
 def source_command_index(command: str):
+    # Words are built from the command's own characters, so a `source` or `.`
+    # word needs them somewhere in the text; skip word parsing otherwise.
+    if '.' not in command and not SOURCE_WORD_CHARACTERS.issubset(command):
+        return None
+
     try:
         words = parse_shell_words(command)
     except UnsupportedSourceError:
@@ -1095,6 +1236,62 @@ def extract_exact_command_substitution(source_expression: str):
     return inner_command
 
 
+class FindQuery:
+    """The `-type f` files a parsed `find` command prints, with its `-name` and `-path` patterns compiled once.
+
+    `files` lists only the directories within `-maxdepth`, and skips those
+    under which no path can start with the literal prefix of a `-path` pattern.
+    """
+
+    def __init__(self, filters: dict):
+        self.maxdepth = filters['maxdepth']
+        self.mindepth = filters['mindepth']
+        self.quit = filters.get('quit', False)
+        self.name_patterns = tuple(re.compile(fnmatch.translate(pattern)) for pattern in filters['name'])
+        self.path_patterns = tuple(re.compile(fnmatch.translate(pattern)) for pattern in filters['path'])
+        # Text before the first wildcard, which every path a pattern matches starts with
+        self.path_prefixes = tuple(re.split(r'[*?\[]', pattern, maxsplit=1)[0] for pattern in filters['path'])
+
+    def path_matches(self, paths):
+        return any(pattern.match(path) for pattern in self.path_patterns for path in paths)
+
+    def may_match_under(self, directory_prefixes):
+        """Whether a path starting with one of `directory_prefixes` may match a `-path` pattern."""
+        if not self.path_patterns:
+            return True
+        return any(
+            directory_prefix.startswith(prefix) or prefix.startswith(directory_prefix)
+            for prefix in self.path_prefixes
+            for directory_prefix in directory_prefixes
+        )
+
+    def files(self, root: str, enter_directory=None):
+        """Yield `(directory, name)` of the matching files under `root`, in `os.walk` order.
+
+        A directory is only listed if `enter_directory`, when given, returns True for it.
+        """
+        yield from self._files(root, 0, enter_directory)
+
+    def _files(self, directory: str, depth: int, enter_directory):
+        if self.maxdepth is not None and depth >= self.maxdepth:
+            return
+        if enter_directory is not None and not enter_directory(directory):
+            return
+        entries = filesystem().listdir(directory)
+        if entries is None:
+            return
+        if depth + 1 >= self.mindepth:
+            for entry in entries:
+                if entry.is_dir or not entry.is_file:
+                    continue
+                if self.name_patterns and not any(pattern.match(entry.name) for pattern in self.name_patterns):
+                    continue
+                yield directory, entry.name
+        for entry in entries:
+            if entry.is_dir and not entry.is_symlink:
+                yield from self._files(os.path.join(directory, entry.name), depth + 1, enter_directory)
+
+
 class SourceResolver:
     def __init__(self, resolve_path, resolve_variable_references, get_commands):
         self.resolve_path = resolve_path
@@ -1119,7 +1316,7 @@ class SourceResolver:
             raise UnsupportedSourceError(f"unsupported cat source command: {source_site.strip()}")
 
         path_file = self.resolve_path(words[1], context)
-        if not path_file or not os.path.isfile(path_file):
+        if not path_file or not filesystem().is_file(path_file):
             raise UnsupportedSourceError(f"unsupported cat source path file: {source_site.strip()}")
 
         with open(path_file, 'r') as file:
@@ -1156,7 +1353,7 @@ class SourceResolver:
         resolved_roots = []
         for root in roots:
             resolved_root = self.resolve_path(root, context)
-            if not resolved_root or not os.path.isdir(resolved_root):
+            if not resolved_root or not filesystem().is_dir(resolved_root):
                 raise UnsupportedSourceError(f"unsupported find source root: {root}")
             resolved_roots.append(resolved_root)
 
@@ -1209,47 +1406,39 @@ class SourceResolver:
 
     @staticmethod
     def find_candidate_matches(roots: list[str], filters: dict, context: dict):
+        query = FindQuery(filters)
         matches = []
         current_directory = context['current_directory']
+        relative_prefixes = {}
+
+        def enter_directory(directory):
+            relative_directory = os.path.relpath(directory, current_directory)
+            relative_prefix = '' if relative_directory == os.curdir else os.path.join(relative_directory, '')
+            relative_prefixes[directory] = relative_prefix
+            if all(part == os.pardir for part in relative_directory.split(os.sep)):
+                # The walk can reach cwd from here, where relative paths no longer start with this prefix
+                return True
+            return query.may_match_under((os.path.join(directory, ''), relative_prefix, f"./{relative_prefix}"))
 
         for root in roots:
-            for directory, dirnames, filenames in os.walk(root):
-                relative_directory = os.path.relpath(directory, root)
-                directory_depth = 0 if relative_directory == os.curdir else len(relative_directory.split(os.sep))
-                maxdepth = filters['maxdepth']
-                if maxdepth is not None and directory_depth >= maxdepth:
-                    dirnames[:] = []
-
-                for filename in filenames:
-                    candidate = os.path.join(directory, filename)
-                    candidate_depth = directory_depth + 1
-                    if candidate_depth < filters['mindepth']:
-                        continue
-                    if maxdepth is not None and candidate_depth > maxdepth:
-                        continue
-                    if not os.path.isfile(candidate):
-                        continue
-                    if filters['name'] and not any(fnmatch(filename, pattern) for pattern in filters['name']):
-                        continue
-
-                    relative_to_current = os.path.relpath(candidate, current_directory)
-                    path_variants = {
+            for directory, filename in query.files(root, enter_directory):
+                candidate = os.path.join(directory, filename)
+                if query.path_patterns:
+                    relative_to_current = relative_prefixes[directory] + filename
+                    path_variants = (
                         candidate,
                         relative_to_current,
                         f"./{relative_to_current}" if not relative_to_current.startswith(os.pardir) else relative_to_current,
-                    }
-                    if filters['path'] and not any(
-                        fnmatch(path_variant, pattern)
-                        for pattern in filters['path']
-                        for path_variant in path_variants
-                    ):
+                    )
+                    if not query.path_matches(path_variants):
                         continue
 
-                    matches.append(os.path.abspath(candidate))
-                    if filters.get('quit'):
-                        return matches
-                    if len(matches) > 1:
-                        return matches
+                matches.append(os.path.abspath(candidate))
+                if query.quit:
+                    return matches
+                # The caller needs exactly one match; a second one already makes the output ambiguous
+                if len(matches) > 1:
+                    return matches
 
         return matches
 
@@ -1476,3 +1665,84 @@ class SourceResolver:
                     resolved_sources.append(resolved_source)
 
         return resolved_sources
+
+
+class SourceResolutionCache:
+    """`SourceResolver.resolve_source_expression` results, reused for repeated source sites.
+
+    An entry is keyed by the expression, the site, cwd, shell and glob options,
+    the missing source words and the values of every name the expression can
+    reach through variable references, so it is only reused where resolving
+    again would give the same result. Only results are cached: expressions that
+    fail resolve again, raising the same diagnostics. Command substitutions are
+    always resolved, since `cat` sources read further references from a file.
+    The filesystem is assumed unchanged for the cache's lifetime, as it is for
+    an active `FileSystemView`.
+    """
+
+    def __init__(self, resolver, maxsize: int = MAX_SOURCE_RESOLUTIONS):
+        self.resolver = resolver
+        self.maxsize = maxsize
+        self._resolutions = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve_source_expression(self, source_expression: str, source_site: str, context: dict,
+                                  execution_model: str = "parent-source", replacement_kind: str = "source"):
+        key = _source_resolution_key(source_expression, source_site, context, execution_model, replacement_kind)
+        if key is not None:
+            try:
+                resolved_source = self._resolutions[key]
+            except KeyError:
+                pass
+            else:
+                self._resolutions.move_to_end(key)
+                self.hits += 1
+                return resolved_source
+        self.misses += 1
+        resolved_source = self.resolver.resolve_source_expression(
+            source_expression,
+            source_site,
+            context,
+            execution_model=execution_model,
+            replacement_kind=replacement_kind,
+        )
+        if key is not None:
+            self._resolutions[key] = resolved_source
+            if len(self._resolutions) > self.maxsize:
+                self._resolutions.popitem(last=False)
+        return resolved_source
+
+
+def _source_resolution_key(source_expression: str, source_site: str, context: dict,
+                           execution_model: str, replacement_kind: str):
+    """Everything resolving `source_expression` in `context` reads, or None when that is not bounded."""
+    if '$(' in source_expression or '`' in source_expression:
+        return None
+    variables = context['vars']
+    # Substituted values are scanned for further references, so the names they mention count too
+    names = set(REFERENCED_NAME_PATTERN.findall(source_expression))
+    pending = list(names)
+    while pending:
+        value = variables.get(pending.pop())
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return None
+        discovered = set(REFERENCED_NAME_PATTERN.findall(value)) - names
+        names.update(discovered)
+        pending.extend(discovered)
+    globignore = context.get('runtime_vars', variables).get('GLOBIGNORE')
+    return (
+        source_expression,
+        source_site,
+        execution_model,
+        replacement_kind,
+        context['current_directory'],
+        frozenset(context.get('shell_options', ())),
+        frozenset(context.get('glob_options', ())),
+        frozenset(context.get('missing_source_words', ())),
+        context.get('max_brace_expansions', MAX_BRACE_EXPANSIONS),
+        globignore if isinstance(globignore, str) else None,
+        tuple((name, variables.get(name)) for name in sorted(names)),
+    )
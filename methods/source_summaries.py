@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, replace
+
+from methods.source_relevance import identifiers, referenced_names
+
+# State fields holding sets of variable, array or function names
+NAME_SET_STATE_FIELDS = ('ambiguous_variables', 'ambiguous_arrays', 'ambiguous_functions')
+# Snapshot mappings rebuilt from the replaying state when a summary's events are replayed
+SNAPSHOT_MAPPING_FIELDS = ('variables', 'arrays', 'associative_arrays')
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class MappingDelta:
+    """Keys a mapping gained or changed, and keys it lost, between two points of an evaluation."""
+
+    changed: dict
+    removed: frozenset
+
+    @staticmethod
+    def between(before, after):
+        if getattr(before, '_data', None) is getattr(after, '_data', _MISSING):
+            return EMPTY_MAPPING_DELTA
+        changed = {
+            key: value
+            for key, value in after.items()
+            if before.get(key, _MISSING) is not value and before.get(key, _MISSING) != value
+        }
+        removed = frozenset(key for key in before if key not in after)
+        if not changed and not removed:
+            return EMPTY_MAPPING_DELTA
+        return MappingDelta(changed, removed)
+
+    def apply(self, mapping):
+        for key in self.removed:
+            mapping.pop(key, None)
+        for key, value in self.changed.items():
+            mapping[key] = value
+
+    def applied_to(self, mapping):
+        result = dict(mapping)
+        self.apply(result)
+        return result
+
+
+EMPTY_MAPPING_DELTA = MappingDelta({}, frozenset())
+
+
+@dataclass(frozen=True)
+class StateDelta:
+    """The effect of evaluating one region on an `EvaluationState`.
+
+    Mapping and name-set fields record only the entries the region changed, so
+    the delta can be applied to a state that differs in entries the region never
+    read. Every other field is determined by the region's inputs and is stored
+    with its value at the end of the region.
+    """
+
+    mappings: dict[str, MappingDelta]
+    added_names: dict[str, frozenset]
+    removed_names: dict[str, frozenset]
+    values: dict
+
+    @staticmethod
+    def between(before, after, mapping_fields):
+        mappings = {}
+        for name in mapping_fields:
+            delta = MappingDelta.between(getattr(before, name), getattr(after, name))
+            if delta is not EMPTY_MAPPING_DELTA:
+                mappings[name] = delta
+        added_names = {}
+        removed_names = {}
+        for name in NAME_SET_STATE_FIELDS:
+            before_names = getattr(before, name)
+            after_names = getattr(after, name)
+            added_names[name] = frozenset(after_names - before_names)
+            removed_names[name] = frozenset(before_names - after_names)
+        values = {
+            item.name: _copy_value(getattr(after, item.name))
+            for item in fields(after)
+            if item.name not in mapping_fields and item.name not in NAME_SET_STATE_FIELDS
+        }
+        return StateDelta(mappings, added_names, removed_names, values)
+
+    def apply(self, state):
+        for name, delta in self.mappings.items():
+            delta.apply(getattr(state, name))
+        for name in NAME_SET_STATE_FIELDS:
+            names = getattr(state, name)
+            names.difference_update(self.removed_names[name])
+            names.update(self.added_names[name])
+        for name, value in self.values.items():
+            setattr(state, name, _copy_value(value))
+
+
+def _copy_value(value):
+    if isinstance(value, set):
+        return set(value)
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return value
+
+
+def state_fingerprint(state, names, mapping_fields):
+    """The parts of `state` a region reading only `names` can observe, comparable with `==`."""
+    parts = []
+    for name in mapping_fields:
+        mapping = getattr(state, name)
+        parts.append(tuple(mapping.get(key, _MISSING) for key in names))
+    for name in NAME_SET_STATE_FIELDS:
+        parts.append(frozenset(getattr(state, name)).intersection(names))
+    for item in fields(state):
+        if item.name not in mapping_fields and item.name not in NAME_SET_STATE_FIELDS:
+            parts.append(getattr(state, item.name))
+    return tuple(parts)
+
+
+@dataclass(frozen=True)
+class RecordedEvent:
+    """An event recorded inside a summarized region, with its snapshot relative to the region entry."""
+
+    event: object
+    snapshot_deltas: dict[str, MappingDelta]
+
+    def relocate(self, entry_state):
+        snapshot = self.event.state_before
+        if snapshot is None:
+            return self.event
+        return replace(self.event, state_before=replace(snapshot, **{
+            name: delta.applied_to(getattr(entry_state, name))
+            for name, delta in self.snapshot_deltas.items()
+        }))
+
+
+@dataclass(frozen=True)
+class EffectSummary:
+    """Everything evaluating a region produced, replayable on any state with the same fingerprint."""
+
+    names: tuple[str, ...]
+    fingerprint: tuple
+    delta: StateDelta
+    events: tuple[RecordedEvent, ...]
+    disabled_sources: tuple
+    line_replacements: tuple
+    outcome: tuple
+
+
+class SummaryRecorder:
+    """Collects the scripts and function bodies evaluated while a region is being summarized."""
+
+    def __init__(self, entry_state, mapping_fields):
+        self.entry_state = entry_state
+        self.mapping_fields = mapping_fields
+        self.node_lists = []
+        # Names read by nested regions that were replayed rather than evaluated
+        self.replayed_names = set()
+        # Set when the region read state that no set of names bounds
+        self.unbounded = False
+
+    def names(self, name_cache):
+        """Names the region may read: everything its code mentions, plus functions and values those name."""
+        if self.unbounded:
+            return None
+        names = set(self.replayed_names)
+        for nodes in self.node_lists:
+            node_names = name_cache.names(nodes)
+            if node_names is None:
+                return None
+            names.update(node_names)
+
+        # A function called by name, or through a variable's value, reads its own body too
+        pending = list(names)
+        entry_state = self.entry_state
+        while pending:
+            name = pending.pop()
+            discovered = set()
+            function_def = entry_state.functions.get(name)
+            if function_def is not None:
+                body_names = name_cache.names(function_def.body)
+                if body_names is None:
+                    return None
+                discovered.update(body_names)
+            for variant in entry_state.function_variants.get(name, ()):
+                body_names = name_cache.names(variant.body)
+                if body_names is None:
+                    return None
+                discovered.update(body_names)
+            for mapping_name in ('variables', 'arrays'):
+                value = getattr(entry_state, mapping_name).get(name)
+                if value is not None:
+                    discovered.update(_value_names(value))
+            discovered.difference_update(names)
+            names.update(discovered)
+            pending.extend(discovered)
+        return tuple(sorted(names))
+
+    def summary(self, name_cache, exit_state, events, disabled_sources, line_replacements, outcome):
+        names = self.names(name_cache)
+        if names is None:
+            return None
+        entry_state = self.entry_state
+        recorded_events = []
+        for event in events:
+            snapshot = event.state_before
+            snapshot_deltas = {}
+            if snapshot is not None:
+                snapshot_deltas = {
+                    name: MappingDelta.between(getattr(entry_state, name), getattr(snapshot, name))
+                    for name in SNAPSHOT_MAPPING_FIELDS
+                }
+            recorded_events.append(RecordedEvent(event, snapshot_deltas))
+        return EffectSummary(
+            names=names,
+            fingerprint=state_fingerprint(entry_state, names, self.mapping_fields),
+            delta=StateDelta.between(entry_state, exit_state, self.mapping_fields),
+            events=tuple(recorded_events),
+            disabled_sources=tuple(disabled_sources),
+            line_replacements=tuple(line_replacements),
+            outcome=outcome,
+        )
+
+
+class LoopFixpoint(SummaryRecorder):
+    """Recognizes when iterations of a loop body stop changing the state the body can read.
+
+    Compares the state at the head of each iteration with the previous head,
+    over the names the loop's code may read or write. When they match and the
+    iteration in between produced no output, every later iteration would
+    evaluate the same way, so a loop that still has iterations left is at a
+    fixpoint. Loops whose body reads one of `excluded`, such as the loop
+    variable of a `for` loop, never reach one.
+    """
+
+    def __init__(self, entry_state, mapping_fields, node_lists, excluded=frozenset()):
+        super().__init__(entry_state, mapping_fields)
+        self.node_lists.extend(node_lists)
+        self.excluded = excluded
+        self._previous_head = None
+        # Set once the loop is known never to reach a fixpoint
+        self.exhausted = False
+
+    def reached(self, state, name_cache, outputs):
+        """Whether `state`, at the head of an iteration, repeats the previous head with the same `outputs` recorded."""
+        if self.exhausted:
+            return False
+        self.entry_state = state
+        names = self.names(name_cache)
+        if names is None or not self.excluded.isdisjoint(names):
+            self.exhausted = True
+            return False
+        # Copied, since the live state's sets and scopes change in place
+        fingerprint = tuple(_copy_value(part) for part in state_fingerprint(state, names, self.mapping_fields))
+        head = (names, outputs, fingerprint)
+        reached = head == self._previous_head
+        self._previous_head = head
+        return reached
+
+
+def _value_names(value):
+    if isinstance(value, str):
+        return identifiers(value)
+    names = set()
+    for item in value:
+        names.update(identifiers(item))
+    return names
+
+
+class NameCache:
+    """`referenced_names`, or another names function, of node lists, computed once per list."""
+
+    def __init__(self, names_of=referenced_names):
+        self._names_of = names_of
+        self._names = {}
+
+    def names(self, nodes):
+        entry = self._names.get(id(nodes))
+        if entry is None or entry[0] is not nodes:
+            entry = (nodes, self._names_of(nodes))
+            self._names[id(nodes)] = entry
+        return entry[1]
+
+
+class SummaryCache:
+    """Effect summaries of evaluated regions, looked up by region key and state fingerprint."""
+
+    def __init__(self, mapping_fields):
+        self.mapping_fields = mapping_fields
+        self.name_cache = NameCache()
+        self._summaries: dict[object, list[EffectSummary]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key, state):
+        for summary in self._summaries.get(key, ()):
+            if state_fingerprint(state, summary.names, self.mapping_fields) == summary.fingerprint:
+                self.hits += 1
+                return summary
+        self.misses += 1
+        return None
+
+    def store(self, key, summary):
+        if summary is not None:
+            self._summaries.setdefault(key, []).append(summary)
@@ -10,6 +10,7 @@ from methods.regex.patterns import (
     VARIABLE_REFERENCE_PATTERN,
 )
 from methods.source_resolver import SourceResolver, UnsupportedSourceError, parse_shell_words_preserving_quotes
+from methods.source_filesystem import filesystem
 from methods.shell_line import get_commands
 
 
@@ -29,7 +30,7 @@ def validate_path(path):
         print(warning)
 
     # Finally, check if the file exists and return appropriate status
-    if not os.path.exists(path):
+    if not filesystem().exists(path):
         print(f"Error: File does not exist - {path}")
         return False
 
@@ -142,7 +143,7 @@ def get_valid_path(command, base_dir=None):
 
         for candidate in candidates:
             resolved = os.path.abspath(candidate)
-            if os.path.exists(resolved):
+            if filesystem().exists(resolved):
                 return resolved
     return ""
 
@@ -237,11 +238,11 @@ def change_directory(path: str, context: dict) -> str:
     new_path = os.path.abspath(resolved_command)
 
     # If the path is a file, use its directory part
-    if os.path.isfile(new_path):
+    if filesystem().is_file(new_path):
         new_path = os.path.dirname(new_path)
 
     # Check if the new path is a directory
-    if not os.path.isdir(new_path):
+    if not filesystem().is_dir(new_path):
         raise NotADirectoryError(f"Directory not found: {new_path}")
 
     context['current_directory'] = new_path
@@ -2,11 +2,46 @@ import argparse
 import json
 import sys
 from methods.compile import compile_sources
-from methods.source_resolver import UnsupportedSourceError
+from methods.source_budget import DEFAULT_MAX_FORKS, DEFAULT_MAX_LIVE_STATES, DEFAULT_MAX_STEPS, EvaluationBudget
+from methods.source_effects import DiagnosticSeverity
+from methods.source_ir_cache import DEFAULT_CACHE_MAX_BYTES
+from methods.source_resolver import MAX_BRACE_EXPANSIONS, UnsupportedSourceError
 
 
-def main(entry_point, output_file, mode="context", source_supplement=None):
-    compile_sources(entry_point, output_file, mode=mode, source_supplement=source_supplement)
+def main(
+    entry_point,
+    output_file,
+    mode="context",
+    source_supplement=None,
+    cache_dir=None,
+    cache_max_bytes=DEFAULT_CACHE_MAX_BYTES,
+    cache_stats=False,
+    budget=None,
+    max_brace_expansions=MAX_BRACE_EXPANSIONS,
+):
+    evaluation = compile_sources(
+        entry_point,
+        output_file,
+        mode=mode,
+        source_supplement=source_supplement,
+        cache_dir=cache_dir,
+        cache_max_bytes=cache_max_bytes,
+        budget=budget,
+        max_brace_expansions=max_brace_expansions,
+    )
+    for diagnostic in evaluation.diagnostics:
+        if diagnostic.severity is DiagnosticSeverity.WARNING:
+            location = diagnostic.location
+            print(f"modashc: warning: {location.path}:{location.line}: {diagnostic.message}", file=sys.stderr)
+    if cache_stats:
+        print(
+            f"modashc: parse cache: {evaluation.parse_cache_hits} hits, {evaluation.parse_cache_misses} misses; "
+            f"disk cache: {evaluation.disk_cache_hits} hits, {evaluation.disk_cache_misses} misses; "
+            f"summaries: {evaluation.summary_cache_hits} hits, {evaluation.summary_cache_misses} misses; "
+            f"resolutions: {evaluation.resolution_cache_hits} hits, {evaluation.resolution_cache_misses} misses; "
+            f"filesystem: {evaluation.filesystem_syscalls} syscalls, {evaluation.filesystem_cache_hits} cached",
+            file=sys.stderr,
+        )
 
 
 if __name__ == '__main__':
@@ -23,6 +58,45 @@ if __name__ == '__main__':
         '--source-supplement',
         help='JSON file with exact source-relevant values for runtime-dynamic source sites.',
     )
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory for a persistent parse cache reused across runs. Disabled by default.',
+    )
+    parser.add_argument(
+        '--cache-max-bytes',
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES,
+        help='Size cap for --cache-dir; least recently used entries are evicted beyond it.',
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Print parse cache hit and miss counts to stderr.',
+    )
+    parser.add_argument(
+        '--max-steps',
+        type=int,
+        default=DEFAULT_MAX_STEPS,
+        help='Evaluation steps before remaining branches and loops are widened instead of explored.',
+    )
+    parser.add_argument(
+        '--max-forks',
+        type=int,
+        default=DEFAULT_MAX_FORKS,
+        help='States forked for branches, loops and function variants before widening.',
+    )
+    parser.add_argument(
+        '--max-live-states',
+        type=int,
+        default=DEFAULT_MAX_LIVE_STATES,
+        help='Forked states alive at once before widening.',
+    )
+    parser.add_argument(
+        '--max-brace-expansions',
+        type=int,
+        default=MAX_BRACE_EXPANSIONS,
+        help='Brace expansions of one word tried before the word is rejected.',
+    )
     args = parser.parse_args()
     try:
         main(
@@ -30,6 +104,15 @@ if __name__ == '__main__':
             output_file=args.output,
             mode=args.mode,
             source_supplement=args.source_supplement,
+            cache_dir=args.cache_dir,
+            cache_max_bytes=args.cache_max_bytes,
+            cache_stats=args.cache_stats,
+            budget=EvaluationBudget(
+                max_steps=args.max_steps,
+                max_forks=args.max_forks,
+                max_live_states=args.max_live_states,
+            ),
+            max_brace_expansions=args.max_brace_expansions,
         )
     except UnsupportedSourceError as exc:
         print(f"modashc: {exc}", file=sys.stderr)
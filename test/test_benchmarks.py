@@ -0,0 +1,173 @@
+import os
+import sys
+import time
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from methods.regex.patterns import SOURCE_PATTERN
+from test.test_realworld_projects import (
+    ensure_pinned_project,
+    load_manifest,
+    local_smoke_fixtures,
+    write_result_file,
+)
+
+BENCHMARK_PROJECTS = ("bash-completion", "pacman")
+BENCHMARK_SUFFIXES = frozenset({"", ".sh", ".bash", ".in"})
+BENCHMARK_MAX_FILE_BYTES = 1024 * 1024
+DEFAULT_BENCHMARK_REPEAT = 3
+PATHOLOGICAL_SIZES = (1000, 4000, 16000, 64000)
+PATHOLOGICAL_REGEX_SIZES = (12, 14, 16, 18)
+PATHOLOGICAL_LINES = {
+    "unclosed-word": lambda size: "source " + "a" * size + "(",
+    "escaped-quotes": lambda size: "source " + '"a\\\\" ' * (size // 5) + "(",
+    "unclosed-substitutions": lambda size: "source " + "$(" * (size // 2),
+    "unclosed-process-substitutions": lambda size: "source " + "<(a " * (size // 4),
+}
+
+
+def benchmark_enabled():
+    return os.environ.get("MODASHC_BENCHMARK") == "1"
+
+
+def benchmark_repeat():
+    raw_value = os.environ.get("MODASHC_BENCHMARK_REPEAT")
+    if not raw_value:
+        return DEFAULT_BENCHMARK_REPEAT
+    repeat = int(raw_value)
+    if repeat <= 0:
+        raise ValueError("MODASHC_BENCHMARK_REPEAT must be a positive integer")
+    return repeat
+
+
+def shell_text_files(root):
+    for path in sorted(Path(root).rglob("*")):
+        if path.suffix not in BENCHMARK_SUFFIXES or not path.is_file():
+            continue
+        if path.stat().st_size > BENCHMARK_MAX_FILE_BYTES:
+            continue
+        try:
+            content = path.read_text()
+        except (OSError, UnicodeDecodeError):
+            continue
+        if "\0" not in content:
+            yield path, content
+
+
+def benchmark_corpora():
+    corpora = {}
+    skipped = []
+    projects = {project["name"]: project for project in load_manifest()["projects"]}
+    for name in BENCHMARK_PROJECTS:
+        root, status, reason = ensure_pinned_project(projects[name])
+        if root is None:
+            skipped.append({"project": name, "status": status, "reason": reason})
+            continue
+        corpora[name] = [content for _, content in shell_text_files(root)]
+
+    fixtures, _ = local_smoke_fixtures()
+    completions = Path("/usr/share/bash-completion/completions")
+    local = [path.read_text(errors="replace") for path in fixtures]
+    if completions.is_dir():
+        local.extend(content for _, content in shell_text_files(completions))
+    if local:
+        corpora["local-installed"] = local
+    return corpora, skipped
+
+
+def best_time(callback, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        result = callback()
+        elapsed = time.perf_counter() - started_at
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+@unittest.skipUnless(
+    benchmark_enabled(),
+    "set MODASHC_BENCHMARK=1 to run corpus benchmarks",
+)
+class CorpusBenchmarkTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.corpora, cls.skipped = benchmark_corpora()
+        if not cls.corpora:
+            raise unittest.SkipTest("no benchmark corpora are available")
+
+    def test_source_pattern_prefilter(self):
+        repeat = benchmark_repeat()
+        records = []
+        for name, contents in self.corpora.items():
+            lines = [line for content in contents for line in content.splitlines()]
+            with self.subTest(corpus=name):
+                full_seconds, full = best_time(
+                    lambda: [SOURCE_PATTERN.pattern.findall(line) for line in lines], repeat,
+                )
+                prefiltered_seconds, prefiltered = best_time(
+                    lambda: [SOURCE_PATTERN.findall(line) for line in lines], repeat,
+                )
+                self.assertEqual(prefiltered, full)
+                records.append({
+                    "corpus": name,
+                    "files": len(contents),
+                    "lines": len(lines),
+                    "candidate_lines": sum(SOURCE_PATTERN.may_match(line) for line in lines),
+                    "full_seconds": round(full_seconds, 6),
+                    "prefiltered_seconds": round(prefiltered_seconds, 6),
+                    "speedup": round(full_seconds / prefiltered_seconds, 2) if prefiltered_seconds else None,
+                })
+
+        write_result_file("benchmark-source-prefilter.json", {
+            "suite": "benchmark-source-prefilter",
+            "repeat": repeat,
+            "summary": {record["corpus"]: record["speedup"] for record in records},
+            "skipped": self.skipped,
+            "records": records,
+        })
+
+
+@unittest.skipUnless(
+    benchmark_enabled(),
+    "set MODASHC_BENCHMARK=1 to run pathological-input benchmarks",
+)
+class PathologicalBenchmarkTestCase(unittest.TestCase):
+    def test_command_scanner_is_linear(self):
+        repeat = benchmark_repeat()
+        records = []
+        for name, build_line in PATHOLOGICAL_LINES.items():
+            with self.subTest(line=name):
+                timings = []
+                for size in PATHOLOGICAL_SIZES:
+                    line = build_line(size)
+                    seconds, matches = best_time(lambda: SOURCE_PATTERN.findall(line), repeat)
+                    self.assertEqual(matches, [])
+                    timings.append({"chars": len(line), "seconds": round(seconds, 6)})
+
+                # 64x the input may take at most 4x longer per character than the smallest size
+                per_char = [timing["seconds"] / timing["chars"] for timing in timings]
+                self.assertLess(per_char[-1], per_char[0] * 4)
+                records.append({"line": name, "scanner": timings})
+
+        regex_timings = []
+        for size in PATHOLOGICAL_REGEX_SIZES:
+            line = PATHOLOGICAL_LINES["unclosed-word"](size)
+            seconds, _ = best_time(lambda: SOURCE_PATTERN.pattern.findall(line), 1)
+            regex_timings.append({"chars": len(line), "seconds": round(seconds, 6)})
+        records.append({"line": "unclosed-word", "regex": regex_timings})
+
+        write_result_file("benchmark-pathological-commands.json", {
+            "suite": "benchmark-pathological-commands",
+            "repeat": repeat,
+            "records": records,
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,12 +6,14 @@ import sys
 import textwrap
 import unittest
 from pathlib import Path
+from unittest import mock
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from methods.source_effects import DiagnosticSeverity
+from methods.source_frontend import LineParserFrontend
 from test.support import ScriptProject
 
 
@@ -2885,6 +2887,34 @@ class CompileRegressionTestCase(unittest.TestCase):
 
             project.assert_compiled_matches(self, "main.sh")
 
+    def test_executable_render_reuses_evaluator_parse(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", textwrap.dedent("""\
+                set -- changed one
+                shift
+                return 0
+                """))
+            project.write("main.sh", textwrap.dedent("""\
+                set -- outer
+                source ./dep.sh arg
+                source ./dep.sh other
+                source ./dep.sh
+                printf 'after:%s:%s\\n' "$1" "$#"
+                """))
+            parsed = []
+            original_parse = LineParserFrontend.parse
+
+            def counting_parse(frontend, path, content):
+                parsed.append(Path(path).name)
+                return original_parse(frontend, path, content)
+
+            with mock.patch.object(LineParserFrontend, "parse", counting_parse):
+                project.compile("main.sh", mode="executable")
+
+            project.assert_compiled_matches(self, "main.sh")
+
+        self.assertEqual(sorted(parsed), ["dep.sh", "main.sh"])
+
     def test_sourced_file_with_arguments_restores_frame_after_nested_explicit_source(self):
         with ScriptProject() as project:
             project.write("nested.sh", "printf 'nested:%s:%s:%s\\n' \"$1\" \"$2\" \"$#\"\n")
@@ -0,0 +1,136 @@
+import unittest
+from pathlib import Path
+
+from methods.copy_on_write import WRITE_LOG_SLACK, CopyOnWriteDict
+from methods.source_evaluator import EvaluationState, SourceEvaluator
+
+
+class CopyOnWriteDictTestCase(unittest.TestCase):
+    def test_copies_share_storage_until_written(self):
+        original = CopyOnWriteDict({"a": "1", "b": "2"})
+        copied = original.copy()
+
+        self.assertIs(copied._data, original._data)
+
+        copied["a"] = "changed"
+        del copied["b"]
+
+        self.assertEqual(original, {"a": "1", "b": "2"})
+        self.assertEqual(copied, {"a": "changed"})
+
+    def test_last_owner_writes_in_place(self):
+        original = CopyOnWriteDict({"a": "1"})
+        copied = original.copy()
+        copied["a"] = "2"
+        data = original._data
+
+        original["b"] = "3"
+        del copied
+        shared = original.copy()
+        shared.pop("a")
+
+        self.assertIs(original._data, data)
+        self.assertEqual(original, {"a": "1", "b": "3"})
+        self.assertEqual(shared, {"b": "3"})
+
+    def test_reads_and_missing_keys_do_not_unshare(self):
+        original = CopyOnWriteDict({"a": "1"})
+        copied = original.copy()
+
+        self.assertEqual(copied.pop("missing", None), None)
+        self.assertEqual(copied.setdefault("a", "other"), "1")
+        self.assertEqual(dict(copied.items()), {"a": "1"})
+        self.assertIs(copied._data, original._data)
+
+        copied.clear()
+        copied.update(b="2")
+
+        self.assertEqual(original, {"a": "1"})
+        self.assertEqual(copied.to_dict(), {"b": "2"})
+
+    def test_copies_know_the_keys_written_since_the_fork(self):
+        original = CopyOnWriteDict({"a": "1", "b": "2"})
+        original["before"] = "fork"
+        branch = original.copy()
+        nested = branch.copy()
+        branch["b"] = "3"
+        nested["c"] = "4"
+        original.pop("a")
+        unrelated = CopyOnWriteDict({"a": "1"})
+
+        self.assertEqual(branch.keys_written_since(original), {"a", "b"})
+        self.assertEqual(nested.keys_written_since(branch), {"c", "b"})
+        self.assertEqual(nested.keys_written_since(original), {"a", "c"})
+        self.assertIsNone(unrelated.keys_written_since(original))
+
+        nested.clear()
+        self.assertIsNone(nested.keys_written_since(original))
+
+    def test_write_logs_stay_bounded_by_the_mapping_size(self):
+        original = CopyOnWriteDict({"a": "1"})
+        branch = original.copy()
+        for value in range(10_000):
+            original["a"] = str(value)
+
+        self.assertLessEqual(len(original._log.keys), len(original) + WRITE_LOG_SLACK)
+        self.assertIsNone(branch.keys_written_since(original))
+
+        later = original.copy()
+        later["b"] = "2"
+        self.assertEqual(later.keys_written_since(original), {"b"})
+
+    def test_assign_shares_storage_and_logs_changed_keys(self):
+        original = CopyOnWriteDict({"a": "1"})
+        parent = original.copy()
+        branch = parent.copy()
+        branch["b"] = "2"
+
+        parent.assign(branch)
+
+        self.assertIs(parent._data, branch._data)
+        self.assertEqual(parent.keys_written_since(original), {"b"})
+        parent["c"] = "3"
+        self.assertEqual(branch, {"a": "1", "b": "2"})
+
+
+class EvaluationStateForkTestCase(unittest.TestCase):
+    def test_child_shell_writes_do_not_reach_parent(self):
+        parent = EvaluationState(
+            cwd=Path("/"),
+            variables={"A": "1"},
+            associative_arrays={"m": {"k": "v"}},
+        )
+        parent.local_scopes.append({"A": (True, "0", True, "0", False)})
+        child = parent.child_shell_copy()
+
+        child.variables["A"] = "2"
+        child.associative_arrays["m"] = {**child.associative_arrays["m"], "k": "w"}
+        child.local_scopes[-1]["B"] = (False, None, False, None, False)
+        restored = EvaluationState(cwd=Path("/"))
+        restored.copy_from(child)
+        restored.variables["C"] = "3"
+
+        self.assertIsInstance(parent.variables, CopyOnWriteDict)
+        self.assertEqual(parent.variables, {"A": "1"})
+        self.assertEqual(parent.associative_arrays, {"m": {"k": "v"}})
+        self.assertEqual(list(parent.local_scopes[-1]), ["A"])
+        self.assertEqual(child.variables, {"A": "2"})
+        self.assertEqual(restored.variables, {"A": "2", "C": "3"})
+
+    def test_merge_only_examines_keys_written_in_a_branch(self):
+        state = EvaluationState(cwd=Path("/"), variables={"A": "1", "B": "2"})
+        first = state.child_shell_copy()
+        second = state.child_shell_copy()
+        for branch, value in ((first, "x"), (second, "y")):
+            branch.variables["B"] = "3"
+            branch.variables["C"] = value
+
+        SourceEvaluator._merge_possible_states(state, [first, second])
+
+        self.assertEqual(state.variables, {"A": "1", "B": "3"})
+        self.assertEqual(state.ambiguous_variables, {"C"})
+        self.assertEqual(state.variables._log.keys, ["B"])
+
+
+if __name__ == "__main__":
+    unittest.main()
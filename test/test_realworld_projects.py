@@ -395,6 +395,7 @@ def evaluate_mode(entrypoint, mode, output_path=None, source_supplement=None):
             evaluation.events,
             evaluation.disabled_sources,
             evaluation.line_replacements,
+            evaluation.scripts,
         )
         if mode == "executable":
             output = render_executable_script(str(path), context)
@@ -6,7 +6,7 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from methods.regex.patterns import CD_PATTERN, SOURCE_PATTERN
+from methods.regex.patterns import CD_PATTERN, SOURCE_PATTERN, create_command_pattern
 from methods.regex.utilities import extract_bash_commands
 
 
@@ -120,5 +120,72 @@ class TestSourceCommandRegex(unittest.TestCase):
                 self.assertEqual(result, expected_matches)
 
 
+class TestPrefilteredCommandPattern(unittest.TestCase):
+    def test_prefilter_agrees_with_full_pattern(self):
+        lines = [
+            'source a.sh', '. ./a.sh', 'x=1; . "$dir/a.sh"', 'echo $( source a.sh )', 'a && source b || . c',
+            'echo source', 'sourced a.sh', 'echo a.b', '# source a.sh', '"source" a.sh', 'source',
+            'cd /tmp', 'cd', 'echo cd', 'cd "$HOME" # cd', '   cd ..', 'x=(cd a)', 'set -- "$@"\ncd a',
+        ]
+
+        for pattern in (SOURCE_PATTERN, CD_PATTERN):
+            for line in lines:
+                with self.subTest(pattern=pattern.pattern.pattern[-80:], line=line):
+                    self.assertEqual(
+                        [match.groups() for match in pattern.finditer(line)],
+                        [match.groups() for match in pattern.pattern.finditer(line)],
+                    )
+                    self.assertEqual(pattern.findall(line), pattern.pattern.findall(line))
+                    self.assertEqual(bool(pattern.search(line)), bool(pattern.pattern.search(line)))
+
+    def test_prefilter_rejects_lines_without_command_word(self):
+        pattern = create_command_pattern('cd')
+
+        self.assertFalse(pattern.may_match('echo hello'))
+        self.assertFalse(pattern.may_match('echo abcd'))
+        self.assertTrue(pattern.may_match('true && cd /tmp'))
+
+    def test_scanner_agrees_with_full_pattern_on_backtracking_input(self):
+        lines = [
+            'source $dir/$(name).sh', 'source a$(b)c <(d) 2>&1 >>log', 'source "a\\" b"c', "source 'a\\' b' ; x",
+            'source "unterminated', 'source a( b', 'source a # c(', 'source a\n(b', '. a\\"b" c', 'x; source `a` >&2',
+            'source $(a $(b $(c $(d)))) e', 'source a $(b (c) (d)) || e', 'echo "$(source a)"', '#x; source a',
+            "'#x' && source a", 'cd a;cd b', 'cd "a" \t# b', 'echo $(cd a)b',
+        ]
+
+        for pattern in (SOURCE_PATTERN, CD_PATTERN):
+            for line in lines:
+                with self.subTest(pattern=pattern.pattern.pattern[-80:], line=line):
+                    self.assertEqual(
+                        [(match.span(), match.span(1), match.span(3), match.groups()) for match in pattern.finditer(line)],
+                        [(match.span(), match.span(1), match.span(3), match.groups()) for match in pattern.pattern.finditer(line)],
+                    )
+
+    def test_scanner_is_linear_on_pathological_input(self):
+        # Each of these takes the backtracking regex longer than any test run
+        lines = [
+            'source ' + 'a' * 20000 + '(',
+            'source ' + '"a\\" ' * 5000 + '(',
+            'source ' + '$(' * 5000,
+            'source ' + '<(a ' * 5000,
+        ]
+
+        for line in lines:
+            with self.subTest(line=line[:40]):
+                self.assertEqual(SOURCE_PATTERN.findall(line), [])
+
+        self.assertEqual(len(SOURCE_PATTERN.findall('; source x' * 5000 + ' (')), 4999)
+        self.assertEqual(
+            SOURCE_PATTERN.search('source ' + 'a' * 20000 + ' ;').span(3),
+            (6, 20008),
+        )
+
+    def test_custom_templates_are_not_prefiltered(self):
+        pattern = create_command_pattern('dirname', template=r'\$\(\s*\b{command}\b')
+
+        self.assertEqual(pattern.findall('x=$(dirname "$0")'), ['$(dirname'])
+        self.assertFalse(hasattr(pattern, 'may_match'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -7,6 +7,7 @@ if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
 from methods.regex.utilities import (
+    comment_stripper,
     remove_comments,
     strip_matching_quotes
 )
@@ -64,6 +65,30 @@ class TestRemoveComments(unittest.TestCase):
                 result = remove_comments(input_text, comment_patterns, exclusion_patterns, escape_exclusions)
                 self.assertEqual(result, expected)
 
+    def test_comment_stripper_is_shared_per_configuration(self):
+        stripper = comment_stripper(['#'], [r'\#\!.*'], escape_exclusions=False)
+
+        self.assertIs(comment_stripper(('#',), (r'\#\!.*',), escape_exclusions=False), stripper)
+        self.assertIsNot(comment_stripper(['#']), stripper)
+
+    def test_strip_lines_matches_per_line_removal(self):
+        lines = [
+            "#!/bin/bash",
+            "# Commented",
+            "echo '# && cd fake' # && cd ..",
+            'echo "unterminated # quote',
+            "source ./dir#tag/dep.sh # comment",
+            "",
+            "#trailing",
+        ]
+        stripper = comment_stripper(['#'], [r'\#\!.*'], escape_exclusions=False)
+
+        self.assertEqual(
+            stripper.strip_lines(lines),
+            [remove_comments(line, ['#'], [r'\#\!.*'], escape_exclusions=False) for line in lines],
+        )
+        self.assertEqual(stripper.strip_lines([]), [])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,113 @@
+import gc
+import textwrap
+import unittest
+from pathlib import Path
+
+from methods.source_budget import BudgetMeter, EvaluationBudget
+from methods.source_effects import RawCommand, SourceLocation
+from methods.source_evaluator import SourceEvaluator
+from test.support import ScriptProject
+
+
+class _State:
+    pass
+
+
+def _command(line):
+    return RawCommand(location=SourceLocation(Path("/main.sh"), line, 1), text="true")
+
+
+class BudgetMeterTestCase(unittest.TestCase):
+    def test_live_states_are_released_when_forked_states_are_collected(self):
+        meter = BudgetMeter(EvaluationBudget(max_live_states=1))
+        node = _command(1)
+
+        first = _State()
+        meter.fork(first, node)
+        del first
+        gc.collect()
+        second = _State()
+        meter.fork(second, node)
+
+        self.assertEqual((meter.forks, meter.live_states), (2, 1))
+        self.assertIsNone(meter.exhausted)
+
+        third = _State()
+        meter.fork(third, node)
+        self.assertEqual(meter.exhausted, "live states")
+
+    def test_details_name_the_construct_that_forked_most(self):
+        meter = BudgetMeter(EvaluationBudget(max_steps=2, max_forks=None))
+        states = [_State() for _ in range(3)]
+        meter.fork(states[0], _command(1))
+        meter.fork(states[1], _command(2))
+        meter.fork(states[2], _command(2))
+        for _ in range(3):
+            meter.step()
+
+        details = meter.details()
+
+        self.assertEqual(details["exhausted"], "steps")
+        self.assertEqual(details["hot_construct"], "/main.sh:2")
+        self.assertEqual(details["hot_construct_forks"], 2)
+
+
+class BudgetWideningTestCase(unittest.TestCase):
+    def test_exhausted_budget_fails_closed_before_control_transfers(self):
+        scripts = {
+            "return": """\
+                X=1
+                X=2
+                X=3
+                f() {
+                  if [ -n "$FOO" ]; then
+                    return 1
+                  fi
+                  source ./dep.sh
+                }
+                f
+                """,
+            "exit": """\
+                X=1
+                X=2
+                X=3
+                if [ -n "$FOO" ]; then
+                  exit 1
+                fi
+                source ./dep.sh
+                """,
+        }
+        with ScriptProject() as project:
+            project.write("dep.sh", "true\n")
+            for command, script in scripts.items():
+                with self.subTest(command=command):
+                    entry = project.write("main.sh", textwrap.dedent(script))
+
+                    with self.assertRaisesRegex(NotImplementedError, f"before code that may {command}") as cm:
+                        SourceEvaluator(budget=EvaluationBudget(max_steps=3)).evaluate(entry)
+
+                    self.assertEqual(cm.exception.diagnostic.code, "unsupported.source.budget")
+
+    def test_loops_breaking_out_of_themselves_are_still_widened(self):
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                X=1
+                X=2
+                X=3
+                for i in 1 2 3; do
+                  if [ "$i" = 2 ]; then
+                    break
+                  fi
+                done
+                source ./dep.sh
+                """))
+
+            result = SourceEvaluator(budget=EvaluationBudget(max_steps=3)).evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep])
+        self.assertEqual([diagnostic.code for diagnostic in result.diagnostics], ["evaluation.budget-exhausted"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,7 +5,9 @@ from methods.source_effects import (
     Diagnostic,
     DiagnosticSeverity,
     ExecutionModel,
+    FunctionDef,
     OccurrenceModel,
+    RawCommand,
     SourceEvent,
     SourceLocation,
     StateSnapshot,
@@ -54,6 +56,23 @@ class SourceEffectsTestCase(unittest.TestCase):
         self.assertEqual(diagnostic.location.line, 12)
         self.assertIn("runtime-dynamic", diagnostic.message)
 
+    def test_ir_nodes_are_hashable_and_memoize_their_signature(self):
+        location = SourceLocation(Path("main.sh"), 1, 1)
+        body = (RawCommand(location, "echo hi"),)
+        function_def = FunctionDef(location, "f() { echo hi; }", "f", body)
+        builds = []
+
+        def build(node):
+            builds.append(node)
+            return ("function", node.name)
+
+        self.assertEqual(function_def.memoized("_signature", build), ("function", "f"))
+        self.assertEqual(function_def.memoized("_signature", build), ("function", "f"))
+        self.assertEqual(builds, [function_def])
+        self.assertEqual(function_def, FunctionDef(location, "f() { echo hi; }", "f", body))
+        self.assertEqual(hash(function_def), hash(FunctionDef(location, "f() { echo hi; }", "f", body)))
+        self.assertFalse(hasattr(function_def, "__dict__"))
+
 
 if __name__ == "__main__":
     unittest.main()
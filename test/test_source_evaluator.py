@@ -1,8 +1,12 @@
+import ast
 import subprocess
 import textwrap
 import unittest
+from unittest import mock
 
-from methods.source_effects import ExecutionModel, OccurrenceModel
+from methods import source_resolver
+from methods.source_budget import EvaluationBudget
+from methods.source_effects import DiagnosticSeverity, ExecutionModel, OccurrenceModel
 from methods.source_evaluator import SourceEvaluator
 from test.support import ScriptProject
 
@@ -98,6 +102,27 @@ class SourceEvaluatorTestCase(unittest.TestCase):
         self.assertEqual([event.path for event in result.events], [dep, dep])
         self.assertEqual({event.occurrence_model for event in result.events}, {OccurrenceModel.REPEATED})
 
+    def test_repeated_sources_reuse_parsed_ir_within_evaluation(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", 'echo "dep"\n')
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for i in 1 2 3; do
+                  source ./dep.sh
+                done
+                """))
+
+            evaluator = SourceEvaluator()
+            result = evaluator.evaluate(entry)
+            second_result = evaluator.evaluate(entry)
+
+        self.assertEqual(len(result.events), 3)
+        self.assertEqual(result.parse_cache_misses, 2)
+        self.assertEqual(result.parse_cache_hits, 2)
+        self.assertEqual(
+            (second_result.parse_cache_hits, second_result.parse_cache_misses),
+            (result.parse_cache_hits, result.parse_cache_misses),
+        )
+
     def test_command_level_eval_source_is_resolved(self):
         with ScriptProject() as project:
             dep = project.write("dep.sh", 'echo "dep"\n')
@@ -1414,6 +1439,47 @@ class SourceEvaluatorTestCase(unittest.TestCase):
 
         self.assertEqual([event.path for event in result.events], [first, second])
 
+    def test_brace_alternatives_under_missing_directories_are_not_globbed(self):
+        with ScriptProject() as project:
+            dep = project.write("plugins/core2/dep.sh", 'echo "dep"\n')
+            project.mkdir("plugins/core1")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                shopt -s nullglob
+                for dep in plugins/{core,extra}{1..3}/*.sh; do
+                  source "$dep"
+                done
+                """))
+
+            with mock.patch.object(
+                source_resolver, "_glob_matches", side_effect=source_resolver._glob_matches,
+            ) as glob_matches:
+                result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep])
+        self.assertEqual(
+            [call.args[0] for call in glob_matches.call_args_list],
+            ["plugins/core1/*.sh", "plugins/core2/*.sh", "plugins/core3/*.sh"],
+        )
+
+    def test_brace_expansions_past_the_limit_fail_closed(self):
+        with ScriptProject() as project:
+            entry = project.write("main.sh", "source lib/{a..z}{a..z}{0..99}.sh\n")
+
+            with self.assertRaisesRegex(NotImplementedError, "more than 10000 expansions") as cm:
+                SourceEvaluator().evaluate(entry)
+
+        self.assertEqual(cm.exception.code, "unsupported.source.brace-expansion")
+        self.assertEqual(cm.exception.details, {"limit": 10000})
+
+    def test_brace_expansion_limit_is_configurable(self):
+        with ScriptProject() as project:
+            dep = project.write("lib/aa0.sh", "true\n")
+            entry = project.write("main.sh", "source lib/{a..z}{a..z}{0..99}.sh\n")
+
+            result = SourceEvaluator(max_brace_expansions=26 * 26 * 100).evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep])
+
     def test_nullglob_and_globignore_for_loop_sources_are_evaluated(self):
         with ScriptProject() as project:
             entry = project.write("main.sh", textwrap.dedent("""\
@@ -1607,6 +1673,366 @@ class SourceEvaluatorTestCase(unittest.TestCase):
             with self.assertRaises(RecursionError):
                 SourceEvaluator().evaluate(entry)
 
+    def test_source_free_compound_commands_are_skipped(self):
+        content = textwrap.dedent("""\
+            if [ -n "$VERBOSE" ]; then
+              echo "verbose"
+            else
+              printf '%s\\n' quiet
+            fi
+            case "$1" in
+              -h) echo usage ;;
+            esac
+            source ./dep.sh
+            """)
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", 'echo "dep"\n')
+            entry = project.write("main.sh", content)
+
+            with mock.patch.object(SourceEvaluator, "_apply_if_block") as apply_if_block:
+                skipped = SourceEvaluator().evaluate(entry)
+            evaluated = SourceEvaluator(skip_source_free=False).evaluate(entry)
+
+        apply_if_block.assert_not_called()
+        self.assertEqual([event.path for event in skipped.events], [dep])
+        self.assertEqual(skipped.events, evaluated.events)
+
+    def test_source_free_skip_keeps_the_status_of_function_bodies(self):
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", "true\n")
+            guarded = project.write("guarded.sh", textwrap.dedent("""\
+                f() { if [ 1 = 1 ]; then echo yes; fi; }
+                f && source ./dep.sh
+                """))
+            guarded_call = project.write("guarded_call.sh", textwrap.dedent("""\
+                g() { source ./dep.sh; }
+                f() { if [ 1 = 1 ]; then echo yes; fi; }
+                f && g
+                """))
+
+            for entry in (guarded, guarded_call):
+                with self.subTest(entry=entry.name):
+                    skipped = SourceEvaluator().evaluate(entry)
+                    evaluated = SourceEvaluator(skip_source_free=False).evaluate(entry)
+
+                    self.assertEqual([event.path for event in skipped.events], [dep])
+                    self.assertEqual(skipped.events[0].occurrence_model, OccurrenceModel.ONCE)
+                    self.assertEqual(skipped.events, evaluated.events)
+
+    def test_source_free_skip_respects_shadowing_functions(self):
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                echo() { source ./dep.sh; }
+                if true; then
+                  echo "loaded"
+                fi
+                """))
+
+            result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep])
+
+    def test_relevance_slicing_skips_assignments_that_cannot_reach_a_source(self):
+        with ScriptProject() as project:
+            dep = project.write("lib/dep.sh", 'GREETING="hello $NAME"\necho "$GREETING"\n')
+            loader = project.write("loader.sh", 'source "$LIB/dep.sh"\n')
+            entry = project.write("main.sh", textwrap.dedent("""\
+                LIB=./lib
+                NAME=world
+                OPTIONS=( --help --version )
+                echo "${OPTIONS[@]}"
+                source ./loader.sh
+                """))
+
+            evaluator = SourceEvaluator(relevance_slicing=True)
+            result = evaluator.evaluate(entry)
+            full_result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [loader, dep])
+        self.assertEqual(
+            [event.path for event in result.events],
+            [event.path for event in full_result.events],
+        )
+        self.assertIn("LIB", result.final_state.variables)
+        self.assertNotIn("NAME", result.final_state.variables)
+        self.assertNotIn("GREETING", result.final_state.variables)
+        self.assertNotIn("OPTIONS", result.final_state.arrays)
+        self.assertIn("OPTIONS", full_result.final_state.arrays)
+
+    def test_repeated_sources_replay_summaries_of_unchanged_inputs(self):
+        with ScriptProject() as project:
+            common = project.write("common.sh", "true\n")
+            dep = project.write("dep.sh", textwrap.dedent("""\
+                LOADED=$((LOADED + 1))
+                greet() { echo "hi"; }
+                source ./common.sh
+                """))
+            entry = project.write("main.sh", textwrap.dedent("""\
+                LOADED=0
+                for name in a b c; do
+                  source ./dep.sh
+                  LOADED=0
+                done
+                """))
+
+            result = SourceEvaluator().evaluate(entry)
+            full_result = SourceEvaluator(summarize_sources=False).evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep, common] * 3)
+        self.assertEqual((result.summary_cache_hits, result.summary_cache_misses), (2, 3))
+        self.assertEqual(result.events, full_result.events)
+        self.assertEqual(result.final_state, full_result.final_state)
+        self.assertEqual(
+            [event.state_before.variables["name"] for event in result.events[::2]],
+            ["a", "b", "c"],
+        )
+
+    def test_summaries_include_names_read_by_replayed_nested_sources(self):
+        with ScriptProject() as project:
+            project.write("a.sh", "true\n")
+            b = project.write("b.sh", "true\n")
+            project.write("inner.sh", 'source "./$TARGET.sh"\n')
+            project.write("outer.sh", 'echo "$MODE"\nsource ./inner.sh\n')
+            entry = project.write("main.sh", textwrap.dedent("""\
+                TARGET=a
+                MODE=1
+                source ./outer.sh
+                MODE=2
+                source ./outer.sh
+                TARGET=b
+                source ./outer.sh
+                """))
+
+            result = SourceEvaluator().evaluate(entry)
+            full_result = SourceEvaluator(summarize_sources=False).evaluate(entry)
+
+        self.assertEqual(result.events[-1].path, b)
+        self.assertEqual(result.events, full_result.events)
+
+    def test_repeated_function_calls_replay_summaries_of_unchanged_inputs(self):
+        with ScriptProject() as project:
+            a = project.write("plugins/a.sh", "true\n")
+            b = project.write("plugins/b.sh", "true\n")
+            other_a = project.write("other/a.sh", "true\n")
+            other_b = project.write("other/b.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                PLUGINS=./plugins
+                load() {
+                  local name=$1
+                  source "$PLUGINS/$name.sh"
+                }
+                for round in 1 2 3; do
+                  load a
+                  load b
+                  PLUGINS=./other
+                done
+                """))
+
+            result = SourceEvaluator().evaluate(entry)
+            full_result = SourceEvaluator(summarize_functions=False).evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [a, b, *[other_a, other_b] * 2])
+        self.assertEqual((result.summary_cache_hits, result.summary_cache_misses), (2, 8))
+        self.assertEqual(result.events, full_result.events)
+        self.assertEqual(result.disabled_sources, full_result.disabled_sources)
+        self.assertEqual(result.final_state, full_result.final_state)
+
+    def test_unresolved_dispatch_is_not_replayed_once_functions_may_source(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", "true\n")
+            project.write("run.sh", "$COMMAND\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                source ./run.sh
+                load() { source ./dep.sh; }
+                source ./run.sh
+                """))
+
+            with self.assertRaisesRegex(NotImplementedError, "dynamic function dispatch"):
+                SourceEvaluator().evaluate(entry)
+
+    def test_exhausted_budget_widens_constructs_that_cannot_source(self):
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for mode in a b c; do
+                  if [ -n "$1" ]; then MODE=$mode; fi
+                done
+                if true; then TARGET=dep; fi
+                source ./dep.sh
+                """))
+
+            result = SourceEvaluator(budget=EvaluationBudget(max_forks=2)).evaluate(entry)
+            full_result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep])
+        self.assertNotIn("TARGET", result.events[0].state_before.variables)
+        self.assertEqual(full_result.events[0].state_before.variables["TARGET"], "dep")
+        self.assertEqual(full_result.diagnostics, ())
+        [diagnostic] = result.diagnostics
+        self.assertEqual(diagnostic.code, "evaluation.budget-exhausted")
+        self.assertEqual(diagnostic.severity, DiagnosticSeverity.WARNING)
+        self.assertEqual(diagnostic.location.line, 2)
+        self.assertEqual(diagnostic.details["exhausted"], "forks")
+        self.assertEqual(diagnostic.details["widened"], [f"{entry}:4"])
+
+    def test_exhausted_budget_fails_closed_before_constructs_that_may_source(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for mode in a b c; do
+                  if [ -n "$1" ]; then MODE=$mode; fi
+                done
+                if [ -n "$MODE" ]; then source ./dep.sh; fi
+                """))
+
+            with self.assertRaisesRegex(NotImplementedError, "evaluation budget exhausted") as cm:
+                SourceEvaluator(budget=EvaluationBudget(max_forks=2)).evaluate(entry)
+            result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual(cm.exception.diagnostic.code, "unsupported.source.budget")
+        self.assertEqual(result.diagnostics, ())
+
+    def test_loops_stop_iterating_once_the_body_reaches_a_fixpoint(self):
+        with ScriptProject() as project:
+            marked = project.write("yes.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                mark() { MARKED=yes; }
+                for file in one two three four five; do
+                  mark
+                done
+                source "./$MARKED.sh"
+                """))
+
+            with mock.patch.object(
+                SourceEvaluator,
+                "_apply_function_call",
+                autospec=True,
+                side_effect=SourceEvaluator._apply_function_call,
+            ) as apply_function_call:
+                result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([call.args[1].text for call in apply_function_call.call_args_list].count("mark"), 2)
+        self.assertEqual([event.path for event in result.events], [marked])
+        self.assertEqual(result.final_state.variables["file"], "five")
+
+    def test_loops_whose_body_reads_the_loop_variable_run_every_iteration(self):
+        with ScriptProject() as project:
+            last = project.write("five.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                mark() { MARKED=$file; }
+                for file in one two three four five; do
+                  mark
+                done
+                source "./$MARKED.sh"
+                """))
+
+            with mock.patch.object(
+                SourceEvaluator,
+                "_apply_function_call",
+                autospec=True,
+                side_effect=SourceEvaluator._apply_function_call,
+            ) as apply_function_call:
+                result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([call.args[1].text for call in apply_function_call.call_args_list].count("mark"), 5)
+        self.assertEqual([event.path for event in result.events], [last])
+
+    def test_while_loop_at_a_fixpoint_fails_without_exhausting_the_iteration_limit(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                mark() { MARKED=yes; }
+                while true; do
+                  LOOPED=yes
+                  mark
+                done
+                source ./dep.sh
+                """))
+
+            with mock.patch.object(
+                SourceEvaluator,
+                "_apply_function_call",
+                autospec=True,
+                side_effect=SourceEvaluator._apply_function_call,
+            ) as apply_function_call:
+                with self.assertRaisesRegex(NotImplementedError, "exceeds modeled iteration limit") as cm:
+                    SourceEvaluator().evaluate(entry)
+
+        self.assertEqual(cm.exception.diagnostic.code, "unsupported.source.loop-iteration")
+        self.assertEqual([call.args[1].text for call in apply_function_call.call_args_list].count("mark"), 2)
+
+    def test_arithmetic_expressions_are_parsed_once_per_text(self):
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for ((i = 0; i < 40; i++)); do
+                  if (( i % 7 == 3 )); then LAST=$i; fi
+                done
+                if (( LAST == 38 )); then source ./dep.sh; fi
+                """))
+
+            SourceEvaluator._parse_arithmetic_expression.cache_clear()
+            with mock.patch("methods.source_evaluator.ast.parse", wraps=ast.parse) as parse:
+                result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [dep])
+        self.assertLessEqual(parse.call_count, 4)
+
+    def test_case_patterns_compile_once_per_block_and_pattern_values(self):
+        with ScriptProject() as project:
+            a = project.write("a.sh", "true\n")
+            b = project.write("b.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for PREFIX in a a b; do
+                  for word in a1 b2 a3 b4; do
+                    case "$word" in
+                      "$PREFIX"*) MATCHED=$word ;;
+                      *) OTHER=$word ;;
+                    esac
+                  done
+                  source "./$PREFIX.sh"
+                done
+                """))
+
+            with mock.patch.object(
+                SourceEvaluator,
+                "_validate_case_pattern",
+                autospec=True,
+                side_effect=SourceEvaluator._validate_case_pattern,
+            ) as validate_case_pattern:
+                result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [a, a, b])
+        self.assertEqual(result.final_state.variables["MATCHED"], "b4")
+        self.assertEqual(result.final_state.variables["OTHER"], "a3")
+        self.assertEqual(validate_case_pattern.call_count, 4)
+
+    def test_repeated_source_expressions_resolve_once_per_referenced_values(self):
+        with ScriptProject() as project:
+            lib = project.write("lib/foo.sh", "true\n")
+            other = project.write("other/foo.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                LIB_DIR=lib
+                for i in 1 2 3; do
+                  source "$LIB_DIR/foo.sh" "$i"
+                done
+                LIB_DIR=other
+                source "$LIB_DIR/foo.sh"
+                """))
+
+            with mock.patch.object(
+                source_resolver.SourceResolver,
+                "resolve_source_expression",
+                autospec=True,
+                side_effect=source_resolver.SourceResolver.resolve_source_expression,
+            ) as resolve_source_expression:
+                result = SourceEvaluator().evaluate(entry)
+
+        self.assertEqual([event.path for event in result.events], [lib, lib, lib, other])
+        self.assertEqual(resolve_source_expression.call_count, 2)
+        self.assertEqual((result.resolution_cache_hits, result.resolution_cache_misses), (2, 2))
+
 
 if __name__ == "__main__":
     unittest.main()
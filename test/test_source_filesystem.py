@@ -0,0 +1,146 @@
+import glob
+import os
+import textwrap
+import unittest
+from unittest import mock
+
+from methods.source_evaluator import SourceEvaluator
+from methods.source_filesystem import FileSystemView, cached_filesystem, filesystem
+from test.support import ScriptProject
+
+
+class FileSystemViewTestCase(unittest.TestCase):
+    def test_walk_matches_os_walk_and_honours_pruning(self):
+        with ScriptProject() as project:
+            project.write("a/one.sh", "")
+            project.write("a/b/two.sh", "")
+            project.write("c/d/three.sh", "")
+            os.symlink(project.path("a"), project.path("link"))
+
+            def walked(walk):
+                result = []
+                for directory, dirnames, filenames in walk(project.root):
+                    dirnames.sort()
+                    result.append((directory, list(dirnames), sorted(filenames)))
+                    if os.path.basename(directory) == "c":
+                        dirnames[:] = []
+                return result
+
+            self.assertEqual(walked(FileSystemView().walk), walked(os.walk))
+
+    def test_glob_matches_glob_glob(self):
+        with ScriptProject() as project:
+            project.write("a/one.sh", "")
+            project.write("a/.hidden.sh", "")
+            project.write("a/b/two.sh", "")
+            project.write("c/d/three.sh", "")
+            os.symlink(project.path("a"), project.path("link"))
+            os.symlink(project.path("missing"), project.path("broken.sh"))
+
+            for pattern in ["*", "*/", "*.sh", "*/*.sh", "a/.*", "../*/a", "a/../c/*", "**", "**/*.sh", "a/**/"]:
+                for recursive in (False, True):
+                    with self.subTest(pattern=pattern, recursive=recursive):
+                        self.assertEqual(
+                            FileSystemView().glob(pattern, root_dir=project.root, recursive=recursive),
+                            glob.glob(pattern, root_dir=project.root, recursive=recursive),
+                        )
+                        absolute = os.path.join(project.root, pattern)
+                        self.assertEqual(
+                            FileSystemView().glob(absolute, recursive=recursive),
+                            glob.glob(absolute, recursive=recursive),
+                        )
+
+    def test_lookups_are_cached_only_while_a_view_is_active(self):
+        with ScriptProject() as project:
+            path = project.write("dep.sh", "")
+
+            with cached_filesystem() as view:
+                self.assertTrue(filesystem().is_file(path))
+                path.unlink()
+                self.assertTrue(filesystem().exists(path))
+                with cached_filesystem() as inner:
+                    self.assertIs(inner, view)
+            self.assertEqual((view.syscalls["stat"], view.hits), (1, 1))
+            self.assertFalse(filesystem().exists(path))
+
+    def test_repeated_sources_stat_and_resolve_each_path_once(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for i in 1 2 3 4; do
+                  if [ -f ./dep.sh ]; then
+                    source ./dep.sh "$i"
+                  fi
+                done
+                """))
+
+            with mock.patch("os.stat", side_effect=os.stat) as stat:
+                result = SourceEvaluator().evaluate(entry)
+
+        dep_stats = [call for call in stat.call_args_list if str(call.args[0]).endswith("dep.sh")]
+        self.assertEqual(len(result.events), 4)
+        self.assertEqual(len(dep_stats), 1)
+        self.assertGreater(result.filesystem_cache_hits, 0)
+        self.assertGreater(result.filesystem_syscalls, 0)
+
+    def test_globs_list_only_directories_matching_earlier_segments(self):
+        with ScriptProject() as project:
+            project.write("lib/one/completions/one.bash", "true\n")
+            project.write("lib/two/completions/two.bash", "true\n")
+            project.write("lib/three/other/deep/three.bash", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                shopt -s extglob
+                for file in lib/*/completions/*.bash; do
+                  source "$file"
+                done
+                """))
+
+            with mock.patch.object(
+                FileSystemView, "listdir", autospec=True, side_effect=FileSystemView.listdir,
+            ) as listdir:
+                result = SourceEvaluator().evaluate(entry)
+
+        listed = {os.path.relpath(call.args[1], project.root) for call in listdir.call_args_list}
+        self.assertEqual([event.path.name for event in result.events], ["one.bash", "two.bash"])
+        self.assertEqual(listed, {
+            "lib", "lib/one", "lib/two", "lib/three", "lib/one/completions", "lib/two/completions",
+        })
+
+    def test_plain_globs_list_directories_through_the_view(self):
+        with ScriptProject() as project:
+            project.write("lib/one.bash", "true\n")
+            project.write("lib/two.bash", "true\n")
+            entry = project.write("main.sh", textwrap.dedent("""\
+                for i in 1 2 3; do
+                  for file in lib/*.bash; do
+                    source "$file"
+                  done
+                done
+                """))
+
+            with mock.patch("os.scandir", side_effect=os.scandir) as scandir:
+                result = SourceEvaluator().evaluate(entry)
+
+        lib_listings = [call for call in scandir.call_args_list if str(call.args[0]).endswith("lib")]
+        self.assertEqual([event.path.name for event in result.events], ["one.bash", "two.bash"] * 3)
+        self.assertEqual(len(lib_listings), 1)
+
+    def test_find_sources_list_only_directories_within_maxdepth_and_path_prefix(self):
+        with ScriptProject() as project:
+            project.write("plugins/main/init.sh", "true\n")
+            project.write("plugins/main/deep/nested/other.sh", "true\n")
+            project.write("data/a/b/c.sh", "true\n")
+            entry = project.write("main.sh", 'source "$(find . -maxdepth 3 -path ./plugins/main/init.sh)"\n')
+
+            with mock.patch.object(
+                FileSystemView, "listdir", autospec=True, side_effect=FileSystemView.listdir,
+            ) as listdir:
+                result = SourceEvaluator().evaluate(entry)
+
+        listed = {os.path.relpath(call.args[1], project.root) for call in listdir.call_args_list}
+        self.assertEqual([event.path.name for event in result.events], ["init.sh"])
+        self.assertEqual(listed, {".", "plugins", "plugins/main"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import textwrap
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from methods.source_effects import (
     ArrayAssignment,
@@ -16,6 +17,7 @@ from methods.source_effects import (
     SourceSite,
     WhileLoop,
 )
+from methods import source_frontend
 from methods.source_frontend import LineParserFrontend
 
 
@@ -513,6 +515,43 @@ class LineParserFrontendTestCase(unittest.TestCase):
         self.assertIsInstance(block, CaseBlock)
         self.assertEqual([arm.terminator for arm in block.arms], [";&", ";;&", ";;"])
 
+    def test_nested_blocks_lex_each_distinct_line_once(self):
+        content = """\
+            outer() {
+              if [ -n "$A" ]; then # comment
+                for f in a b; do
+                  case "$f" in
+                    a) source ./a.sh ;;
+                  esac
+                done
+              fi
+            }
+            """
+        with mock.patch.object(
+            source_frontend.SHELL_COMMENT_STRIPPER,
+            "strip",
+            wraps=source_frontend.SHELL_COMMENT_STRIPPER.strip,
+        ) as strip_comments, mock.patch.object(
+            source_frontend,
+            "get_command_spans",
+            wraps=source_frontend.get_command_spans,
+        ) as get_command_spans:
+            ir = self.parse(content)
+
+        self.assertIsInstance(ir.nodes[0], FunctionDef)
+        self.assertEqual(ir.source_sites[0].source_expression, "./a.sh")
+        for scan in (strip_comments, get_command_spans):
+            scanned_texts = [call.args[0] for call in scan.call_args_list]
+            self.assertEqual(len(scanned_texts), len(set(scanned_texts)))
+
+    def test_leading_separators_do_not_hide_block_headers(self):
+        ir = self.parse("""\
+            ; if true; then source ./dep.sh; fi
+            """)
+
+        self.assertIsInstance(ir.nodes[0], IfBlock)
+        self.assertEqual(ir.source_sites[0].source_expression, "./dep.sh")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,126 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+from pathlib import Path
+
+from methods.source_evaluator import SourceEvaluator
+from methods.source_frontend import LineParserFrontend
+from methods.source_ir_cache import CACHE_ENTRY_SUFFIX, ScriptIRCache
+from test.support import ScriptProject
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+
+class CountingFrontend(LineParserFrontend):
+    def __init__(self):
+        self.parsed = []
+
+    def parse(self, path, content):
+        self.parsed.append(Path(path).name)
+        return super().parse(path, content)
+
+
+class ScriptIRCacheTestCase(unittest.TestCase):
+    def test_unchanged_files_are_not_reparsed_across_evaluations(self):
+        with ScriptProject() as project:
+            dep = project.write("dep.sh", 'echo "dep"\n')
+            entry = project.write("main.sh", "source ./dep.sh\n")
+            cache_dir = project.path("cache")
+
+            first_frontend = CountingFrontend()
+            first = SourceEvaluator(frontend=first_frontend, ir_cache=ScriptIRCache(cache_dir)).evaluate(entry)
+            second_frontend = CountingFrontend()
+            second = SourceEvaluator(frontend=second_frontend, ir_cache=ScriptIRCache(cache_dir)).evaluate(entry)
+
+            dep.write_text('echo "changed"\n')
+            third_frontend = CountingFrontend()
+            third = SourceEvaluator(frontend=third_frontend, ir_cache=ScriptIRCache(cache_dir)).evaluate(entry)
+
+        self.assertEqual(first_frontend.parsed, ["main.sh", "dep.sh"])
+        self.assertEqual((first.disk_cache_hits, first.disk_cache_misses), (0, 2))
+        self.assertEqual(second_frontend.parsed, [])
+        self.assertEqual((second.disk_cache_hits, second.disk_cache_misses), (2, 0))
+        self.assertEqual([event.path for event in second.events], [event.path for event in first.events])
+        self.assertEqual(third_frontend.parsed, ["dep.sh"])
+        self.assertEqual((third.disk_cache_hits, third.disk_cache_misses), (1, 1))
+
+    def test_version_stamp_separates_entries(self):
+        with ScriptProject() as project:
+            path = project.write("main.sh", "echo main\n")
+            cache = ScriptIRCache(project.path("cache"))
+            frontend = CountingFrontend()
+
+            cache.parse(frontend, path, path.read_text())
+            frontend.cache_version = "line-test"
+            cache.parse(frontend, path, path.read_text())
+
+        self.assertEqual(frontend.parsed, ["main.sh", "main.sh"])
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_corrupt_entry_is_treated_as_miss(self):
+        with ScriptProject() as project:
+            path = project.write("main.sh", "echo main\n")
+            cache_dir = project.path("cache")
+            ScriptIRCache(cache_dir).parse(LineParserFrontend(), path, path.read_text())
+            for entry in cache_dir.iterdir():
+                entry.write_bytes(b"not a pickle")
+
+            cache = ScriptIRCache(cache_dir)
+            ir = cache.parse(LineParserFrontend(), path, path.read_text())
+
+        self.assertEqual(len(ir.nodes), 1)
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    def test_size_cap_evicts_least_recently_used_entries(self):
+        with ScriptProject() as project:
+            paths = [project.write(f"lib{index}.sh", f"echo {index}\n") for index in range(3)]
+            cache_dir = project.path("cache")
+            cache = ScriptIRCache(cache_dir)
+            for path in paths:
+                cache.parse(LineParserFrontend(), path, path.read_text())
+            entries = sorted(cache_dir.glob(f"*{CACHE_ENTRY_SUFFIX}"))
+            for age, entry in enumerate(entries):
+                os.utime(entry, ns=(age * 10 ** 9, age * 10 ** 9))
+            entry_size = max(entry.stat().st_size for entry in entries)
+
+            capped = ScriptIRCache(cache_dir, max_bytes=entry_size * 2)
+            extra = project.write("lib3.sh", "echo 3\n")
+            capped.parse(LineParserFrontend(), extra, extra.read_text())
+            remaining = {entry.name for entry in cache_dir.glob(f"*{CACHE_ENTRY_SUFFIX}")}
+
+        self.assertEqual(capped.evictions, 2)
+        self.assertEqual(len(remaining), 2)
+        self.assertNotIn(entries[0].name, remaining)
+        self.assertNotIn(entries[1].name, remaining)
+        self.assertIn(entries[2].name, remaining)
+
+    def test_cli_reports_cache_hits_and_misses(self):
+        with ScriptProject() as project:
+            project.write("dep.sh", 'echo "dep"\n')
+            entry = project.write("main.sh", textwrap.dedent("""\
+                source ./dep.sh
+                source ./dep.sh
+                """))
+            command = [
+                sys.executable,
+                str(REPO_ROOT / "modashc.py"),
+                str(entry),
+                str(project.path("out.sh")),
+                "--cache-dir",
+                str(project.path("cache")),
+                "--cache-stats",
+            ]
+
+            first = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+            second = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True)
+
+        self.assertEqual(first.returncode, 0, first.stderr)
+        self.assertIn("parse cache: 1 hits, 2 misses; disk cache: 0 hits, 2 misses", first.stderr)
+        self.assertEqual(second.returncode, 0, second.stderr)
+        self.assertIn("parse cache: 1 hits, 2 misses; disk cache: 2 hits, 0 misses", second.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
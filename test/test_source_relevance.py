@@ -0,0 +1,89 @@
+import textwrap
+import unittest
+from pathlib import Path
+
+from methods.source_effects import FunctionDef, IfBlock, RawCommand, SourceLocation
+from methods.source_frontend import LineParserFrontend
+from methods.source_relevance import (
+    RelevanceSlice,
+    node_may_affect_state,
+    node_may_source,
+    raw_command_may_affect_state,
+    raw_command_may_source,
+)
+
+
+class SourceRelevanceTestCase(unittest.TestCase):
+    def parse(self, content: str):
+        return LineParserFrontend().parse(Path("main.sh"), textwrap.dedent(content))
+
+    def test_frontend_annotates_every_node(self):
+        ir = self.parse("""\
+            greet() {
+              echo "hello $1"
+            }
+            loader() {
+              if [ -f "$1" ]; then
+                source "$1"
+              fi
+            }
+            """)
+
+        greet, loader = ir.nodes
+        self.assertIsInstance(greet, FunctionDef)
+        self.assertIs(greet._may_source, False)
+        self.assertIs(greet._may_affect_state, True)
+        self.assertIs(greet.body[0]._may_source, False)
+        self.assertIs(greet.body[0]._may_affect_state, False)
+        self.assertIs(loader._may_source, True)
+        self.assertIsInstance(loader.body[0], IfBlock)
+        self.assertIs(loader.body[0]._may_source, True)
+
+    def test_flags_are_computed_for_nodes_built_outside_the_frontend(self):
+        location = SourceLocation(Path("main.sh"), 1, 1)
+        node = RawCommand(location, 'eval "source $file"')
+
+        self.assertIsNone(node._may_source)
+        self.assertTrue(node_may_source(node))
+        self.assertTrue(node_may_affect_state(node))
+        self.assertIs(node._may_source, True)
+
+    def test_raw_command_predicates(self):
+        self.assertTrue(raw_command_may_source('bash -c "source ./dep.sh"'))
+        self.assertTrue(raw_command_may_source('eval "$loader"'))
+        self.assertFalse(raw_command_may_source('echo source'))
+        self.assertFalse(raw_command_may_source('{'))
+
+        self.assertFalse(raw_command_may_affect_state('echo "$HOME" > out.txt'))
+        self.assertFalse(raw_command_may_affect_state('[[ -n $x ]]'))
+        self.assertTrue(raw_command_may_affect_state('echo $((count++))'))
+        self.assertTrue(raw_command_may_affect_state('printf -v name %s value'))
+        self.assertTrue(raw_command_may_affect_state(': "${PREFIX:=/usr}"'))
+        self.assertTrue(raw_command_may_affect_state('shopt -s nullglob'))
+        self.assertTrue(raw_command_may_affect_state('my_function arg'))
+
+    def test_relevance_slice_follows_assignments_into_source_reads(self):
+        relevance = RelevanceSlice()
+        relevance.add_script(self.parse("""\
+            ROOT=/opt/app
+            LIB="$ROOT/lib"
+            LABEL="app $VERSION"
+            echo "$LABEL"
+            source "$LIB/core.sh"
+            """))
+
+        self.assertTrue(relevance.tracks("LIB"))
+        self.assertTrue(relevance.tracks("ROOT"))
+        self.assertTrue(relevance.tracks("IFS"))
+        self.assertFalse(relevance.tracks("LABEL"))
+        self.assertFalse(relevance.tracks("VERSION"))
+
+        relevance.dropped.add("LABEL")
+        self.assertFalse(relevance.widened())
+        relevance.add_script(self.parse('eval "$LABEL"\n'))
+        self.assertTrue(relevance.tracks("LABEL"))
+        self.assertTrue(relevance.widened())
+
+
+if __name__ == "__main__":
+    unittest.main()
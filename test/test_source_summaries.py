@@ -0,0 +1,41 @@
+import unittest
+from pathlib import Path
+
+from methods.source_evaluator import COPY_ON_WRITE_STATE_FIELDS, EvaluationState
+from methods.source_summaries import MappingDelta, StateDelta, state_fingerprint
+
+
+class SourceSummariesTestCase(unittest.TestCase):
+    def test_mapping_delta_records_only_changed_keys(self):
+        before = {"A": "1", "B": "2", "C": "3"}
+        after = {"A": "1", "B": "changed", "D": "4"}
+
+        delta = MappingDelta.between(before, after)
+
+        self.assertEqual(delta.changed, {"B": "changed", "D": "4"})
+        self.assertEqual(delta.removed, frozenset({"C"}))
+        self.assertEqual(delta.applied_to({"A": "other", "C": "3"}), {"A": "other", "B": "changed", "D": "4"})
+
+    def test_state_delta_replays_on_states_that_differ_in_unread_names(self):
+        entry = EvaluationState(cwd=Path("/"), variables={"IN": "x", "UNREAD": "1"})
+        exit_state = entry.child_shell_copy()
+        exit_state.variables["OUT"] = "x!"
+        exit_state.ambiguous_variables.add("OUT")
+        exit_state.cwd = Path("/tmp")
+        delta = StateDelta.between(entry, exit_state, COPY_ON_WRITE_STATE_FIELDS)
+
+        other = EvaluationState(cwd=Path("/"), variables={"IN": "x", "UNREAD": "2"})
+        names = ("IN", "OUT")
+        self.assertEqual(
+            state_fingerprint(other, names, COPY_ON_WRITE_STATE_FIELDS),
+            state_fingerprint(entry, names, COPY_ON_WRITE_STATE_FIELDS),
+        )
+        delta.apply(other)
+
+        self.assertEqual(other.variables, {"IN": "x", "UNREAD": "2", "OUT": "x!"})
+        self.assertEqual(other.ambiguous_variables, {"OUT"})
+        self.assertEqual(other.cwd, Path("/tmp"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,7 +7,7 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from methods.shell_line import first_top_level_pipeline_index, get_commands
+from methods.shell_line import first_top_level_pipeline_index, get_command_spans, get_commands
 from methods.sources import get_sources, resolve_variable_references
 from test.support import ScriptProject
 
@@ -61,6 +61,22 @@ class SourceRegressionTestCase(unittest.TestCase):
             ['[[ -f ./dep.sh ]]', 'source ./dep.sh'],
         )
 
+    def test_get_command_spans_locate_stripped_commands(self):
+        line = '  a ;a && "x;y" \\; z || `b # c` \'d\' # e'
+
+        self.assertEqual(
+            get_command_spans(line),
+            (('a', 2, 3), ('a', 5, 6), ('"x;y" \\; z', 10, 20), ("`b # c` 'd'", 24, 35)),
+        )
+        for command, start, end in get_command_spans(line):
+            self.assertEqual(line[start:end], command)
+
+    def test_get_commands_keeps_unterminated_quotes_and_escapes(self):
+        self.assertEqual(get_commands("echo 'a; b"), ["echo 'a; b"])
+        self.assertEqual(get_commands('echo "a\\" ; b" ; c'), ['echo "a\\" ; b"', 'c'])
+        self.assertEqual(get_commands('echo `a; b'), ['echo `a; b'])
+        self.assertEqual(get_commands('(a; b) && [[ x;y ]] ;#c'), ['(a; b)', '[[ x;y ]]'])
+
     def test_top_level_pipeline_detection_ignores_non_pipeline_bars(self):
         self.assertIsNone(first_top_level_pipeline_index('source ./dep.sh || echo missing'))
         self.assertIsNone(first_top_level_pipeline_index('[[ "$x" == a|b ]] && source ./dep.sh'))